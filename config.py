@@ -50,11 +50,52 @@ DEFAULT_ROUTING = "europe"
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', f'sqlite:///{os.path.join(os.path.dirname(__file__), "tft_meta.db")}')
 DATABASE_DIR = os.path.join(os.path.dirname(__file__), 'database')
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE')  # Perfil de pragmas SQLite: default, bulk_ingest, read_mostly, off (vacío = el del proceso)
+SQLITE_PRAGMAS = os.getenv('SQLITE_PRAGMAS', '')  # Overrides puntuales, p.ej. "cache_size=-262144,mmap_size=0"
+
+# Archivo de partidas crudas (JSONL comprimido, permite reconstruir la BD sin la API)
+MATCH_ARCHIVE_DIR = os.getenv('MATCH_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), 'match_archive'))
+MATCH_ARCHIVE_ENABLED = os.getenv('MATCH_ARCHIVE_ENABLED', '1') not in ('0', 'false', 'False')
+MATCH_ARCHIVE_SEGMENT_SIZE = 5000  # Partidas por segmento
+
+# Snapshots Parquet para análisis (requiere pyarrow, opcional)
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', os.path.join(os.path.dirname(__file__), 'snapshots'))
 
 # Meta Tracker Settings
 MIN_GAMES_FOR_META = 50  # Mínimo de partidas para considerar una comp en el meta
 GM_PLAYERS_PER_REGION = 100  # Jugadores GM+ a trackear por región
 MATCHES_PER_PLAYER = 20  # Partidas a recopilar por jugador
 DATA_RETENTION_DAYS = 30  # Días de datos históricos a mantener
-RATE_LIMIT_DELAY = 1.2  # Segundos entre requests para respetar rate limits
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '200'))  # Partidas borradas por transacción
+RETENTION_VACUUM_PAGES = int(os.getenv('RETENTION_VACUUM_PAGES', '2000'))  # Páginas libres devueltas al SO por ejecución
+
+# Rate limiting (los límites reales se leen de las cabeceras X-*-Rate-Limit de Riot)
+RIOT_APP_RATE_LIMIT = os.getenv('RIOT_APP_RATE_LIMIT', '20:1,100:120')  # Límite asumido antes de la primera respuesta
+
+# HTTP client (conexiones keep-alive por host de Riot)
+RIOT_HTTP_POOL_SIZE = int(os.getenv('RIOT_HTTP_POOL_SIZE', '10'))  # Conexiones por host
+RIOT_HTTP_CONNECT_TIMEOUT = float(os.getenv('RIOT_HTTP_CONNECT_TIMEOUT', '5'))  # Segundos
+RIOT_HTTP_READ_TIMEOUT = float(os.getenv('RIOT_HTTP_READ_TIMEOUT', '10'))  # Segundos
+RIOT_API_BASE_URL = os.getenv('RIOT_API_BASE_URL')  # p.ej. http://127.0.0.1:8765 para el servidor mock local
+
+# Reintentos y circuit breaker
+RIOT_MAX_RETRIES = int(os.getenv('RIOT_MAX_RETRIES', '3'))  # Reintentos por request (429, 5xx, timeouts)
+RIOT_BACKOFF_BASE = float(os.getenv('RIOT_BACKOFF_BASE', '1'))  # Segundos, se duplica en cada intento
+RIOT_BACKOFF_MAX = float(os.getenv('RIOT_BACKOFF_MAX', '30'))  # Segundos máximos entre reintentos
+RIOT_BREAKER_THRESHOLD = int(os.getenv('RIOT_BREAKER_THRESHOLD', '5'))  # Fallos seguidos para abrir el circuito de un host
+RIOT_BREAKER_COOLDOWN = float(os.getenv('RIOT_BREAKER_COOLDOWN', '30'))  # Segundos con el circuito abierto
+
+# Colector asíncrono
+ASYNC_CONCURRENCY_PER_CLUSTER = int(os.getenv('ASYNC_CONCURRENCY_PER_CLUSTER', '8'))  # Requests simultáneos por routing
+
+# Planificador de crawl (prioriza jugadores con más partidas nuevas esperadas)
+CRAWL_RECENT_WINDOW_DAYS = 7  # Ventana para estimar partidas por día de cada jugador
+SNAPSHOT_LOOKBACK_DAYS = 30  # Snapshots de liga que lee el scheduler (la retención borra los más antiguos)
+CRAWL_API_BUDGET = int(os.getenv('CRAWL_API_BUDGET', '0')) or None  # Máximo de llamadas a la API por crawl (vacío = sin límite)
 
+# Pipeline de ingesta (fetchers -> parsers -> un único writer por lotes)
+INGEST_FETCHERS = int(os.getenv('INGEST_FETCHERS', '4'))  # Hilos descargando partidas
+INGEST_PARSERS = 1  # Hilos parseando payloads
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '50'))  # Partidas por transacción del writer
+INGEST_QUEUE_SIZE = 100  # Capacidad de cada cola entre etapas (backpressure)
+INGEST_FLUSH_SECONDS = 1.0  # El writer confirma un lote incompleto tras este tiempo sin datos
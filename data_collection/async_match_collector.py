@@ -0,0 +1,302 @@
+"""
+Async Match Collector - Collects matches with N requests in flight per routing cluster
+
+Each routing cluster (europe, americas, asia, sea) gets its own semaphore, so
+clusters progress independently and each one keeps up to `concurrency` requests
+running while the shared rate limiter keeps them inside the key's budget.
+Parsed matches are streamed to a single database writer as they arrive.
+"""
+import os
+import sys
+import asyncio
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from tqdm import tqdm
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import MATCHES_PER_PLAYER, ASYNC_CONCURRENCY_PER_CLUSTER, CRAWL_API_BUDGET, INGEST_BATCH_SIZE
+from data_collection.batch_match_collector import get_routing_for_region, build_match_data, get_start_time
+from data_collection.crawl_journal import CrawlJournal
+from data_collection.crawl_scheduler import CrawlBudget, CrawlScheduler
+from data_collection.match_frontier import MatchFrontier
+from data_collection.match_history import fetch_match_ids, fetch_match_details
+from data_collection.resilience import RetryStats
+from data_collection.riot_client import RiotClient, resolve_client
+from data_collection.shutdown import shutdown, ShutdownRequested
+from database.db_manager import db_manager, CRAWL_PLAYER_COLUMNS
+
+
+class AsyncMatchCollector:
+    """Asyncio collection engine with bounded per-cluster concurrency"""
+
+    def __init__(self, api_key: str, matches_per_player: int = MATCHES_PER_PLAYER,
+                 concurrency: int = ASYNC_CONCURRENCY_PER_CLUSTER,
+                 client: Optional[RiotClient] = None,
+                 budget: Optional[int] = CRAWL_API_BUDGET,
+                 journal: Optional[CrawlJournal] = None):
+        self.api_key = api_key
+        self.matches_per_player = matches_per_player
+        self.concurrency = concurrency
+        self.client = resolve_client(api_key, client)
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.frontier = MatchFrontier()
+        self.budget = journal.crawl_budget() if journal else CrawlBudget(budget)
+        self.journal = journal
+        self.error: Optional[BaseException] = None  # Writer failure, re-raised by run()
+        self.stats = {
+            'players': 0,
+            'complete_players': 0,
+            'new_matches': 0,
+            'skipped': 0,
+            'failed': 0,
+        }
+
+    async def _call(self, routing: str, func, *args, **kwargs):
+        """Run a blocking fetcher in a worker thread, bounded by the cluster semaphore"""
+        semaphore = self.semaphores.setdefault(routing, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def _fetch_match(self, routing: str, region: str, match_id: str, queue: asyncio.Queue):
+        match_detail = await self._call(routing, fetch_match_details, self.api_key, routing,
+                                        match_id, client=self.client)
+        if not match_detail:
+            self.stats['failed'] += 1
+            return
+
+        await queue.put(build_match_data(match_detail, region))
+
+    async def _list_player(self, player, region: str):
+        routing = get_routing_for_region(region)
+        semaphore = self.semaphores.setdefault(routing, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            # Checked once a slot is free, so earlier (higher ranked) listings are already counted
+            if shutdown.requested or not self.budget.try_spend(reserved=len(self.frontier)):
+                return
+            match_ids = await asyncio.to_thread(fetch_match_ids, self.api_key, routing, player.puuid,
+                                                count=self.matches_per_player, client=self.client,
+                                                start_time=get_start_time(player))
+        self.frontier.add(match_ids, region, puuid=player.puuid)
+        if self.journal:
+            await asyncio.to_thread(self.journal.record_listing, region, player.puuid, match_ids)
+        self.stats['players'] += 1
+
+    async def _writer(self, queue: asyncio.Queue):
+        """
+        Single consumer that saves parsed matches as they arrive, one transaction per batch
+
+        On an unexpected error it records it and keeps draining the queue, so
+        fetches blocked on a full queue finish instead of hanging the crawl.
+        """
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            # Take whatever else is already waiting, up to a full batch
+            while len(batch) < INGEST_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                done = True
+                batch.pop()
+            if not batch or self.error is not None:
+                continue
+
+            try:
+                stored = await asyncio.to_thread(db_manager.add_matches, batch)
+                if stored is None:
+                    # The batch was rolled back: save what we can one match at a time
+                    stored = [m['match_id'] for m in batch
+                              if await asyncio.to_thread(db_manager.add_match, m)]
+            except Exception as e:
+                self.error = e
+                print(f"✗ Writer failed, stopping the crawl: {e}")
+                continue
+            for match_id in stored:
+                self.frontier.mark_stored(match_id)
+            self.stats['new_matches'] += len(stored)
+
+    async def run(self, players_by_region: Dict[str, List],
+                  already_listed: Optional[Dict[str, Dict[str, List[str]]]] = None) -> Dict:
+        """
+        Collect matches for the given players
+
+        Args:
+            players_by_region: {region: [Player, ...]}, each list in crawl priority order
+            already_listed: {region: {puuid: match IDs}} journaled by an interrupted run
+
+        Returns:
+            Collection stats
+
+        Raises:
+            Exception: the database writer's error, once in-flight fetches have finished
+        """
+        routings = {get_routing_for_region(region) for region in players_by_region}
+        crawled_at = datetime.utcnow()
+
+        # Every in-flight request holds a worker thread (also while the limiter waits)
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=len(routings) * self.concurrency + 4))
+
+        queue = asyncio.Queue(maxsize=len(routings) * self.concurrency * 4)
+        writer = asyncio.create_task(self._writer(queue))
+
+        # Phase 1: list match IDs for every player into the crawl-wide frontier
+        already_listed = already_listed or {}
+        for region, listed in already_listed.items():
+            for puuid, match_ids in listed.items():
+                self.frontier.add(match_ids, region, puuid=puuid)
+                self.stats['players'] += 1
+
+        total_players = sum(len(players) for players in players_by_region.values())
+        with tqdm(total=total_players, initial=self.stats['players'], desc="Listing match IDs") as pbar:
+            async def list_player(player, region):
+                try:
+                    await self._list_player(player, region)
+                except ShutdownRequested:
+                    pass
+                except Exception as e:
+                    pbar.write(f"✗ Error processing {player.game_name}: {e}")
+                pbar.update(1)
+                pbar.set_postfix({'unique': len(self.frontier), 'shared': self.frontier.duplicates})
+
+            await asyncio.gather(*(
+                list_player(player, region)
+                for region, players in players_by_region.items()
+                for player in players
+                if player.puuid not in already_listed.get(region, {})
+            ))
+
+        # Phase 2: drop IDs already in the database with one set-based query
+        await asyncio.to_thread(self.frontier.remove_stored)
+        self.stats['skipped'] = self.frontier.duplicates + self.frontier.already_stored
+        # Claim the fetch calls up front (in-flight listings may overshoot the
+        # reservation; the rest is deferred to the next crawl)
+        claimed = self.budget.take(len(self.frontier))
+        self.frontier.truncate(claimed)
+        if self.journal:
+            await asyncio.to_thread(self.journal.save_budget)
+        attempted = 0
+
+        # Phase 3: fetch each remaining match exactly once
+        with tqdm(total=len(self.frontier), desc="Fetching matches") as pbar:
+            async def fetch(match_id, region):
+                nonlocal attempted
+                if shutdown.requested or self.error is not None:
+                    return
+                attempted += 1
+                try:
+                    await self._fetch_match(get_routing_for_region(region), region, match_id, queue)
+                except ShutdownRequested:
+                    pass
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    pbar.write(f"✗ Error fetching {match_id}: {e}")
+                pbar.update(1)
+                pbar.set_postfix(self.stats)
+
+            await asyncio.gather(*(fetch(match_id, region) for match_id, region in self.frontier))
+        # Matches left unfetched by a shutdown give their calls back
+        self.budget.refund(claimed - attempted)
+
+        await queue.put(None)
+        await writer
+        if self.error is not None:
+            raise self.error
+
+        # Advance the high-water marks so the next crawl only lists newer games
+        # (players with failed or deferred fetches keep their old mark)
+        complete_players = self.frontier.complete_players()
+        self.stats['complete_players'] = len(complete_players)
+        await asyncio.to_thread(db_manager.update_high_water_marks, complete_players, crawled_at)
+
+        if self.journal and not shutdown.requested:
+            for region in players_by_region:
+                await asyncio.to_thread(self.journal.mark_matches_collected, region)
+
+        return self.stats
+
+
+def collect_matches_async(api_key: str, regions: List[str], max_players: Optional[int] = None,
+                          matches_per_player: int = MATCHES_PER_PLAYER,
+                          concurrency: int = ASYNC_CONCURRENCY_PER_CLUSTER,
+                          client: Optional[RiotClient] = None,
+                          budget: Optional[int] = CRAWL_API_BUDGET,
+                          journal: Optional[CrawlJournal] = None) -> int:
+    """
+    Collect matches for all players of several regions concurrently,
+    most productive players first (see CrawlScheduler)
+
+    Args:
+        api_key: Riot API Key
+        regions: Regions to collect from
+        max_players: Maximum number of players per region (None = all)
+        matches_per_player: Number of matches per player
+        concurrency: Requests in flight per routing cluster
+        client: Pooled Riot client (defaults to the shared one for api_key)
+        budget: Maximum API calls for this crawl (None = no limit)
+        journal: Run journal recording the crawl order and listed match IDs
+
+    Returns:
+        Number of new matches saved
+    """
+    print(f"\n{'='*60}")
+    print(f"ASYNC MATCH COLLECTION - {', '.join(r.upper() for r in regions)}")
+    print(f"{'='*60}\n")
+
+    scheduler = CrawlScheduler(matches_per_player=matches_per_player)
+    players_by_region = {}
+    already_listed = {}
+    for region in regions:
+        if journal and journal.matches_collected(region):
+            print(f"✓ {region.upper()} already collected in this run")
+            continue
+        players = scheduler.rank(list(db_manager.iter_players(region=region, columns=CRAWL_PLAYER_COLUMNS)))
+        if journal:
+            # A resumed run keeps its original order and the IDs it had already listed
+            players, already_listed[region] = journal.plan(region, players)
+        if max_players:
+            players = players[:max_players]
+        if not players:
+            print(f"✗ No players found in database for region {region}")
+            continue
+        players_by_region[region] = players
+        print(f"Found {len(players)} players in {region.upper()} "
+              f"(~{scheduler.expected_total(players):.0f} new games expected)")
+
+    if not players_by_region:
+        print("  Run gm_collector.py first to add players")
+        return 0
+
+    print(f"Collecting {matches_per_player} matches per player "
+          f"({concurrency} requests in flight per cluster"
+          + (f", budget of {budget} API calls" if budget else "") + ")...\n")
+
+    collector = AsyncMatchCollector(
+        api_key=api_key,
+        matches_per_player=matches_per_player,
+        concurrency=concurrency,
+        client=client,
+        budget=budget,
+        journal=journal
+    )
+    retry_snapshot = collector.client.retry_stats.snapshot()
+    stats = asyncio.run(collector.run(players_by_region, already_listed))
+
+    print(f"\n{'='*60}")
+    print(f"⚠ COLLECTION STOPPED" if shutdown.requested else f"✓ COLLECTION COMPLETE")
+    print(f"  Players crawled: {stats['complete_players']}/{sum(len(p) for p in players_by_region.values())}"
+          + (f" ({stats['players'] - stats['complete_players']} deferred to the next crawl)"
+             if stats['players'] > stats['complete_players'] else ""))
+    print(f"  New matches: {stats['new_matches']}")
+    print(f"  Skipped (already in DB): {collector.frontier.already_stored}")
+    print(f"  Skipped (shared between players): {collector.frontier.duplicates}")
+    print(f"  Failed fetches: {stats['failed']}")
+    print(f"  Retries: {RetryStats.format(collector.client.retry_stats.since(retry_snapshot))}")
+    if budget:
+        print(f"  API calls: {collector.budget.used}/{budget}")
+    print(f"  Total matches in DB: {db_manager.get_match_count()}")
+    print(f"{'='*60}\n")
+
+    return stats['new_matches']
@@ -3,17 +3,24 @@ Batch Match Collector - Collects matches from multiple players and saves to data
 """
 import os
 import sys
-import time
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 from tqdm import tqdm
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from config import RIOT_API_KEY, RATE_LIMIT_DELAY, MATCHES_PER_PLAYER
+from config import RIOT_API_KEY, MATCHES_PER_PLAYER, CRAWL_API_BUDGET
+from data_collection.crawl_journal import CrawlJournal
+from data_collection.crawl_scheduler import CrawlBudget, CrawlScheduler
+from data_collection.ingest_pipeline import IngestPipeline
+from data_collection.shutdown import shutdown, ShutdownRequested
 from data_collection.match_history import fetch_match_ids, fetch_match_details
+from data_collection.match_frontier import MatchFrontier
+from data_collection.resilience import RetryStats
+from data_collection.riot_client import RiotClient, resolve_client
 from data_processing.parser import parse_match, parse_all_participants
-from database.db_manager import db_manager
+from database.db_manager import db_manager, CRAWL_PLAYER_COLUMNS
 
 
 def get_routing_for_region(region: str) -> str:
@@ -27,8 +34,20 @@ def get_routing_for_region(region: str) -> str:
     return routing_map.get(region.lower(), 'europe')
 
 
+def get_start_time(player) -> Optional[int]:
+    """
+    startTime for a player's next match-ID listing: one second after their
+    high-water mark, so only games played since the last crawl are listed
+    """
+    if not player.last_match_datetime:
+        return None
+    return int(player.last_match_datetime.timestamp()) + 1
+
+
 def collect_matches_for_player(api_key: str, puuid: str, region: str, 
-                               matches_per_player: int = 20) -> int:
+                               matches_per_player: int = 20,
+                               client: Optional[RiotClient] = None,
+                               start_time: Optional[int] = None) -> int:
     """
     Collect matches for a single player and save to database
     
@@ -37,74 +56,89 @@ def collect_matches_for_player(api_key: str, puuid: str, region: str,
         puuid: Player PUUID
         region: Region
         matches_per_player: Number of matches to collect
+        client: Pooled Riot client (defaults to the shared one for api_key)
+        start_time: Only list games since this epoch second (see get_start_time)
     
     Returns:
         Number of new matches saved
     """
     routing = get_routing_for_region(region)
-    new_matches = 0
+    client = resolve_client(api_key, client)
     
     # Get match IDs
-    match_ids = fetch_match_ids(api_key, routing, puuid, count=matches_per_player)
+    match_ids = fetch_match_ids(api_key, routing, puuid, count=matches_per_player,
+                                client=client, start_time=start_time)
     
     if not match_ids:
         return 0
     
-    for match_id in match_ids:
-        # Check if match already exists
-        if db_manager.match_exists(match_id):
-            continue  # Skip already collected matches
-        
-        # Rate limiting
-        time.sleep(RATE_LIMIT_DELAY)
-        
-        # Fetch match details
-        match_detail = fetch_match_details(api_key, routing, match_id)
-        
-        if not match_detail:
-            continue
-        
-        # Parse match info
-        match_info = match_detail.get('info', {})
-        metadata = match_detail.get('metadata', {})
-        
-        # Extract all participants
-        all_participants = []
-        for participant_data in match_info.get('participants', []):
-            participant_puuid = participant_data.get('puuid')
-            
-            # Parse participant data
-            parsed = parse_match(match_detail, participant_puuid)
-            if parsed:
-                all_participants.append({
-                    'puuid': participant_puuid,
-                    'placement': parsed.get('placement'),
-                    'level': parsed.get('level'),
-                    'gold_left': parsed.get('gold_left'),
-                    'total_damage_to_players': parsed.get('total_damage_to_players', 0),
-                    'players_eliminated': parsed.get('players_eliminated', 0),
-                    'time_eliminated': parsed.get('time_eliminated', 0.0),
-                    'traits': parsed.get('traits', []),
-                    'units': parsed.get('units', []),
-                    'augments': parsed.get('augments', [])
-                })
-        
-        # Prepare match data for database
-        match_data = {
-            'match_id': metadata.get('match_id'),
-            'game_datetime': match_info.get('game_datetime'),
-            'game_length': match_info.get('game_length', 0),
-            'tft_set_number': match_info.get('tft_set_number', 0),
-            'patch': _extract_patch(match_info.get('game_version', '')),
-            'region': region,
-            'participants': all_participants
-        }
+    # Check which matches already exist with a single query
+    frontier = MatchFrontier()
+    frontier.add(match_ids, region, puuid=puuid)
+    frontier.remove_stored()
+    
+    # Fetch (rate limited by the shared limiter), parse and save in overlapping stages
+    pipeline = IngestPipeline(
+        fetch=lambda match_id, _region: fetch_match_details(api_key, routing, match_id, client=client),
+        parse=build_match_data,
+        on_stored=frontier.mark_stored
+    )
+    stats = pipeline.run(frontier)
+    
+    # Same rule as the crawl: the mark only advances once every listed match is stored
+    db_manager.update_high_water_marks(frontier.complete_players(), crawled_at=datetime.utcnow())
+    
+    return stats['written']
+
+
+def build_match_data(match_detail: Dict, region: str) -> Dict:
+    """
+    Convert a raw match-v1 payload into the dict expected by db_manager.add_match
+    
+    Args:
+        match_detail: Match details from fetch_match_details
+        region: Region the match was collected from
+    
+    Returns:
+        Match data with all parsed participants
+    """
+    # Parse match info
+    match_info = match_detail.get('info', {})
+    metadata = match_detail.get('metadata', {})
+    
+    # Extract all participants
+    all_participants = []
+    for participant_data in match_info.get('participants', []):
+        participant_puuid = participant_data.get('puuid')
         
-        # Save to database
-        if db_manager.add_match(match_data):
-            new_matches += 1
+        # Parse participant data
+        parsed = parse_match(match_detail, participant_puuid)
+        if parsed:
+            all_participants.append({
+                'puuid': participant_puuid,
+                'placement': parsed.get('placement'),
+                'level': parsed.get('level'),
+                'gold_left': parsed.get('gold_left'),
+                'total_damage_to_players': parsed.get('total_damage_to_players', 0),
+                'players_eliminated': parsed.get('players_eliminated', 0),
+                'time_eliminated': parsed.get('time_eliminated', 0.0),
+                'traits': parsed.get('traits', []),
+                'units': parsed.get('units', []),
+                'augments': parsed.get('augments', [])
+            })
+    
+    # Prepare match data for database
+    match_data = {
+        'match_id': metadata.get('match_id'),
+        'game_datetime': match_info.get('game_datetime'),
+        'game_length': match_info.get('game_length', 0),
+        'tft_set_number': match_info.get('tft_set_number', 0),
+        'patch': _extract_patch(match_info.get('game_version', '')),
+        'region': region,
+        'participants': all_participants
+    }
     
-    return new_matches
+    return match_data
 
 
 def _extract_patch(game_version: str) -> str:
@@ -127,66 +161,151 @@ def _extract_patch(game_version: str) -> str:
 
 
 def collect_matches_batch(api_key: str, region: str, max_players: Optional[int] = None,
-                         matches_per_player: int = MATCHES_PER_PLAYER):
+                         matches_per_player: int = MATCHES_PER_PLAYER,
+                         client: Optional[RiotClient] = None,
+                         budget: Optional[int] = CRAWL_API_BUDGET,
+                         journal: Optional[CrawlJournal] = None,
+                         crawl_budget: Optional[CrawlBudget] = None):
     """
-    Collect matches for all players in database from a specific region
+    Collect matches for all players in database from a specific region,
+    most productive players first (see CrawlScheduler)
+    
+    Stops taking new work once a graceful shutdown is requested; with a
+    journal the run can then be resumed where it stopped.
     
     Args:
         api_key: Riot API Key
         region: Region to collect from
         max_players: Maximum number of players to process (None = all)
         matches_per_player: Number of matches per player
+        client: Pooled Riot client (defaults to the shared one for api_key)
+        budget: Maximum API calls for this crawl (None = no limit)
+        journal: Run journal recording the crawl order and listed match IDs
+        crawl_budget: Budget shared with other regions' crawls (overrides budget;
+            defaults to the journal's run budget)
     """
     print(f"\n{'='*60}")
     print(f"BATCH MATCH COLLECTION - {region.upper()}")
     print(f"{'='*60}\n")
     
-    # Get all players from this region
-    players = db_manager.get_all_players(region=region)
+    # Get all players from this region (only the columns the crawl needs)
+    players = list(db_manager.iter_players(region=region, columns=CRAWL_PLAYER_COLUMNS))
     
     if not players:
         print(f"✗ No players found in database for region {region}")
         print("  Run gm_collector.py first to add players")
         return
     
+    scheduler = CrawlScheduler(matches_per_player=matches_per_player)
+    players = scheduler.rank(players)
+    already_listed = {}
+    if journal:
+        # A resumed run keeps its original order and the IDs it had already listed
+        players, already_listed = journal.plan(region, players)
     if max_players:
         players = players[:max_players]
     
-    print(f"Found {len(players)} players in database")
-    print(f"Collecting {matches_per_player} matches per player...\n")
+    client = resolve_client(api_key, client)
+    if crawl_budget is None:
+        crawl_budget = journal.crawl_budget() if journal else CrawlBudget(budget)
+    budget = crawl_budget.limit
+    retry_snapshot = client.retry_stats.snapshot()
     
-    total_new_matches = 0
-    total_skipped = 0
+    print(f"Found {len(players)} players in database "
+          f"(~{scheduler.expected_total(players):.0f} new games expected)")
+    print(f"Collecting {matches_per_player} matches per player"
+          + (f" with {crawl_budget.remaining} of {budget} API calls left" if budget else "") + "...\n")
     
-    # Process each player with progress bar
-    with tqdm(total=len(players), desc="Processing players") as pbar:
+    routing = get_routing_for_region(region)
+    frontier = MatchFrontier()
+    crawled_at = datetime.utcnow()
+    idle_players = 0
+    listed_players = 0
+    
+    if already_listed:
+        print(f"Resuming: {len(already_listed)} players already listed\n")
+    
+    # Phase 1: list match IDs for every player into the crawl-wide frontier
+    with tqdm(total=len(players), desc="Listing match IDs") as pbar:
         for player in players:
-            pbar.set_description(f"Player: {player.game_name[:15]}")
+            if player.puuid in already_listed:
+                frontier.add(already_listed[player.puuid], region, puuid=player.puuid)
+                listed_players += 1
+                pbar.update(1)
+                continue
+            if shutdown.requested:
+                break
+            # Listed IDs still owe one fetch each, so stop before they could overrun the budget
+            if not crawl_budget.try_spend(reserved=len(frontier)):
+                pbar.write(f"⚠ API budget reached after {listed_players} players")
+                break
+            pbar.set_description(f"{region.upper()} | Player: {player.game_name[:15]}")
             
             try:
-                new_matches = collect_matches_for_player(
-                    api_key=api_key,
-                    puuid=player.puuid,
-                    region=region,
-                    matches_per_player=matches_per_player
-                )
-                
-                total_new_matches += new_matches
-                total_skipped += (matches_per_player - new_matches)
-                
-                pbar.set_postfix({
-                    'new': total_new_matches,
-                    'skipped': total_skipped
-                })
+                start_time = get_start_time(player)
+                match_ids = fetch_match_ids(api_key, routing, player.puuid,
+                                            count=matches_per_player, client=client,
+                                            start_time=start_time)
+                frontier.add(match_ids, region, puuid=player.puuid)
+                if journal:
+                    journal.record_listing(region, player.puuid, match_ids)
+                listed_players += 1
+                if start_time is not None and not match_ids:
+                    idle_players += 1
+                pbar.set_postfix({'unique': len(frontier), 'shared': frontier.duplicates})
+            except ShutdownRequested:
+                break
             except Exception as e:
                 pbar.write(f"✗ Error processing {player.game_name}: {e}")
             
             pbar.update(1)
     
+    # Phase 2: drop IDs already in the database with one set-based query
+    frontier.remove_stored()
+    # Claim the fetch calls up front so a budget shared between regions is never overrun
+    claimed = crawl_budget.take(len(frontier))
+    frontier.truncate(claimed)
+    if journal:
+        journal.save_budget()
+    print(f"\n{len(frontier)} new matches to fetch "
+          f"({frontier.duplicates} shared between players, {frontier.already_stored} already in DB, "
+          f"{idle_players} players without new games)\n")
+    
+    # Phase 3: fetch each remaining match exactly once, parsing and writing in parallel stages
+    def fetch(match_id, match_region):
+        return fetch_match_details(api_key, routing, match_id, client=client)
+    
+    pipeline = IngestPipeline(fetch=fetch, parse=build_match_data, on_stored=frontier.mark_stored)
+    with tqdm(total=len(frontier), desc=f"{region.upper()} | Fetching matches") as pbar:
+        ingest_stats = pipeline.run(frontier, progress=pbar)
+    # Matches left unfetched by a shutdown give their calls back
+    crawl_budget.refund(claimed - pipeline.processed)
+    
+    total_new_matches = ingest_stats['written']
+    total_failed = ingest_stats['failed']
+    
+    # Advance the high-water marks so the next crawl only lists newer games
+    # (players with failed fetches keep their old mark and are listed again)
+    complete_players = frontier.complete_players()
+    db_manager.update_high_water_marks(complete_players, crawled_at=crawled_at)
+    
+    if journal and not shutdown.requested:
+        journal.mark_matches_collected(region)
+    
     print(f"\n{'='*60}")
-    print(f"✓ COLLECTION COMPLETE")
+    print(f"⚠ COLLECTION STOPPED" if shutdown.requested else f"✓ COLLECTION COMPLETE")
+    print(f"  Players crawled: {len(complete_players)}/{len(players)}"
+          + (f" ({listed_players - len(complete_players)} deferred to the next crawl)"
+             if listed_players > len(complete_players) else ""))
     print(f"  New matches: {total_new_matches}")
-    print(f"  Skipped (already in DB): {total_skipped}")
+    print(f"  Skipped (already in DB): {frontier.already_stored}")
+    print(f"  Skipped (shared between players): {frontier.duplicates}")
+    print(f"  Failed fetches: {total_failed}")
+    print(f"  Retries: {RetryStats.format(client.retry_stats.since(retry_snapshot))}")
+    print(f"  Writer: {ingest_stats['batches']} transactions, max queue depth "
+          f"{ingest_stats['max_payload_queue']} payloads / {ingest_stats['max_record_queue']} parsed")
+    if budget:
+        print(f"  API calls: {crawl_budget.used}/{budget}")
     print(f"  Total matches in DB: {db_manager.get_match_count()}")
     print(f"{'='*60}\n")
     
@@ -206,6 +325,8 @@ if __name__ == "__main__":
                        help='Maximum number of players to process')
     parser.add_argument('--matches-per-player', type=int, default=MATCHES_PER_PLAYER,
                        help='Number of matches per player')
+    parser.add_argument('--budget', type=int, default=CRAWL_API_BUDGET,
+                       help='Maximum API calls for this crawl (most productive players first)')
     
     args = parser.parse_args()
     
@@ -223,5 +344,6 @@ if __name__ == "__main__":
         api_key=api_key,
         region=args.region,
         max_players=args.max_players,
-        matches_per_player=args.matches_per_player
+        matches_per_player=args.matches_per_player,
+        budget=args.budget
     )
@@ -0,0 +1,115 @@
+"""
+Crawl Journal - Persistent state of a collection run, so it can be resumed
+
+For every run the journal stores, in the database:
+  - which regions finished player collection and match collection
+  - the planned crawl order of each region's players
+  - the match IDs listed for every player (the match-ID frontier)
+  - the API calls spent, so a resumed run continues the same budget
+
+A completed run drops its region and player rows; starting a new run marks
+older unfinished runs abandoned, and purge_old_data deletes old finished runs.
+
+Fetched matches are committed by add_match as they arrive, so on resume the
+frontier is rebuilt from the journal, IDs already stored are dropped and the
+run continues with the first player that was not listed yet.
+"""
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from data_collection.crawl_scheduler import CrawlBudget
+from database.db_manager import db_manager
+
+
+class CrawlJournal:
+    """Journal of one crawl run"""
+
+    def __init__(self, run_id: int, regions: List[str], matches_per_player: int,
+                 budget: Optional[int] = None, resumed: bool = False, budget_used: int = 0):
+        self.run_id = run_id
+        self.regions = regions
+        self.matches_per_player = matches_per_player
+        self.budget = budget
+        self.resumed = resumed
+        self.budget_used = budget_used
+        self._crawl_budget: Optional[CrawlBudget] = None
+
+    @classmethod
+    def start(cls, regions: List[str], matches_per_player: int,
+              budget: Optional[int] = None) -> 'CrawlJournal':
+        """Start journaling a new run"""
+        run_id = db_manager.start_crawl_run(regions, matches_per_player, budget)
+        return cls(run_id, regions, matches_per_player, budget)
+
+    @classmethod
+    def resume(cls) -> Optional['CrawlJournal']:
+        """Reopen the latest interrupted (or crashed) run, None if there is none"""
+        run = db_manager.get_resumable_crawl_run()
+        if run is None:
+            return None
+        db_manager.set_crawl_run_status(run.id, 'running')
+        return cls(run.id, run.regions.split(','), run.matches_per_player, run.budget, resumed=True,
+                   budget_used=run.budget_used or 0)
+
+    def crawl_budget(self) -> CrawlBudget:
+        """The run's API budget, shared by all its regions and seeded with the calls already spent"""
+        if self._crawl_budget is None:
+            self._crawl_budget = CrawlBudget(self.budget, used=self.budget_used)
+        return self._crawl_budget
+
+    def _used(self) -> Optional[int]:
+        return self._crawl_budget.used if self._crawl_budget is not None else None
+
+    def save_budget(self):
+        """Journal the API calls spent so far"""
+        used = self._used()
+        if used is not None:
+            db_manager.set_crawl_run_budget_used(self.run_id, used)
+
+    def players_collected(self, region: str) -> bool:
+        row = db_manager.get_crawl_run_regions(self.run_id).get(region)
+        return bool(row and row.players_collected)
+
+    def matches_collected(self, region: str) -> bool:
+        row = db_manager.get_crawl_run_regions(self.run_id).get(region)
+        return bool(row and row.matches_collected)
+
+    def mark_players_collected(self, region: str):
+        db_manager.set_crawl_region_stage(self.run_id, region, 'players_collected')
+
+    def mark_matches_collected(self, region: str):
+        self.save_budget()
+        db_manager.set_crawl_region_stage(self.run_id, region, 'matches_collected')
+
+    def plan(self, region: str, players: List) -> Tuple[List, Dict[str, List[str]]]:
+        """
+        Fix the crawl order of a region's players for this run
+
+        Args:
+            region: Region
+            players: Ranked players (only used the first time a region is planned)
+
+        Returns:
+            (players in journaled order, {puuid: match IDs} for players already listed)
+        """
+        planned = db_manager.get_crawl_players(self.run_id, region)
+        if not planned:
+            db_manager.plan_crawl_players(self.run_id, region, [player.puuid for player in players])
+            return players, {}
+
+        by_puuid = {player.puuid: player for player in players}
+        ordered = [by_puuid[row.puuid] for row in planned if row.puuid in by_puuid]
+        listed = {row.puuid: row.match_ids or [] for row in planned if row.listed}
+        return ordered, listed
+
+    def record_listing(self, region: str, puuid: str, match_ids: List[str]):
+        db_manager.record_crawl_listing(self.run_id, region, puuid, match_ids or [], budget_used=self._used())
+
+    def finish(self, interrupted: bool = False):
+        """Close the run (a complete run's region and player rows are deleted)"""
+        db_manager.set_crawl_run_status(self.run_id, 'interrupted' if interrupted else 'complete',
+                                        budget_used=self._used())
@@ -0,0 +1,183 @@
+"""
+Crawl Scheduler - Ranks tracked players by expected new games and enforces an API budget
+
+A crawl spends one match-ID listing per player plus one call per new match.
+Players who have not played since their last crawl only cost a listing, so
+under a fixed budget the scheduler crawls the most productive players first:
+
+  - games per day: stored games in the last CRAWL_RECENT_WINDOW_DAYS
+  - time since the player was last crawled
+  - league snapshots: wins + losses grew (or LP moved) since the last crawl,
+    which proves at least that many ranked games are waiting
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import MATCHES_PER_PLAYER, CRAWL_RECENT_WINDOW_DAYS, SNAPSHOT_LOOKBACK_DAYS
+from database.db_manager import db_manager, CRAWL_PLAYER_COLUMNS
+
+
+class CrawlBudget:
+    """Thread-safe count of API calls spent by one crawl"""
+
+    def __init__(self, limit: Optional[int] = None, used: int = 0):
+        self.limit = limit
+        self.used = used  # Calls already spent, e.g. by an interrupted attempt of a resumed run
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.limit is None:
+            return None
+        return max(self.limit - self.used, 0)
+
+    def try_spend(self, cost: int = 1, reserved: int = 0) -> bool:
+        """
+        Spend `cost` calls if they fit next to `reserved` calls still owed
+        (e.g. match IDs already listed but not fetched yet)
+
+        Returns:
+            False (and marks the budget exhausted) if the calls don't fit
+        """
+        with self.lock:
+            if self.limit is not None and self.used + cost + reserved > self.limit:
+                self.exhausted = True
+                return False
+            self.used += cost
+            return True
+
+    def take(self, count: int) -> int:
+        """
+        Spend up to `count` calls at once, e.g. the fetches for a whole frontier
+        (regions crawling in parallel can't both claim the same remaining calls)
+
+        Returns:
+            Number of calls granted
+        """
+        with self.lock:
+            if self.limit is not None:
+                if self.used + count > self.limit:
+                    self.exhausted = True
+                count = min(count, max(self.limit - self.used, 0))
+            self.used += count
+            return count
+
+    def refund(self, count: int):
+        """Give back calls taken but never made (e.g. fetches skipped by a shutdown)"""
+        with self.lock:
+            self.used = max(self.used - count, 0)
+            if count > 0:
+                self.exhausted = False
+
+
+class CrawlScheduler:
+    """Orders players by expected new games since their last crawl"""
+
+    def __init__(self, matches_per_player: int = MATCHES_PER_PLAYER,
+                 recent_window_days: int = CRAWL_RECENT_WINDOW_DAYS,
+                 now: Optional[datetime] = None):
+        self.matches_per_player = matches_per_player
+        self.recent_window_days = recent_window_days
+        self.now = now or datetime.utcnow()
+        self.expected: Dict[str, float] = {}
+
+    def expected_new_games(self, player, recent_games: int, snapshots: List) -> float:
+        """
+        Estimate how many new games a match-ID listing would return for a player
+
+        Args:
+            player: Player row
+            recent_games: Stored games in the recent window
+            snapshots: The player's league snapshots, oldest first
+
+        Returns:
+            Expected new games, capped at matches_per_player
+        """
+        last_crawled = player.last_crawled or player.last_match_datetime
+        if last_crawled is None:
+            # Never crawled: a full page of games is waiting
+            return float(self.matches_per_player)
+
+        elapsed_days = max((self.now - last_crawled).total_seconds(), 0) / 86400
+        expected = recent_games / self.recent_window_days * elapsed_days
+
+        # Ranked games since the last crawl are a lower bound (listings also include other queues)
+        baseline = None
+        for snapshot in snapshots:
+            if snapshot.captured_at <= last_crawled:
+                baseline = snapshot
+        latest = snapshots[-1] if snapshots else None
+        if baseline is not None and latest is not baseline:
+            ranked_games = (latest.wins + latest.losses) - (baseline.wins + baseline.losses)
+            if ranked_games > 0:
+                expected = max(expected, ranked_games)
+            elif latest.lp != baseline.lp:
+                expected = max(expected, 1)
+
+        return min(expected, float(self.matches_per_player))
+
+    def rank(self, players: List) -> List:
+        """
+        Sort players by expected new games, most productive first
+
+        Args:
+            players: Player rows
+
+        Returns:
+            The same players, reordered (estimates are kept in self.expected)
+        """
+        if not players:
+            return []
+
+        puuids = [player.puuid for player in players]
+        recent_games = db_manager.get_recent_game_counts(
+            puuids, since=self.now - timedelta(days=self.recent_window_days))
+        snapshots = db_manager.get_league_snapshots(
+            puuids, since=self.now - timedelta(days=SNAPSHOT_LOOKBACK_DAYS))
+
+        for player in players:
+            self.expected[player.puuid] = self.expected_new_games(
+                player, recent_games.get(player.puuid, 0), snapshots.get(player.puuid, []))
+
+        # Ties (e.g. no history yet) go to the player who waited longest
+        def waited(player):
+            last_crawled = player.last_crawled or player.last_match_datetime
+            return (self.now - last_crawled).total_seconds() if last_crawled else float('inf')
+
+        return sorted(players, key=lambda p: (self.expected[p.puuid], waited(p)), reverse=True)
+
+    def expected_total(self, players: List) -> float:
+        """Sum of expected new games for already ranked players"""
+        return sum(self.expected.get(player.puuid, 0) for player in players)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show the crawl order for tracked players')
+    parser.add_argument('--region', type=str, default='euw1',
+                        help='Region to rank (euw1, na1, kr, etc.)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Number of players to show')
+
+    args = parser.parse_args()
+
+    db_manager.init_db()
+    scheduler = CrawlScheduler()
+    ranked = scheduler.rank(list(db_manager.iter_players(region=args.region, columns=CRAWL_PLAYER_COLUMNS)))
+
+    print(f"\n{'='*60}")
+    print(f"CRAWL ORDER - {args.region.upper()}")
+    print(f"{'='*60}\n")
+    for idx, player in enumerate(ranked[:args.top], 1):
+        last_crawled = player.last_crawled.strftime('%Y-%m-%d %H:%M') if player.last_crawled else 'never'
+        print(f"{idx:3}. {player.game_name:20} {player.tier:12} {player.lp:5} LP  "
+              f"expected: {scheduler.expected[player.puuid]:5.1f}  last crawled: {last_crawled}")
+    print(f"\nExpected new games (all {len(ranked)} players): {scheduler.expected_total(ranked):.0f}")
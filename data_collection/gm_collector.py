@@ -3,33 +3,33 @@ GM Player Collector - Fetches Grandmaster and Challenger players from Riot API
 """
 import os
 import sys
-import requests
-import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from config import RIOT_API_KEY, RATE_LIMIT_DELAY
+from config import RIOT_API_KEY
+from data_collection.riot_client import RiotClient, resolve_client
 from database.db_manager import db_manager
 
 
-def fetch_challenger_players(api_key: str, region: str) -> List[Dict]:
+def fetch_challenger_players(api_key: str, region: str,
+                             client: Optional[RiotClient] = None) -> List[Dict]:
     """
     Fetch Challenger league players for TFT
     
     Args:
         api_key: Riot API key
         region: Region (euw1, na1, etc.)
+        client: Pooled Riot client (defaults to the shared one for api_key)
     
     Returns:
         List of player dictionaries
     """
     url = f"https://{region}.api.riotgames.com/tft/league/v1/challenger"
-    headers = {"X-Riot-Token": api_key}
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = resolve_client(api_key, client).get(url, method='tft-league-v1.challenger')
         
         if response.status_code == 200:
             data = response.json()
@@ -44,22 +44,23 @@ def fetch_challenger_players(api_key: str, region: str) -> List[Dict]:
         return []
 
 
-def fetch_grandmaster_players(api_key: str, region: str) -> List[Dict]:
+def fetch_grandmaster_players(api_key: str, region: str,
+                              client: Optional[RiotClient] = None) -> List[Dict]:
     """
     Fetch Grandmaster league players for TFT
     
     Args:
         api_key: Riot API key
         region: Region (euw1, na1, etc.)
+        client: Pooled Riot client (defaults to the shared one for api_key)
     
     Returns:
         List of player dictionaries
     """
     url = f"https://{region}.api.riotgames.com/tft/league/v1/grandmaster"
-    headers = {"X-Riot-Token": api_key}
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = resolve_client(api_key, client).get(url, method='tft-league-v1.grandmaster')
         
         if response.status_code == 200:
             data = response.json()
@@ -74,7 +75,8 @@ def fetch_grandmaster_players(api_key: str, region: str) -> List[Dict]:
         return []
 
 
-def fetch_summoner_by_id(api_key: str, region: str, summoner_id: str) -> Dict:
+def fetch_summoner_by_id(api_key: str, region: str, summoner_id: str,
+                         client: Optional[RiotClient] = None) -> Dict:
     """
     Fetch summoner details to get PUUID
     
@@ -82,6 +84,7 @@ def fetch_summoner_by_id(api_key: str, region: str, summoner_id: str) -> Dict:
         api_key: Riot API Key
         region: Region
         summoner_id: Summoner ID from league entries
+        client: Pooled Riot client (defaults to the shared one for api_key)
     
     Returns:
         Summoner data including PUUID
@@ -90,11 +93,9 @@ def fetch_summoner_by_id(api_key: str, region: str, summoner_id: str) -> Dict:
         return {}
     
     url = f"https://{region}.api.riotgames.com/tft/summoner/v1/summoners/{summoner_id}"
-    headers = {"X-Riot-Token": api_key}
     
     try:
-        time.sleep(RATE_LIMIT_DELAY)  # Rate limiting
-        response = requests.get(url, headers=headers, timeout=10)
+        response = resolve_client(api_key, client).get(url, method='tft-summoner-v1.by-summoner-id')
         
         if response.status_code == 200:
             return response.json()
@@ -126,8 +127,9 @@ def save_players_to_db(api_key: str, region: str, league_entries: List[Dict],
         max_players: Maximum number of players to save
     """
     print(f"\nSaving {tier} players to database...")
-    saved_count = 0
     error_count = 0
+    players = []
+    snapshots = []
     
     # Sort by LP descending to get the best players
     sorted_entries = sorted(league_entries, key=lambda x: x.get('leaguePoints', 0), reverse=True)
@@ -152,37 +154,35 @@ def save_players_to_db(api_key: str, region: str, league_entries: List[Dict],
         game_name = f"{tier[:4]}_{idx}"
         tag_line = region.upper()
         
-        # Save to database
-        try:
-            db_manager.add_player(
-                puuid=puuid,
-                game_name=game_name,
-                tag_line=tag_line,
-                tier=tier,
-                rank=rank,
-                lp=lp,
-                region=region
-            )
-            saved_count += 1
-            
-            if (saved_count) % 10 == 0:
-                print(f"  Saved {saved_count}/{max_players} players...")
-        except Exception as e:
-            print(f"  ✗ Error saving player: {e}")
-            error_count += 1
+        players.append({'puuid': puuid, 'game_name': game_name, 'tag_line': tag_line,
+                        'tier': tier, 'rank': rank, 'lp': lp, 'region': region})
+        snapshots.append({'puuid': puuid, 'tier': tier, 'rank': rank, 'lp': lp,
+                          'wins': wins, 'losses': losses})
     
-    if error_count > 0 and error_count <= 3:
-        print(f"  ⚠ {error_count} entries had no PUUID")
-    elif error_count > 3:
+    if error_count > 0:
         print(f"  ⚠ {error_count} entries had no PUUID")
     
-    print(f"✓ Saved {saved_count}/{max_players} {tier} players from {region.upper()}")
+    # Save the whole league list with one upsert (only changed rows are written)
+    try:
+        counts = db_manager.upsert_players(players)
+    except Exception as e:
+        print(f"  ✗ Error saving players: {e}")
+        return 0
+    saved_count = sum(counts.values())
+
+    # League snapshots let the crawl scheduler see who played since their last crawl
+    if snapshots:
+        db_manager.add_league_snapshots(region, snapshots)
+
+    print(f"✓ Saved {saved_count}/{max_players} {tier} players from {region.upper()} "
+          f"({counts['inserted']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)")
     
     return saved_count
 
 
 def collect_gm_players(api_key: str, region: str, include_challenger: bool = True,
-                      include_grandmaster: bool = True, max_per_tier: int = 50):
+                      include_grandmaster: bool = True, max_per_tier: int = 50,
+                      client: Optional[RiotClient] = None):
     """
     Main function to collect GM+ players from a region
     
@@ -192,6 +192,7 @@ def collect_gm_players(api_key: str, region: str, include_challenger: bool = Tru
         include_challenger: Whether to include Challenger players
         include_grandmaster: Whether to include Grandmaster players
         max_per_tier: Max players per tier to collect
+        client: Pooled Riot client (defaults to the shared one for api_key)
     """
     print(f"\n{'='*60}")
     print(f"COLLECTING GM+ PLAYERS FROM {region.upper()}")
@@ -201,16 +202,15 @@ def collect_gm_players(api_key: str, region: str, include_challenger: bool = Tru
     
     if include_challenger:
         print("[1/2] Fetching Challenger players...")
-        challenger_entries = fetch_challenger_players(api_key, region)
+        challenger_entries = fetch_challenger_players(api_key, region, client=client)
         if challenger_entries:
             saved = save_players_to_db(api_key, region, challenger_entries, 
                                       'CHALLENGER', max_per_tier)
             total_saved += saved
-        time.sleep(2)  # Extra delay between tiers
     
     if include_grandmaster:
         print("\n[2/2] Fetching Grandmaster players...")
-        gm_entries = fetch_grandmaster_players(api_key, region)
+        gm_entries = fetch_grandmaster_players(api_key, region, client=client)
         if gm_entries:
             saved = save_players_to_db(api_key, region, gm_entries, 
                                       'GRANDMASTER', max_per_tier)
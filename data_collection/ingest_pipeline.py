@@ -0,0 +1,227 @@
+"""
+Ingest Pipeline - Staged fetch -> parse -> write pipeline with a single DB writer
+
+    match IDs --> [fetchers] --payloads--> [parsers] --records--> [writer]
+                   N threads   (bounded)    M threads  (bounded)   1 thread
+
+Fetchers keep the API busy while the writer commits, and the writer commits
+INGEST_BATCH_SIZE matches per transaction instead of one. Both queues are
+bounded, so a slow stage blocks the stage before it (backpressure) instead of
+buffering the whole crawl in memory. Queue depths are reported while it runs.
+
+On a graceful shutdown the fetchers stop taking match IDs, and everything
+already fetched is still parsed and committed. If the writer fails, the
+fetchers stop, the queues are drained so no stage blocks, and run() re-raises
+the writer's exception.
+"""
+import os
+import sys
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import (INGEST_FETCHERS, INGEST_PARSERS, INGEST_BATCH_SIZE, INGEST_QUEUE_SIZE,
+                    INGEST_FLUSH_SECONDS)
+from data_collection.shutdown import shutdown, ShutdownRequested
+from database.db_manager import db_manager
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+class IngestPipeline:
+    """Fetchers, parsers and one batching writer connected by bounded queues"""
+
+    def __init__(self, fetch: Callable[[str, str], Optional[Dict]],
+                 parse: Callable[[Dict, str], Dict],
+                 fetchers: int = INGEST_FETCHERS, parsers: int = INGEST_PARSERS,
+                 batch_size: int = INGEST_BATCH_SIZE, queue_size: int = INGEST_QUEUE_SIZE,
+                 on_stored: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            fetch: (match_id, region) -> raw payload, or None if it failed
+            parse: (payload, region) -> match dict for db_manager.add_matches
+            fetchers: Fetcher threads
+            parsers: Parser threads
+            batch_size: Matches per writer transaction
+            queue_size: Capacity of each queue between stages
+            on_stored: Called with each match_id the writer committed
+        """
+        self.fetch = fetch
+        self.parse = parse
+        self.fetchers = fetchers
+        self.parsers = parsers
+        self.batch_size = batch_size
+        self.on_stored = on_stored
+        self.payloads = queue.Queue(maxsize=queue_size)
+        self.records = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.processed = 0  # Match IDs taken by fetchers (drives the progress bar)
+        self.error: Optional[BaseException] = None  # Writer failure, re-raised by run()
+        self.stats = {
+            'fetched': 0,
+            'failed': 0,
+            'parsed': 0,
+            'written': 0,
+            'batches': 0,
+            'max_payload_queue': 0,
+            'max_record_queue': 0,
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def depths(self) -> Dict[str, int]:
+        """Current queue depths (items waiting for the next stage)"""
+        return {'payload_q': self.payloads.qsize(), 'record_q': self.records.qsize()}
+
+    def _put(self, q: queue.Queue, item, max_key: str):
+        q.put(item)  # Blocks while the next stage is behind
+        depth = q.qsize()
+        with self.lock:
+            self.stats[max_key] = max(self.stats[max_key], depth)
+
+    def _fetcher(self, items: Iterable[Tuple[str, str]], items_lock: threading.Lock, progress):
+        while not shutdown.requested and self.error is None:
+            with items_lock:
+                item = next(items, None)
+            if item is None:
+                break
+
+            match_id, region = item
+            try:
+                payload = self.fetch(match_id, region)
+            except ShutdownRequested:
+                break
+            except Exception as e:
+                payload = None
+                self._log(progress, f"✗ Error fetching {match_id}: {e}")
+
+            if payload:
+                self._count('fetched')
+                self._put(self.payloads, (payload, region), 'max_payload_queue')
+            else:
+                self._count('failed')
+            with self.lock:
+                self.processed += 1
+            self._progress(progress)
+
+    def _parser(self, progress):
+        while True:
+            item = self.payloads.get()
+            if item is _DONE:
+                break
+
+            payload, region = item
+            try:
+                record = self.parse(payload, region)
+            except Exception as e:
+                self._count('failed')
+                self._log(progress, f"✗ Error parsing {payload.get('metadata', {}).get('match_id')}: {e}")
+                continue
+            self._count('parsed')
+            self._put(self.records, record, 'max_record_queue')
+
+    def _writer(self, progress):
+        batch = []
+        done = False
+        try:
+            while not done:
+                try:
+                    item = self.records.get(timeout=INGEST_FLUSH_SECONDS)
+                    if item is _DONE:
+                        done = True
+                    else:
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+
+                # Commit full batches, and partial ones when the stream is idle or over
+                if batch and (len(batch) >= self.batch_size or done or self.records.empty()):
+                    self._write(batch)
+                    batch = []
+                    self._progress(progress)
+        except Exception as e:
+            self.error = e
+            self._log(progress, f"✗ Writer failed, stopping the ingest: {e}")
+            # Keep consuming so parsers blocked on a full queue can finish
+            while not done:
+                done = self.records.get() is _DONE
+
+    def _write(self, batch):
+        stored = db_manager.add_matches(batch)
+        if stored is None:
+            # The batch was rolled back: save what we can one match at a time
+            stored = [m['match_id'] for m in batch if db_manager.add_match(m)]
+        self._count('written', len(stored))
+        self._count('batches')
+        if self.on_stored:
+            for match_id in stored:
+                self.on_stored(match_id)
+
+    def _progress(self, progress):
+        if progress is None:
+            return
+        with self.lock:
+            progress.n = self.processed
+            progress.set_postfix({'new': self.stats['written'], 'failed': self.stats['failed'],
+                                  **self.depths()}, refresh=False)
+            progress.refresh()
+
+    @staticmethod
+    def _log(progress, message: str):
+        if progress is not None:
+            progress.write(message)
+        else:
+            print(message)
+
+    def run(self, items: Iterable[Tuple[str, str]], progress=None) -> Dict:
+        """
+        Fetch, parse and store matches
+
+        Args:
+            items: (match_id, region) pairs to ingest
+            progress: Optional tqdm bar (total = number of items)
+
+        Returns:
+            Pipeline stats (fetched, failed, parsed, written, batches, max queue depths)
+
+        Raises:
+            Exception: the writer's error, once every stage has stopped
+        """
+        items = iter(items)
+        items_lock = threading.Lock()
+
+        fetcher_threads = [threading.Thread(target=self._fetcher, args=(items, items_lock, progress),
+                                            name=f"ingest-fetch-{i}", daemon=True)
+                           for i in range(self.fetchers)]
+        parser_threads = [threading.Thread(target=self._parser, args=(progress,),
+                                           name=f"ingest-parse-{i}", daemon=True)
+                          for i in range(self.parsers)]
+        writer_thread = threading.Thread(target=self._writer, args=(progress,),
+                                         name="ingest-writer", daemon=True)
+
+        for thread in fetcher_threads + parser_threads + [writer_thread]:
+            thread.start()
+
+        # Drain stage by stage: fetchers -> parsers -> writer
+        self._join(fetcher_threads)
+        for _ in parser_threads:
+            self.payloads.put(_DONE)
+        self._join(parser_threads)
+        self.records.put(_DONE)
+        self._join([writer_thread])
+
+        if self.error is not None:
+            raise self.error
+        return self.stats
+
+    @staticmethod
+    def _join(threads):
+        # Short timeouts keep the main thread responsive to Ctrl-C
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.2)
@@ -1,10 +1,10 @@
 """
 Módulo para obtener información de partida activa/en vivo
 """
-import requests
+from data_collection.riot_client import resolve_client
 
 
-def fetch_active_game(api_key, region, puuid):
+def fetch_active_game(api_key, region, puuid, client=None):
     """
     Obtiene información de la partida activa si el summoner está jugando
     
@@ -12,15 +12,15 @@ def fetch_active_game(api_key, region, puuid):
         api_key: Riot API key
         region: Región (euw1, na1, etc.)
         puuid: PUUID del summoner
+        client: RiotClient con conexiones reutilizables (opcional)
     
     Returns:
         dict con información de la partida activa, o None si no está en partida
     """
     url = f"https://{region}.api.riotgames.com/tft/spectator/v5/active-games/by-puuid/{puuid}"
-    headers = {"X-Riot-Token": api_key}
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = resolve_client(api_key, client).get(url, method='tft-spectator-v5.active-game')
         
         if response.status_code == 200:
             # El jugador está en partida
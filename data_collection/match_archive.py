@@ -0,0 +1,335 @@
+"""
+Match Archive - Append-only compressed archive of raw match-v1 payloads
+
+Match details never change, so every payload returned by fetch_match_details is
+kept as one line in gzip-compressed JSONL segments:
+
+    match_archive/
+        segment-000001.jsonl.gz
+        segment-000002.jsonl.gz
+        index.tsv                 (match_id <TAB> segment)
+        .lock                     (serializes writers across processes)
+
+The replay command rebuilds or backfills the database from the archive without
+touching the API, e.g. after changing the parser or the comp signature:
+
+    python data_collection/match_archive.py replay [--rebuild]
+"""
+import os
+import sys
+import gzip
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from tqdm import tqdm
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single writer
+    fcntl = None
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import REGIONS, MATCH_ARCHIVE_DIR, MATCH_ARCHIVE_ENABLED, MATCH_ARCHIVE_SEGMENT_SIZE
+
+# Match ID prefix -> platform (e.g. "EUW1_6543210" -> "euw1")
+PLATFORM_BY_PREFIX = {region.upper(): region for region in REGIONS}
+PLATFORM_BY_PREFIX['EUN1'] = 'eune1'
+
+
+def get_region_for_match_id(match_id: str) -> str:
+    """Platform a match was played on, from its ID prefix"""
+    prefix = (match_id or '').split('_')[0].upper()
+    return PLATFORM_BY_PREFIX.get(prefix, 'unknown')
+
+
+class MatchArchive:
+    """
+    Append-only gzip JSONL segments with a match_id index
+
+    Built for sequential replay, not random access: the index only maps a match
+    to its segment, so get() decompresses that segment up to the match.
+
+    Several processes may share an archive (a collector and the UI's fetches):
+    appends take an exclusive flock on .lock and first read the index lines
+    other processes added, so they never pick a stale segment or archive a
+    match twice; reads take a shared lock. Within a process the fetcher threads
+    are serialized by one lock, each append writing a small gzip member and an
+    index line, which is cheap next to the API calls feeding it.
+    """
+
+    INDEX_FILE = 'index.tsv'
+    LOCK_FILE = '.lock'
+
+    def __init__(self, archive_dir: str = MATCH_ARCHIVE_DIR,
+                 segment_size: int = MATCH_ARCHIVE_SEGMENT_SIZE):
+        self.archive_dir = archive_dir
+        self.segment_size = segment_size
+        self.index: Optional[Dict[str, str]] = None  # Loaded lazily
+        self.index_offset = 0  # Bytes of index.tsv already read
+        self.index_inode = None  # Changes when another process rebuilds the index
+        self.segment_counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.archive_dir, segment)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """flock on the archive's lock file (shared for reads, exclusive for writes)"""
+        if fcntl is None or not os.path.isdir(self.archive_dir):
+            yield
+            return
+        with open(os.path.join(self.archive_dir, self.LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """Read the index lines not seen yet (e.g. appended by another process)"""
+        if self.index is None:
+            self.index = {}
+            self.index_offset = 0
+            self.segment_counts = {}
+
+        index_path = os.path.join(self.archive_dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+
+        stat = os.stat(index_path)
+        if self.index_inode not in (None, stat.st_ino) or stat.st_size < self.index_offset:
+            # Rewritten by rebuild_index(): start over
+            self.index, self.index_offset, self.segment_counts = {}, 0, {}
+        self.index_inode = stat.st_ino
+
+        with open(index_path, 'rb') as f:
+            f.seek(self.index_offset)
+            data = f.read()
+        # Only complete lines: a line being written right now is read next time
+        data = data[:data.rfind(b'\n') + 1]
+        self.index_offset += len(data)
+
+        for line in data.decode('utf-8').splitlines():
+            parts = line.split('\t')
+            if len(parts) != 2:
+                continue
+            match_id, segment = parts
+            if match_id not in self.index:
+                self.index[match_id] = segment
+                self.segment_counts[segment] = self.segment_counts.get(segment, 0) + 1
+
+    def _current_segment(self) -> str:
+        segments = sorted(self.segment_counts)
+        if segments and self.segment_counts[segments[-1]] < self.segment_size:
+            return segments[-1]
+        return f"segment-{len(segments) + 1:06d}.jsonl.gz"
+
+    def __contains__(self, match_id: str) -> bool:
+        with self.lock, self._file_lock(exclusive=False):
+            self._load_index()
+            return match_id in self.index
+
+    def __len__(self) -> int:
+        with self.lock, self._file_lock(exclusive=False):
+            self._load_index()
+            return len(self.index)
+
+    def append(self, payload: Dict) -> bool:
+        """
+        Archive a raw match payload (no-op if the match is already archived)
+
+        Called from the fetcher threads; writes are serialized by the archive
+        lock within a process and by the lock file across processes
+
+        Returns:
+            True if the payload was written
+        """
+        match_id = payload.get('metadata', {}).get('match_id')
+        if not match_id:
+            return False
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with self.lock, self._file_lock(exclusive=True):
+            self._load_index()
+            if match_id in self.index:
+                return False
+
+            segment = self._current_segment()
+
+            # Each append is its own gzip member, so a crash never corrupts earlier lines
+            with gzip.open(self._segment_path(segment), 'at', encoding='utf-8') as f:
+                f.write(json.dumps(payload, separators=(',', ':')) + '\n')
+            line = f"{match_id}\t{segment}\n".encode('utf-8')
+            with open(os.path.join(self.archive_dir, self.INDEX_FILE), 'ab') as f:
+                f.write(line)
+
+            self.index[match_id] = segment
+            self.index_offset += len(line)
+            self.segment_counts[segment] = self.segment_counts.get(segment, 0) + 1
+            return True
+
+    def segments(self):
+        """Segment file names in write order"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(name for name in os.listdir(self.archive_dir) if name.endswith('.jsonl.gz'))
+
+    def iter_payloads(self) -> Iterator[Dict]:
+        """Stream every archived payload, segment by segment"""
+        for segment in self.segments():
+            with gzip.open(self._segment_path(segment), 'rt', encoding='utf-8') as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+                except (EOFError, json.JSONDecodeError):
+                    # Truncated tail from an interrupted write
+                    print(f"⚠ Skipping truncated data at the end of {segment}")
+
+    def get(self, match_id: str) -> Optional[Dict]:
+        """
+        Read one archived payload via the index
+
+        Scans its segment from the start (up to MATCH_ARCHIVE_SEGMENT_SIZE payloads),
+        so it suits spot checks; use iter_payloads() to read many matches
+        """
+        with self.lock, self._file_lock(exclusive=False):
+            self._load_index()
+            segment = self.index.get(match_id)
+        if not segment:
+            return None
+
+        with gzip.open(self._segment_path(segment), 'rt', encoding='utf-8') as f:
+            for line in f:
+                # Cheap substring test before parsing the full payload
+                if match_id in line:
+                    payload = json.loads(line)
+                    if payload.get('metadata', {}).get('match_id') == match_id:
+                        return payload
+        return None
+
+    def rebuild_index(self) -> int:
+        """Rewrite index.tsv from the segments (e.g. after a crash mid-append)"""
+        with self.lock, self._file_lock(exclusive=True):
+            index = {}
+            for segment in self.segments():
+                with gzip.open(self._segment_path(segment), 'rt', encoding='utf-8') as f:
+                    try:
+                        for line in f:
+                            if line.strip():
+                                match_id = json.loads(line).get('metadata', {}).get('match_id')
+                                if match_id:
+                                    index.setdefault(match_id, segment)
+                    except (EOFError, json.JSONDecodeError):
+                        pass
+
+            # Replaced atomically, so readers in other processes see the new inode
+            index_path = os.path.join(self.archive_dir, self.INDEX_FILE)
+            with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+                for match_id, segment in index.items():
+                    f.write(f"{match_id}\t{segment}\n")
+            os.replace(index_path + '.tmp', index_path)
+
+            self.index = None
+            self._load_index()
+            return len(index)
+
+
+# Global instance used by fetch_match_details
+match_archive = MatchArchive()
+
+
+def archive_match(payload: Dict):
+    """Archive a payload if archiving is enabled; never raises"""
+    if not MATCH_ARCHIVE_ENABLED or not payload:
+        return
+    try:
+        match_archive.append(payload)
+    except Exception as e:
+        print(f"⚠ Could not archive match: {e}")
+
+
+def replay_archive(rebuild: bool = False, archive: MatchArchive = match_archive,
+                   chunk_size: int = 1000) -> Tuple[int, int]:
+    """
+    Rebuild or backfill the database from the archive without calling the API
+
+    Args:
+        rebuild: Delete all match data first and re-ingest everything
+        archive: Archive to read
+        chunk_size: Payloads per existence check and insert transaction
+
+    Returns:
+        (matches added, matches skipped because they were already stored)
+    """
+    from data_collection.batch_match_collector import build_match_data
+    from database.db_manager import db_manager
+
+    if rebuild:
+        deleted = db_manager.clear_match_data()
+        print(f"✓ Cleared {deleted} matches before rebuild")
+
+    added = 0
+    skipped = 0
+
+    def ingest(chunk):
+        nonlocal added, skipped
+        existing = db_manager.get_existing_match_ids(p['metadata']['match_id'] for p in chunk)
+        skipped += len(existing)
+        matches = [build_match_data(payload, get_region_for_match_id(payload['metadata']['match_id']))
+                   for payload in chunk if payload['metadata']['match_id'] not in existing]
+        stored = db_manager.add_matches(matches)
+        if stored is None:
+            # The chunk was rolled back: save what we can one match at a time
+            stored = [m['match_id'] for m in matches if db_manager.add_match(m)]
+        added += len(stored)
+
+    chunk = []
+    with tqdm(total=len(archive), desc="Replaying archive") as pbar:
+        for payload in archive.iter_payloads():
+            if not payload.get('metadata', {}).get('match_id'):
+                continue
+            chunk.append(payload)
+            if len(chunk) >= chunk_size:
+                ingest(chunk)
+                pbar.update(len(chunk))
+                chunk = []
+        if chunk:
+            ingest(chunk)
+            pbar.update(len(chunk))
+
+    return added, skipped
+
+
+if __name__ == "__main__":
+    import argparse
+    from database.db_manager import db_manager
+
+    parser = argparse.ArgumentParser(description='Raw match archive for TFT Meta Tracker')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    replay_parser = subparsers.add_parser('replay', help='Ingest archived matches into the database')
+    replay_parser.add_argument('--rebuild', action='store_true',
+                               help='Delete all match data first and rebuild it from the archive')
+    subparsers.add_parser('stats', help='Show archive size')
+    subparsers.add_parser('reindex', help='Rebuild index.tsv from the segments')
+
+    args = parser.parse_args()
+
+    if args.command == 'replay':
+        db_manager.init_db()
+        added, skipped = replay_archive(rebuild=args.rebuild)
+        print(f"\n✓ Replay complete: {added} matches added, {skipped} already in DB")
+    elif args.command == 'stats':
+        segments = match_archive.segments()
+        size = sum(os.path.getsize(os.path.join(match_archive.archive_dir, s)) for s in segments)
+        print(f"Archive: {match_archive.archive_dir}")
+        print(f"  Matches: {len(match_archive)}")
+        print(f"  Segments: {len(segments)}")
+        print(f"  Size: {size / 1024 / 1024:.1f} MB")
+    elif args.command == 'reindex':
+        print(f"✓ Indexed {match_archive.rebuild_index()} matches")
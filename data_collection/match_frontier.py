@@ -0,0 +1,79 @@
+"""
+Match Frontier - Crawl-wide set of match IDs still to fetch
+
+High-elo players share lobbies, so the same match ID is listed for up to 8
+tracked players in one crawl. The frontier keeps each ID once, drops the ones
+already stored with a single set-based query and hands out the rest.
+
+It also remembers which IDs each player listed, so a crawl only advances the
+high-water marks of players whose listed matches all ended up stored.
+"""
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database.db_manager import db_manager
+
+
+class MatchFrontier:
+    """Deduplicated match IDs (with the region they were listed from) for one crawl"""
+
+    def __init__(self):
+        self.pending: Dict[str, str] = {}  # match_id -> region, in listing order
+        self.seen = set()
+        self.stored = set()
+        self.listed_by: Dict[str, List[str]] = {}  # puuid -> listed match IDs
+        self.listed = 0
+        self.duplicates = 0
+        self.already_stored = 0
+
+    def add(self, match_ids: Iterable[str], region: str, puuid: Optional[str] = None) -> int:
+        """Add IDs listed for a player, returns how many were new to this crawl"""
+        match_ids = list(match_ids or [])
+        if puuid:
+            self.listed_by[puuid] = match_ids
+        added = 0
+        for match_id in match_ids:
+            self.listed += 1
+            if match_id in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(match_id)
+            self.pending[match_id] = region
+            added += 1
+        return added
+
+    def remove_stored(self) -> int:
+        """Drop IDs already in the database, returns how many were removed"""
+        existing = db_manager.get_existing_match_ids(self.pending)
+        for match_id in existing:
+            del self.pending[match_id]
+        self.stored.update(existing)
+        self.already_stored += len(existing)
+        return len(existing)
+
+    def mark_stored(self, match_id: str):
+        """Record a match saved during this crawl"""
+        self.stored.add(match_id)
+
+    def truncate(self, limit: int) -> int:
+        """Keep only the first `limit` pending IDs, returns how many were dropped"""
+        dropped = list(self.pending)[limit:]
+        for match_id in dropped:
+            del self.pending[match_id]
+        return len(dropped)
+
+    def complete_players(self) -> List[str]:
+        """Players whose listed matches are all stored (safe to advance their high-water mark)"""
+        return [puuid for puuid, match_ids in self.listed_by.items()
+                if all(match_id in self.stored for match_id in match_ids)]
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (match_id, region) pairs still to fetch"""
+        return iter(list(self.pending.items()))
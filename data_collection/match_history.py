@@ -1,17 +1,24 @@
-import requests
+from data_collection.match_archive import archive_match
+from data_collection.riot_client import resolve_client
 
-def fetch_match_ids(api_key, routing, puuid, count=20):
+def fetch_match_ids(api_key, routing, puuid, count=20, client=None, start_time=None):
+    """
+    Fetch match IDs for a player, newest first. start_time (epoch seconds)
+    limits the list to games played since then.
+    """
     url = f"https://{routing}.api.riotgames.com/tft/match/v1/matches/by-puuid/{puuid}/ids?count={count}"
-    headers = {"X-Riot-Token": api_key}
-    r = requests.get(url, headers=headers, timeout=10)
+    if start_time is not None:
+        url += f"&startTime={int(start_time)}"
+    r = resolve_client(api_key, client).get(url, method='tft-match-v1.ids-by-puuid')
     if r.ok:
         return r.json()
     return []
 
-def fetch_match_details(api_key, routing, match_id):
+def fetch_match_details(api_key, routing, match_id, client=None):
     url = f"https://{routing}.api.riotgames.com/tft/match/v1/matches/{match_id}"
-    headers = {"X-Riot-Token": api_key}
-    r = requests.get(url, headers=headers, timeout=10)
+    r = resolve_client(api_key, client).get(url, method='tft-match-v1.match')
     if r.ok:
-        return r.json()
+        match_detail = r.json()
+        archive_match(match_detail)
+        return match_detail
     return None
@@ -0,0 +1,150 @@
+"""
+Parallel Collector - Runs several regions at once
+
+Platforms (euw1, kr, na1, ...) and routing clusters (europe, asia, americas, sea)
+have independent rate limits. League calls run in one thread per platform, and
+match collection runs in one worker per routing cluster. Each cluster worker
+starts a region as soon as that region's players are in the database.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import MATCHES_PER_PLAYER
+from data_collection.gm_collector import collect_gm_players
+from data_collection.batch_match_collector import collect_matches_batch, get_routing_for_region
+from data_collection.crawl_journal import CrawlJournal
+from data_collection.crawl_scheduler import CrawlBudget
+from data_collection.riot_client import RiotClient, resolve_client
+from data_collection.shutdown import shutdown
+
+
+def _collect_cluster(api_key: str, regions: List[str], player_futures: Dict[str, Future],
+                     matches_per_player: int, client: RiotClient,
+                     summary: Dict[str, Dict], crawl_budget: Optional[CrawlBudget] = None,
+                     journal: Optional[CrawlJournal] = None):
+    """Worker for one routing cluster: collects matches region by region"""
+    for region in regions:
+        if shutdown.requested:
+            break
+        if journal and journal.matches_collected(region):
+            print(f"[{region.upper()}] ✓ Matches already collected in this run")
+            continue
+
+        future = player_futures.get(region)
+        if future is not None:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[{region.upper()}] ✗ Player collection failed: {e}")
+
+        start = time.time()
+        try:
+            new_matches = collect_matches_batch(
+                api_key=api_key,
+                region=region,
+                max_players=None,  # Process all players in DB
+                matches_per_player=matches_per_player,
+                client=client,
+                journal=journal,
+                crawl_budget=crawl_budget
+            ) or 0
+        except Exception as e:
+            print(f"[{region.upper()}] ✗ Match collection failed: {e}")
+            new_matches = 0
+
+        summary[region]['new_matches'] = new_matches
+        summary[region]['match_seconds'] = time.time() - start
+        print(f"[{region.upper()}] ✓ {new_matches} new matches "
+              f"in {summary[region]['match_seconds']:.0f}s")
+
+
+def collect_regions_parallel(api_key: str, regions: List[str], collect_players: bool = True,
+                             collect_matches: bool = True, max_per_tier: int = 50,
+                             include_grandmaster: bool = True,
+                             matches_per_player: int = MATCHES_PER_PLAYER,
+                             client: Optional[RiotClient] = None,
+                             budget: Optional[int] = None,
+                             journal: Optional[CrawlJournal] = None) -> Dict[str, Dict]:
+    """
+    Collect players and matches for several regions concurrently
+
+    Args:
+        api_key: Riot API Key
+        regions: Regions to collect from
+        collect_players: Whether to fetch GM+ players first
+        collect_matches: Whether to collect matches
+        max_per_tier: Max players per tier to collect
+        include_grandmaster: Whether to include Grandmaster players
+        matches_per_player: Number of matches per player
+        client: Pooled Riot client (defaults to the shared one for api_key)
+        budget: Maximum API calls for match collection, shared by all regions
+        journal: Run journal (regions finished in an earlier attempt are skipped)
+
+    Returns:
+        {region: {'players_saved': int, 'new_matches': int, ...}}
+    """
+    client = resolve_client(api_key, client)
+    crawl_budget = journal.crawl_budget() if journal else CrawlBudget(budget)
+    summary = {region: {'players_saved': 0, 'new_matches': 0} for region in regions}
+
+    # Group regions by routing cluster
+    clusters: Dict[str, List[str]] = {}
+    for region in regions:
+        clusters.setdefault(get_routing_for_region(region), []).append(region)
+
+    print(f"Running {len(regions)} regions on {len(clusters)} routing clusters: "
+          + ", ".join(f"{routing}={'/'.join(r.upper() for r in rs)}" for routing, rs in clusters.items()))
+
+    with ThreadPoolExecutor(max_workers=len(regions)) as platform_pool, \
+         ThreadPoolExecutor(max_workers=len(clusters)) as cluster_pool:
+
+        # Platform-level league calls: one thread per platform
+        player_futures: Dict[str, Future] = {}
+        if collect_players:
+            def collect_players_for(region):
+                if shutdown.requested:
+                    return 0
+                if journal and journal.players_collected(region):
+                    print(f"[{region.upper()}] ✓ Players already collected in this run")
+                    return 0
+                saved = collect_gm_players(
+                    api_key=api_key,
+                    region=region,
+                    include_challenger=True,
+                    include_grandmaster=include_grandmaster,
+                    max_per_tier=max_per_tier,
+                    client=client
+                )
+                summary[region]['players_saved'] = saved
+                if journal:
+                    journal.mark_players_collected(region)
+                print(f"[{region.upper()}] ✓ {saved} players saved")
+                return saved
+
+            for region in regions:
+                player_futures[region] = platform_pool.submit(collect_players_for, region)
+
+        # Routing-level match calls: one worker per cluster
+        if collect_matches:
+            cluster_futures = [
+                cluster_pool.submit(_collect_cluster, api_key, cluster_regions, player_futures,
+                                    matches_per_player, client, summary,
+                                    crawl_budget, journal)
+                for cluster_regions in clusters.values()
+            ]
+            for future in cluster_futures:
+                future.result()
+
+        for region, future in player_futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[{region.upper()}] ✗ Player collection failed: {e}")
+
+    return summary
@@ -1,12 +1,11 @@
-import requests
+from data_collection.riot_client import resolve_client
 
-def fetch_ranked_stats(api_key, region, summoner_id):
+def fetch_ranked_stats(api_key, region, summoner_id, client=None):
     """
     Fetch ranked stats for a summoner by ID (Summoner ID or PUUID)
     """
     url = f"https://{region}.api.riotgames.com/tft/league/v1/entries/by-summoner/{summoner_id}"
-    headers = {"X-Riot-Token": api_key}
-    r = requests.get(url, headers=headers, timeout=10)
+    r = resolve_client(api_key, client).get(url, method='tft-league-v1.entries-by-summoner')
     if r.ok:
         return r.json()
     return []
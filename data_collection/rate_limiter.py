@@ -0,0 +1,187 @@
+"""
+Rate Limiter - Adaptive limiter driven by Riot rate-limit headers
+
+Riot returns the key limits on every response:
+    X-App-Rate-Limit:          "20:1,100:120"   (requests:seconds, per window)
+    X-App-Rate-Limit-Count:    "3:1,14:120"     (requests used in each window)
+    X-Method-Rate-Limit:       "500:10"
+    X-Method-Rate-Limit-Count: "7:10"
+
+App limits apply per routing/platform host (europe, euw1, ...) and method limits
+per host and endpoint. Callers block only as long as the tightest window requires.
+"""
+import os
+import sys
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import RIOT_APP_RATE_LIMIT
+from data_collection.shutdown import shutdown
+
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    Parse a Riot rate-limit header into (count, seconds) pairs
+    Example: "20:1,100:120" -> [(20, 1), (100, 120)]
+    """
+    pairs = []
+    if not value:
+        return pairs
+
+    for part in value.split(','):
+        try:
+            count, seconds = part.strip().split(':')
+            pairs.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+
+    return pairs
+
+
+class RateLimitWindow:
+    """A single fixed window (e.g. 100 requests every 120 seconds)"""
+
+    def __init__(self, limit: int, seconds: int):
+        self.limit = limit
+        self.seconds = seconds
+        self.count = 0
+        self.start = None
+
+    def _roll(self, now: float):
+        if self.start is not None and now >= self.start + self.seconds:
+            self.start = None
+            self.count = 0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds to wait before one more request fits in this window"""
+        self._roll(now)
+        if self.count < self.limit:
+            return 0.0
+        return max(0.0, self.start + self.seconds - now)
+
+    def consume(self, now: float):
+        self._roll(now)
+        if self.start is None:
+            self.start = now
+        self.count += 1
+
+    def sync(self, count: int, now: float):
+        """Align the local count with the count reported by Riot"""
+        self._roll(now)
+        if self.start is None:
+            self.start = now
+        self.count = max(self.count, count)
+
+
+class RateLimitBucket:
+    """Multi-window bucket: a request must fit in every window"""
+
+    def __init__(self, limits: Optional[List[Tuple[int, int]]] = None):
+        self.windows: Dict[int, RateLimitWindow] = {}
+        self.blocked_until = 0.0
+        self.set_limits(limits or [])
+
+    def set_limits(self, limits: List[Tuple[int, int]]):
+        """Replace window limits, keeping counts of windows that still exist"""
+        windows = {}
+        for limit, seconds in limits:
+            window = self.windows.get(seconds) or RateLimitWindow(limit, seconds)
+            window.limit = limit
+            windows[seconds] = window
+        self.windows = windows
+
+    def wait_time(self, now: float) -> float:
+        wait = max((w.wait_time(now) for w in self.windows.values()), default=0.0)
+        return max(wait, self.blocked_until - now)
+
+    def consume(self, now: float):
+        for window in self.windows.values():
+            window.consume(now)
+
+    def update(self, limit_header: Optional[str], count_header: Optional[str], now: float):
+        """Update limits and counts from a pair of response headers"""
+        limits = parse_rate_limit_header(limit_header)
+        if limits and limits != [(w.limit, s) for s, w in self.windows.items()]:
+            self.set_limits(limits)
+
+        for count, seconds in parse_rate_limit_header(count_header):
+            window = self.windows.get(seconds)
+            if window:
+                window.sync(count, now)
+
+
+class RateLimiter:
+    """
+    Shared limiter with one app bucket per host and one method bucket per
+    (host, method). Thread-safe: concurrent collectors share the same budget.
+    """
+
+    def __init__(self, default_app_limit: str = RIOT_APP_RATE_LIMIT,
+                 sleep: Callable[[float], None] = shutdown.sleep):
+        self.default_app_limits = parse_rate_limit_header(default_app_limit)
+        self.sleep = sleep
+        self.app_buckets: Dict[str, RateLimitBucket] = {}
+        self.method_buckets: Dict[Tuple[str, str], RateLimitBucket] = {}
+        self.lock = threading.Lock()
+
+    def _buckets(self, host: str, method: str) -> Tuple[RateLimitBucket, RateLimitBucket]:
+        app_bucket = self.app_buckets.get(host)
+        if app_bucket is None:
+            app_bucket = self.app_buckets[host] = RateLimitBucket(self.default_app_limits)
+
+        method_bucket = self.method_buckets.get((host, method))
+        if method_bucket is None:
+            # Method limits are unknown until the first response
+            method_bucket = self.method_buckets[(host, method)] = RateLimitBucket()
+
+        return app_bucket, method_bucket
+
+    def acquire(self, host: str, method: str):
+        """
+        Block until a request to (host, method) fits in every window
+
+        Raises:
+            ShutdownRequested: a graceful shutdown started while waiting
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                app_bucket, method_bucket = self._buckets(host, method)
+                wait = max(app_bucket.wait_time(now), method_bucket.wait_time(now))
+
+                if wait <= 0:
+                    app_bucket.consume(now)
+                    method_bucket.consume(now)
+                    return
+
+            self.sleep(wait)
+
+    def update(self, host: str, method: str, headers):
+        """Learn limits and current counts from a Riot response"""
+        with self.lock:
+            now = time.monotonic()
+            app_bucket, method_bucket = self._buckets(host, method)
+            app_bucket.update(headers.get('X-App-Rate-Limit'),
+                              headers.get('X-App-Rate-Limit-Count'), now)
+            method_bucket.update(headers.get('X-Method-Rate-Limit'),
+                                 headers.get('X-Method-Rate-Limit-Count'), now)
+
+    def block(self, host: str, method: str, seconds: float, limit_type: Optional[str] = None):
+        """
+        Stop all callers after a 429. `limit_type` is Riot's X-Rate-Limit-Type:
+        'application' blocks the whole host, anything else only the method
+        """
+        with self.lock:
+            until = time.monotonic() + seconds
+            app_bucket, method_bucket = self._buckets(host, method)
+            bucket = app_bucket if limit_type == 'application' else method_bucket
+            bucket.blocked_until = max(bucket.blocked_until, until)
+
+
+# Global instance shared by all fetchers
+rate_limiter = RateLimiter()
+
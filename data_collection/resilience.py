@@ -0,0 +1,158 @@
+"""
+Resilience - Retry policy, per-host circuit breaker and retry accounting
+
+Used by RiotClient so every data_collection fetcher shares the same behaviour:
+  - 429: wait for Retry-After (or back off) and retry
+  - 5xx / timeouts / connection errors: jittered exponential backoff and retry
+  - repeated 5xx / network failures on a host open its circuit breaker, and
+    calls to that host fail fast until the cooldown has passed
+"""
+import os
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import (RIOT_MAX_RETRIES, RIOT_BACKOFF_BASE, RIOT_BACKOFF_MAX,
+                    RIOT_BREAKER_THRESHOLD, RIOT_BREAKER_COOLDOWN)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit breaker is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host} (retry in {retry_in:.0f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """Jittered exponential backoff"""
+
+    def __init__(self, max_retries: int = RIOT_MAX_RETRIES, base_delay: float = RIOT_BACKOFF_BASE,
+                 max_delay: float = RIOT_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based), with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def retry_after(headers) -> Optional[float]:
+        """Parse the Retry-After header (seconds)"""
+        value = headers.get('Retry-After')
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: opens after `threshold` consecutive failures, lets a single
+    probe request through after `cooldown` seconds and closes again on success.
+    """
+
+    def __init__(self, threshold: int = RIOT_BREAKER_THRESHOLD, cooldown: float = RIOT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures: Dict[str, int] = {}
+        self.opened_at: Dict[str, float] = {}
+        self.probing = set()
+        self.lock = threading.Lock()
+
+    def before_request(self, host: str) -> bool:
+        """
+        Raise CircuitOpenError if the host's breaker is open
+
+        Returns:
+            True if this request is the half-open probe (the caller must end it with
+            record_success, record_failure or release)
+        """
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return False
+
+            retry_in = opened_at + self.cooldown - time.monotonic()
+            if retry_in > 0 or host in self.probing:
+                raise CircuitOpenError(host, max(retry_in, 0))
+
+            # Half-open: let one probe through
+            self.probing.add(host)
+            return True
+
+    def release(self, host: str):
+        """End a probe that got no verdict (429, shutdown, error) without counting a failure"""
+        with self.lock:
+            self.probing.discard(host)
+
+    def record_success(self, host: str):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+            self.probing.discard(host)
+
+    def record_failure(self, host: str) -> bool:
+        """Record a failure, returns True if this opened the breaker"""
+        with self.lock:
+            self.failures[host] = self.failures.get(host, 0) + 1
+            was_probing = host in self.probing
+            self.probing.discard(host)
+
+            if was_probing or self.failures[host] >= self.threshold:
+                newly_opened = host not in self.opened_at or was_probing
+                self.opened_at[host] = time.monotonic()
+                return newly_opened
+            return False
+
+    def is_open(self, host: str) -> bool:
+        with self.lock:
+            return host in self.opened_at
+
+
+class RetryStats:
+    """Thread-safe counters of retries and give-ups by reason"""
+
+    def __init__(self):
+        self.retries = Counter()
+        self.gave_up = Counter()
+        self.lock = threading.Lock()
+
+    def record_retry(self, reason: str):
+        with self.lock:
+            self.retries[reason] += 1
+
+    def record_give_up(self, reason: str):
+        with self.lock:
+            self.gave_up[reason] += 1
+
+    def snapshot(self) -> Dict[str, Counter]:
+        with self.lock:
+            return {'retries': Counter(self.retries), 'gave_up': Counter(self.gave_up)}
+
+    def since(self, snapshot: Dict[str, Counter]) -> Dict[str, Counter]:
+        """Counters accumulated after `snapshot` was taken"""
+        current = self.snapshot()
+        return {key: current[key] - snapshot[key] for key in current}
+
+    @staticmethod
+    def format(stats: Dict[str, Counter]) -> str:
+        """One-line summary, e.g. '5 (429: 2, 503: 3), gave up: 1 (timeout: 1)'"""
+        def fmt(counter):
+            total = sum(counter.values())
+            if not total:
+                return "0"
+            return f"{total} (" + ", ".join(f"{k}: {v}" for k, v in counter.most_common()) + ")"
+
+        text = fmt(stats['retries'])
+        if sum(stats['gave_up'].values()):
+            text += f", gave up: {fmt(stats['gave_up'])}"
+        return text
@@ -0,0 +1,175 @@
+"""
+Riot Client - Pooled HTTP client shared by all data_collection fetchers
+
+Keeps one keep-alive requests.Session per Riot host (europe, euw1, ...) with
+the X-Riot-Token header set once, so consecutive calls reuse TLS connections.
+Every request goes through the shared rate limiter, retry policy and per-host
+circuit breaker.
+"""
+import os
+import sys
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import (RIOT_HTTP_POOL_SIZE, RIOT_HTTP_CONNECT_TIMEOUT, RIOT_HTTP_READ_TIMEOUT,
+                    RIOT_API_BASE_URL)
+from data_collection.rate_limiter import RateLimiter, rate_limiter
+from data_collection.resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, RetryStats
+from data_collection.shutdown import shutdown
+
+
+class RiotClient:
+    """HTTP client for the Riot API with one connection pool per host"""
+
+    def __init__(self, api_key: str, pool_size: int = RIOT_HTTP_POOL_SIZE,
+                 connect_timeout: float = RIOT_HTTP_CONNECT_TIMEOUT,
+                 read_timeout: float = RIOT_HTTP_READ_TIMEOUT,
+                 limiter: RateLimiter = rate_limiter,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 base_url: Optional[str] = RIOT_API_BASE_URL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_stats = RetryStats()
+        self.sessions: Dict[str, requests.Session] = {}
+        self.lock = threading.Lock()
+
+    def _session(self, netloc: str) -> requests.Session:
+        """Get (or create) the pooled session for a host"""
+        with self.lock:
+            session = self.sessions.get(netloc)
+            if session is None:
+                session = requests.Session()
+                session.headers.update({"X-Riot-Token": self.api_key})
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[netloc] = session
+            return session
+
+    def get(self, url: str, method: str) -> requests.Response:
+        """
+        GET a Riot API url through the shared rate limiter, retrying 429s,
+        5xx responses and network errors
+
+        Args:
+            url: Full Riot API url
+            method: Endpoint name used for the method bucket (e.g. 'tft-match-v1.match')
+
+        Returns:
+            requests.Response (the last one if retries ran out)
+
+        Raises:
+            CircuitOpenError: the host's circuit breaker is open
+            ShutdownRequested: a graceful shutdown started while waiting to send
+            requests.RequestException: network error after the last retry
+        """
+        parsed = urlparse(url)
+        netloc = parsed.netloc
+        host = netloc.split('.')[0]
+        policy = self.retry_policy
+
+        if self.base_url:
+            # Stand-in server: https://europe.api.riotgames.com/x -> {base_url}/europe/x
+            url = f"{self.base_url}/{host}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+
+        for attempt in range(policy.max_retries + 1):
+            last_attempt = attempt == policy.max_retries
+            try:
+                probe = self.breaker.before_request(host)
+            except CircuitOpenError:
+                self.retry_stats.record_give_up('circuit_open')
+                raise
+
+            try:
+                self.limiter.acquire(host, method)
+
+                try:
+                    response = self._session(netloc).get(url, timeout=self.timeout)
+                except requests.RequestException as e:
+                    reason = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+                    probe = False
+                    self._record_failure(host)
+                    if last_attempt:
+                        self.retry_stats.record_give_up(reason)
+                        raise
+                    self.retry_stats.record_retry(reason)
+                    shutdown.sleep(policy.backoff(attempt))
+                    continue
+
+                self.limiter.update(host, method, response.headers)
+
+                if response.status_code == 429:
+                    # Says nothing about the host's health: free the probe slot
+                    if probe:
+                        probe = False
+                        self.breaker.release(host)
+                    wait = policy.retry_after(response.headers)
+                    if wait is None:
+                        wait = policy.backoff(attempt)
+                    self.limiter.block(host, method, wait, response.headers.get('X-Rate-Limit-Type'))
+                elif response.status_code >= 500:
+                    probe = False
+                    self._record_failure(host)
+                    wait = policy.backoff(attempt)
+                else:
+                    probe = False
+                    self.breaker.record_success(host)
+                    return response
+
+                reason = str(response.status_code)
+                if last_attempt:
+                    self.retry_stats.record_give_up(reason)
+                    return response
+                self.retry_stats.record_retry(reason)
+                # The limiter already holds 429 callers until Retry-After has passed
+                if response.status_code != 429:
+                    shutdown.sleep(wait)
+            finally:
+                # Shutdown while waiting to send, or an unexpected error: never leave the probe held
+                if probe:
+                    self.breaker.release(host)
+
+        return response
+
+    def _record_failure(self, host: str):
+        if self.breaker.record_failure(host):
+            print(f"⚠ Circuit breaker opened for {host} "
+                  f"({self.breaker.cooldown:.0f}s cooldown)")
+
+    def close(self):
+        """Close all pooled connections"""
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+_clients: Dict[str, RiotClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> RiotClient:
+    """Get the shared client for an API key (created on first use)"""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = RiotClient(api_key)
+        return client
+
+
+def resolve_client(api_key: str, client: Optional[RiotClient] = None) -> RiotClient:
+    """Return the injected client, or the shared one for this API key"""
+    return client if client is not None else get_client(api_key)
@@ -0,0 +1,62 @@
+"""
+Graceful Shutdown - Lets a long crawl stop cleanly on Ctrl-C / SIGTERM
+
+The first signal only sets a flag: collectors stop taking new players and
+match IDs, in-flight fetches finish and are committed, and the crawl journal
+is marked interrupted so `collect_data.py --resume` can continue it.
+A second Ctrl-C aborts immediately.
+
+Waits for the rate limiter or a retry backoff go through shutdown.sleep, which
+raises ShutdownRequested instead of holding the process for minutes on a
+request that has not been sent yet.
+"""
+import signal
+import threading
+
+
+class ShutdownRequested(Exception):
+    """Raised from a wait once a graceful shutdown has been requested"""
+
+    def __init__(self):
+        super().__init__("Shutdown requested")
+
+
+class GracefulShutdown:
+    """Process-wide stop flag set by SIGINT / SIGTERM"""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    @property
+    def requested(self) -> bool:
+        return self.event.is_set()
+
+    def request(self):
+        self.event.set()
+
+    def reset(self):
+        self.event.clear()
+
+    def sleep(self, seconds: float):
+        """time.sleep that wakes up (raising ShutdownRequested) on shutdown"""
+        if self.event.wait(seconds):
+            raise ShutdownRequested()
+
+    def install(self):
+        """Install the signal handlers (main thread only)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGINT, self._handle)
+        signal.signal(signal.SIGTERM, self._handle)
+
+    def _handle(self, signum, frame):
+        if self.requested:
+            # Second signal: give up on the graceful path
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            raise KeyboardInterrupt
+        print("\n⚠ Stopping: finishing in-flight requests (press Ctrl-C again to abort)...")
+        self.request()
+
+
+# Global instance checked by the collectors
+shutdown = GracefulShutdown()
@@ -1,19 +1,17 @@
-import requests
 import os
+from data_collection.riot_client import resolve_client
 
-def fetch_summoner_by_riot_id(api_key, region, routing, game_name, tag_line):
+def fetch_summoner_by_riot_id(api_key, region, routing, game_name, tag_line, client=None):
     url = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers, timeout=10)
+    response = resolve_client(api_key, client).get(url, method='account-v1.by-riot-id')
     if response.ok:
         return response.json()
     return None
 
-def fetch_summoner_details_by_puuid(api_key, region, puuid):
+def fetch_summoner_details_by_puuid(api_key, region, puuid, client=None):
     # Try TFT endpoint first
     url_tft = f"https://{region}.api.riotgames.com/tft/summoner/v1/summoners/by-puuid/{puuid}"
-    headers = {"X-Riot-Token": api_key}
-    response = requests.get(url_tft, headers=headers, timeout=10)
+    response = resolve_client(api_key, client).get(url_tft, method='tft-summoner-v1.by-puuid')
     if response.ok:
         data = response.json()
         if data.get('id'):
@@ -21,7 +19,7 @@ def fetch_summoner_details_by_puuid(api_key, region, puuid):
             
     # Fallback to LoL endpoint
     url_lol = f"https://{region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    response = requests.get(url_lol, headers=headers, timeout=10)
+    response = resolve_client(api_key, client).get(url_lol, method='summoner-v4.by-puuid')
     if response.ok:
         return response.json()
     return None
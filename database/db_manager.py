@@ -1,36 +1,195 @@
 """
 Database Manager - CRUD operations and database initialization
 """
-from sqlalchemy import create_engine, desc, and_, func, Integer
+from sqlalchemy import (create_engine, desc, and_, func, Integer, inspect, text, insert, select, union_all,
+                        bindparam, delete, exists, tuple_, case)
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Iterable, Iterator, Sequence, Set
 import os
 import sys
+import time
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database.models import Base, Player, Match, Participant, Composition, MetaStat
-from config import DATABASE_URL
+from database.models import (Base, Player, LeagueSnapshot, Match, Participant, Composition, MetaStat, MetaAggregate,
+                             CompDetailAggregate, MatchSummary, Unit, Trait, Item, Augment, ParticipantUnit, ParticipantTrait,
+                             ParticipantAugment, DailyCompStat, DailyUnitStat, DailyAugmentStat, CrawlRun, CrawlRunRegion, CrawlRunPlayer)
+from database.sqlite_tuning import install_pragmas, resolve_pragmas, current_pragmas
+from config import DATABASE_URL, DATABASE_PROFILE, SQLITE_PRAGMAS, SNAPSHOT_LOOKBACK_DAYS
+
+
+# Columnas añadidas después de la creación inicial de las tablas: create_all()
+# no modifica tablas existentes, así que init_db las añade con ALTER TABLE
+# (los índices nuevos de los modelos se crean igualmente en _migrate)
+COLUMN_MIGRATIONS = {
+    'players': {
+        'last_match_datetime': 'DATETIME',
+        'last_crawled': 'DATETIME',
+    },
+    'crawl_runs': {
+        'budget_used': 'INTEGER DEFAULT 0',
+    },
+}
+
+# Índices de los modelos para los patrones de consulta reales (filtros de
+# parche / región, crawl por región, índices cubrientes de compositions);
+# scripts/query_advisor.py --compare los quita y recrea para medirlos
+QUERY_INDEXES = (
+    'idx_player_region',
+    'idx_match_region_datetime',
+    'idx_match_patch_region',
+    'idx_participant_match_placement',
+    'idx_composition_signature_participant',
+    'idx_composition_participant_signature',
+)
+
+# Índices sustituidos por un índice de QUERY_INDEXES que empieza por la misma
+# columna: _migrate los borra de las bases de datos existentes
+SUPERSEDED_INDEXES = {
+    'ix_participants_match_id': ('participants', 'match_id'),
+    'ix_compositions_comp_signature': ('compositions', 'comp_signature'),
+}
+
+# Columnas de Player que necesitan los colectores para ordenar y recorrer el crawl
+CRAWL_PLAYER_COLUMNS = ('puuid', 'game_name', 'tier', 'lp', 'region', 'last_crawled', 'last_match_datetime')
 
 
 class DatabaseManager:
     """Gestor de base de datos para TFT Meta Tracker"""
     
-    def __init__(self, db_url: str = DATABASE_URL):
+    def __init__(self, db_url: str = DATABASE_URL, profile: Optional[str] = DATABASE_PROFILE):
+        self.profile = profile or 'default'
+        self.pragmas = resolve_pragmas(self.profile, SQLITE_PRAGMAS)
         self.engine = create_engine(db_url, echo=False)
+        install_pragmas(self.engine, lambda: self.pragmas)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self._dictionary_cache = {}  # {table: {name: id}} for committed unit/trait/item/augment rows
+    
+    def use_profile(self, profile: Optional[str]):
+        """
+        Switch the SQLite pragma profile (see database/sqlite_tuning.py)
+        
+        DATABASE_PROFILE, when set, wins over the profile the process asks for,
+        so `DATABASE_PROFILE=off` can always restore the SQLite defaults.
+        
+        Args:
+            profile: default, bulk_ingest, read_mostly or off
+        """
+        profile = DATABASE_PROFILE or profile or 'default'
+        self.pragmas = resolve_pragmas(profile, SQLITE_PRAGMAS)
+        self.profile = profile
+        # Pooled connections keep their pragmas: reconnect with the new ones
+        self.engine.dispose()
+    
+    def get_pragmas(self) -> Dict:
+        """Pragma values of a live connection (journal_mode, cache_size, ...)"""
+        names = ['journal_mode', 'synchronous', 'temp_store', 'cache_size', 'mmap_size', 'busy_timeout']
+        return current_pragmas(self.engine, names)
     
     def init_db(self):
         """Crear todas las tablas en la base de datos"""
+        existing_tables = set(inspect(self.engine).get_table_names())
         Base.metadata.create_all(self.engine)
+        self._migrate()
         print("✓ Base de datos inicializada correctamente")
+        
+        # Detail tables added to a database that already has compositions: fill them once
+        if 'compositions' in existing_tables and 'participant_units' not in existing_tables:
+            print("Backfilling unit/trait/augment tables from existing compositions...")
+            filled = self.backfill_participant_details()
+            print(f"✓ Backfilled details for {filled} participants")
+        
+        # Same for the running meta aggregates (one scan of the existing history)
+        if 'compositions' in existing_tables and 'meta_aggregates' not in existing_tables:
+            cells = self.rebuild_meta_aggregates()
+            print(f"✓ Built meta aggregates for {cells} composition/patch/region cells")
+        if 'compositions' in existing_tables and 'comp_detail_aggregates' not in existing_tables:
+            cells = self.rebuild_comp_detail_aggregates()
+            print(f"✓ Built composition detail aggregates ({cells} cells)")
+        if 'matches' in existing_tables and 'match_summaries' not in existing_tables:
+            cells = self.rebuild_match_summary()
+            print(f"✓ Built match summary ({cells} patch/region cells)")
+    
+    def _migrate(self):
+        """Add missing COLUMN_MIGRATIONS columns and model indexes to existing tables, drop SUPERSEDED_INDEXES"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table, columns in COLUMN_MIGRATIONS.items():
+                existing = {c['name'] for c in inspector.get_columns(table)}
+                for column, ddl in columns.items():
+                    if column not in existing:
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            
+            for table in Base.metadata.sorted_tables:
+                stored = {ix['name']: ix for ix in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    existing = stored.get(index.name)
+                    if existing is not None and (bool(existing['unique']) != bool(index.unique) or
+                                                 existing['column_names'] != [c.name for c in index.columns]):
+                        # Uniqueness or columns changed in the model (e.g. meta_stats.comp_signature): rebuild it
+                        index.drop(conn)
+                    index.create(conn, checkfirst=True)
+            
+            for name, (table, _) in SUPERSEDED_INDEXES.items():
+                if name in {ix['name'] for ix in inspector.get_indexes(table)}:
+                    conn.execute(text(f"DROP INDEX {name}"))
     
     def get_session(self) -> Session:
         """Obtener una sesión de base de datos"""
         return self.SessionLocal()
     
+    def _iter_keyset(self, model, filters: Sequence, keys: Sequence, columns: Optional[Sequence[str]] = None,
+                     descending: bool = False, batch_size: int = 1000, limit: Optional[int] = None) -> Iterator:
+        """
+        Stream rows of a model page by page with keyset pagination
+        
+        Each page is one indexed query (WHERE keys > last page's keys ORDER BY
+        keys LIMIT batch_size) in its own short session, so memory stays at one
+        page, the first rows arrive after one page, and no read transaction is
+        held open while the caller works.
+        
+        Args:
+            model: Mapped class
+            filters: WHERE conditions
+            keys: Unique ordering columns (e.g. [Match.game_datetime, Match.id])
+            columns: Column names to project (rows with attribute access); None = detached model objects
+            descending: Newest / largest keys first
+            batch_size: Rows per page
+            limit: Stop after this many rows (None = all)
+        """
+        key_names = [key.key for key in keys]
+        if columns:
+            names = list(columns) + [name for name in key_names if name not in columns]
+            query = select(*[getattr(model, name) for name in names])
+        else:
+            query = select(model)
+        query = query.where(*filters).order_by(*[desc(key) if descending else key for key in keys])
+        
+        last = None
+        produced = 0
+        while limit is None or produced < limit:
+            page_size = batch_size if limit is None else min(batch_size, limit - produced)
+            page = query
+            if last is not None:
+                cursor = keys[0] if len(keys) == 1 else tuple_(*keys)
+                after = last[0] if len(keys) == 1 else tuple_(*last)
+                page = page.where(cursor < after if descending else cursor > after)
+            
+            session = self.get_session()
+            try:
+                result = session.execute(page.limit(page_size))
+                rows = result.all() if columns else result.scalars().all()
+            finally:
+                session.close()
+            
+            yield from rows
+            produced += len(rows)
+            if len(rows) < page_size:
+                return
+            last = [getattr(rows[-1], name) for name in key_names]
+    
     # ========== PLAYER OPERATIONS ==========
     
     def add_player(self, puuid: str, game_name: str, tag_line: str, 
@@ -69,6 +228,112 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def upsert_players(self, players: List[Dict], chunk_size: int = 100) -> Dict[str, int]:
+        """
+        Insertar o actualizar una lista de jugadores de liga en una sola transacción
+        
+        Uses INSERT ... ON CONFLICT (puuid) DO UPDATE, and the update only
+        fires for rows whose tier, rank, LP or region changed. game_name and
+        tag_line are only written for new players.
+        
+        Args:
+            players: Dicts with puuid, game_name, tag_line, tier, rank, lp, region
+            chunk_size: Rows per statement (8 bound parameters each)
+        
+        Returns:
+            {'inserted': int, 'updated': int, 'unchanged': int}
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        # Last entry wins if a puuid appears twice
+        players = list({p['puuid']: p for p in players if p.get('puuid')}.values())
+        if not players:
+            return counts
+        
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            # No portable ON CONFLICT: fall back to one add_player per row
+            for p in players:
+                existing = self.get_player(p['puuid'])
+                self.add_player(**{k: p[k] for k in ('puuid', 'game_name', 'tag_line', 'tier',
+                                                     'rank', 'lp', 'region')})
+                if existing is None:
+                    counts['inserted'] += 1
+                elif (existing.tier, existing.rank, existing.lp, existing.region) != \
+                        (p['tier'], p['rank'], p['lp'], p['region']):
+                    counts['updated'] += 1
+                else:
+                    counts['unchanged'] += 1
+            return counts
+        
+        session = self.get_session()
+        try:
+            now = datetime.utcnow()
+            for i in range(0, len(players), chunk_size):
+                chunk = players[i:i + chunk_size]
+                
+                # Classify against the stored rows so the counts can be reported
+                current = {
+                    row.puuid: (row.tier, row.rank, row.lp, row.region)
+                    for row in session.execute(
+                        select(Player.puuid, Player.tier, Player.rank, Player.lp, Player.region)
+                        .where(Player.puuid.in_([p['puuid'] for p in chunk])))
+                }
+                for p in chunk:
+                    stored = current.get(p['puuid'])
+                    if stored is None:
+                        counts['inserted'] += 1
+                    elif stored != (p['tier'], p['rank'], p['lp'], p['region']):
+                        counts['updated'] += 1
+                    else:
+                        counts['unchanged'] += 1
+                
+                stmt = upsert_insert(Player.__table__).values([
+                    {
+                        'puuid': p['puuid'],
+                        'game_name': p['game_name'],
+                        'tag_line': p['tag_line'],
+                        'tier': p['tier'],
+                        'rank': p['rank'],
+                        'lp': p['lp'],
+                        'region': p['region'],
+                        'last_updated': now,
+                    }
+                    for p in chunk
+                ])
+                excluded = stmt.excluded
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Player.puuid],
+                    set_={
+                        'tier': excluded.tier,
+                        'rank': excluded.rank,
+                        'lp': excluded.lp,
+                        'region': excluded.region,
+                        'last_updated': excluded.last_updated,
+                    },
+                    # Unchanged rows are left alone (no write, last_updated kept)
+                    where=(Player.tier.is_distinct_from(excluded.tier)) |
+                          (Player.rank.is_distinct_from(excluded.rank)) |
+                          (Player.lp.is_distinct_from(excluded.lp)) |
+                          (Player.region.is_distinct_from(excluded.region))
+                )
+                session.execute(stmt)
+            
+            session.commit()
+            return counts
+        finally:
+            session.close()
+    
+    def _upsert_insert(self):
+        """insert() construct with on_conflict_do_update / do_nothing for this dialect, None if unsupported"""
+        dialect = self.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert_insert
+        else:
+            return None
+        return upsert_insert
+    
     def get_player(self, puuid: str) -> Optional[Player]:
         """Obtener un jugador por PUUID"""
         session = self.get_session()
@@ -79,12 +344,112 @@ class DatabaseManager:
     
     def get_all_players(self, region: Optional[str] = None) -> List[Player]:
         """Obtener todos los jugadores, opcionalmente filtrados por región"""
+        return list(self.iter_players(region=region))
+    
+    def iter_players(self, region: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+                     batch_size: int = 1000) -> Iterator:
+        """
+        Stream players in id order, one page at a time
+        
+        Args:
+            region: Only this region (None = all)
+            columns: Player columns to read, e.g. CRAWL_PLAYER_COLUMNS (None = Player objects)
+            batch_size: Players per page
+        """
+        filters = [Player.region == region] if region else []
+        return self._iter_keyset(Player, filters, [Player.id], columns=columns, batch_size=batch_size)
+    
+    def update_high_water_marks(self, puuids: Iterable[str], crawled_at: Optional[datetime] = None,
+                                chunk_size: int = 500) -> int:
+        """
+        Set each player's last_match_datetime to their newest stored match,
+        with one correlated UPDATE per chunk of players. crawled_at (if given)
+        is stored as last_crawled.
+        """
+        puuids = list(puuids)
+        updated = 0
         session = self.get_session()
         try:
-            query = session.query(Player)
-            if region:
-                query = query.filter_by(region=region)
-            return query.all()
+            newest = session.query(func.max(Match.game_datetime))\
+                            .join(Participant, Participant.match_id == Match.id)\
+                            .filter(Participant.puuid == Player.puuid)\
+                            .correlate(Player)\
+                            .scalar_subquery()
+            values = {Player.last_match_datetime: func.coalesce(newest, Player.last_match_datetime)}
+            if crawled_at:
+                values[Player.last_crawled] = crawled_at
+            
+            for i in range(0, len(puuids), chunk_size):
+                chunk = puuids[i:i + chunk_size]
+                updated += session.query(Player)\
+                                  .filter(Player.puuid.in_(chunk))\
+                                  .update(values, synchronize_session=False)
+            session.commit()
+            return updated
+        finally:
+            session.close()
+    
+    def add_league_snapshots(self, region: str, entries: List[Dict]) -> int:
+        """Insert one LeagueSnapshot per league entry (with a puuid) in a single transaction, return rows inserted"""
+        session = self.get_session()
+        try:
+            captured_at = datetime.utcnow()
+            rows = [
+                {
+                    'puuid': entry['puuid'],
+                    'region': region,
+                    'tier': entry.get('tier'),
+                    'rank': entry.get('rank'),
+                    'lp': entry.get('lp', 0),
+                    'wins': entry.get('wins', 0),
+                    'losses': entry.get('losses', 0),
+                    'captured_at': captured_at,
+                }
+                for entry in entries if entry.get('puuid')
+            ]
+            session.bulk_insert_mappings(LeagueSnapshot, rows)
+            session.commit()
+            return len(rows)
+        finally:
+            session.close()
+    
+    def get_league_snapshots(self, puuids: Iterable[str], since: datetime,
+                             chunk_size: int = 500) -> Dict[str, List[LeagueSnapshot]]:
+        """League snapshots per player since a date, oldest first"""
+        puuids = list(puuids)
+        snapshots: Dict[str, List[LeagueSnapshot]] = {}
+        session = self.get_session()
+        try:
+            for i in range(0, len(puuids), chunk_size):
+                chunk = puuids[i:i + chunk_size]
+                rows = session.query(LeagueSnapshot)\
+                              .filter(LeagueSnapshot.puuid.in_(chunk),
+                                      LeagueSnapshot.captured_at >= since)\
+                              .order_by(LeagueSnapshot.captured_at)\
+                              .all()
+                for row in rows:
+                    snapshots.setdefault(row.puuid, []).append(row)
+            return snapshots
+        finally:
+            session.close()
+    
+    def get_recent_game_counts(self, puuids: Iterable[str], since: datetime,
+                               chunk_size: int = 500) -> Dict[str, int]:
+        """Stored games per player since a date, with one grouped query per chunk"""
+        puuids = list(puuids)
+        counts: Dict[str, int] = {}
+        session = self.get_session()
+        try:
+            for i in range(0, len(puuids), chunk_size):
+                chunk = puuids[i:i + chunk_size]
+                rows = session.query(Participant.puuid, func.count(Participant.id))\
+                              .join(Match, Participant.match_id == Match.id)\
+                              .filter(Participant.puuid.in_(chunk),
+                                      Match.game_datetime >= since)\
+                              .group_by(Participant.puuid)\
+                              .all()
+                counts.update({puuid: count for puuid, count in rows})
+            return counts
         finally:
             session.close()
     
@@ -99,62 +464,308 @@ class DatabaseManager:
             if existing:
                 return existing  # Already in database
             
-            # Convert timestamp to datetime
-            game_datetime = datetime.fromtimestamp(match_data['game_datetime'] / 1000)
+            self._bulk_insert_matches(session, [match_data])
+            session.commit()
+            return session.query(Match).filter_by(match_id=match_data['match_id']).first()
+        except Exception as e:
+            session.rollback()
+            print(f"Error adding match: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def add_matches(self, matches: List[Dict], chunk_size: int = 500) -> Optional[List[str]]:
+        """
+        Añadir varias partidas en una sola transacción con inserts por lotes
+        
+        Args:
+            matches: Match dicts as built by build_match_data
+            chunk_size: IDs per IN query
+        
+        Returns:
+            match_ids stored by this call (matches already in the database are
+            skipped), or None if the transaction failed and was rolled back
+        """
+        session = self.get_session()
+        try:
+            match_ids = [m['match_id'] for m in matches]
+            seen = set()
+            for i in range(0, len(match_ids), chunk_size):
+                chunk = match_ids[i:i + chunk_size]
+                seen.update(session.scalars(select(Match.match_id).where(Match.match_id.in_(chunk))))
             
-            # Create match
-            match = Match(
-                match_id=match_data['match_id'],
-                game_datetime=game_datetime,
-                game_length=match_data.get('game_length', 0),
-                tft_set_number=match_data.get('tft_set_number', 0),
-                patch=match_data.get('patch', 'unknown'),
-                region=match_data.get('region', 'unknown')
-            )
-            session.add(match)
-            session.flush()  # Get match.id
-            
-            # Add participants and compositions
-            for p_data in match_data.get('participants', []):
-                # Get or find player
-                player = session.query(Player).filter_by(puuid=p_data['puuid']).first()
-                
-                participant = Participant(
-                    match_id=match.id,
-                    player_id=player.id if player else None,
-                    puuid=p_data['puuid'],
-                    placement=p_data['placement'],
-                    level=p_data.get('level', 0),
-                    gold_left=p_data.get('gold_left', 0),
-                    total_damage_to_players=p_data.get('total_damage_to_players', 0),
-                    players_eliminated=p_data.get('players_eliminated', 0),
-                    time_eliminated=p_data.get('time_eliminated', 0.0)
-                )
-                session.add(participant)
-                session.flush()  # Get participant.id
-                
-                # Add composition
-                comp_signature = self._generate_comp_signature(p_data.get('traits', []))
-                
-                composition = Composition(
-                    participant_id=participant.id,
-                    traits=p_data.get('traits', []),
-                    units=p_data.get('units', []),
-                    augments=p_data.get('augments', []),
-                    comp_signature=comp_signature
-                )
-                session.add(composition)
+            new_matches = []
+            for match_data in matches:
+                if match_data['match_id'] not in seen:
+                    seen.add(match_data['match_id'])
+                    new_matches.append(match_data)
             
+            self._bulk_insert_matches(session, new_matches, chunk_size)
             session.commit()
-            session.refresh(match)
-            return match
+            return [m['match_id'] for m in new_matches]
         except Exception as e:
             session.rollback()
-            print(f"Error adding match: {e}")
+            print(f"Error adding {len(matches)} matches: {e}")
             return None
         finally:
             session.close()
     
+    def _bulk_insert_matches(self, session: Session, matches: List[Dict], chunk_size: int = 500):
+        """
+        Insert new matches with their participants and compositions using one
+        Core executemany INSERT per table, skipping the ORM unit of work (caller
+        checks duplicates and commits).
+        Generated ids are read back with indexed IN queries, which works on
+        every backend (no RETURNING needed).
+        """
+        if not matches:
+            return
+        
+        # puuid -> player_id for tracked players, instead of one lookup per participant
+        puuids = list({p['puuid'] for m in matches for p in m.get('participants', [])})
+        player_ids = {}
+        for i in range(0, len(puuids), chunk_size):
+            chunk = puuids[i:i + chunk_size]
+            player_ids.update(session.execute(
+                select(Player.puuid, Player.id).where(Player.puuid.in_(chunk))).all())
+        
+        session.execute(insert(Match.__table__), [
+            {
+                'match_id': m['match_id'],
+                'game_datetime': datetime.fromtimestamp(m['game_datetime'] / 1000),
+                'game_length': m.get('game_length', 0),
+                'tft_set_number': m.get('tft_set_number', 0),
+                'patch': m.get('patch', 'unknown'),
+                'region': m.get('region', 'unknown'),
+            }
+            for m in matches
+        ])
+        
+        match_ids = [m['match_id'] for m in matches]
+        match_pks = {}
+        for i in range(0, len(match_ids), chunk_size):
+            chunk = match_ids[i:i + chunk_size]
+            match_pks.update(session.execute(
+                select(Match.match_id, Match.id).where(Match.match_id.in_(chunk))).all())
+        
+        summary = {}
+        for m in matches:
+            self._add_summary_delta(summary, m.get('patch', 'unknown'), m.get('region', 'unknown'), 1,
+                                    len(m.get('participants', [])), datetime.fromtimestamp(m['game_datetime'] / 1000))
+        self._apply_match_summary_deltas(session, summary)
+        
+        participants = [
+            {
+                'match_id': match_pks[m['match_id']],
+                'player_id': player_ids.get(p['puuid']),
+                'puuid': p['puuid'],
+                'placement': p['placement'],
+                'level': p.get('level', 0),
+                'gold_left': p.get('gold_left', 0),
+                'total_damage_to_players': p.get('total_damage_to_players', 0),
+                'players_eliminated': p.get('players_eliminated', 0),
+                'time_eliminated': p.get('time_eliminated', 0.0),
+            }
+            for m in matches for p in m.get('participants', [])
+        ]
+        if not participants:
+            return
+        session.execute(insert(Participant.__table__), participants)
+        
+        pks = list(match_pks.values())
+        participant_pks = {}
+        for i in range(0, len(pks), chunk_size):
+            chunk = pks[i:i + chunk_size]
+            for pk, match_pk, puuid in session.execute(
+                    select(Participant.id, Participant.match_id, Participant.puuid)
+                    .where(Participant.match_id.in_(chunk))):
+                participant_pks[(match_pk, puuid)] = pk
+        
+        boards = [
+            (participant_pks[(match_pks[m['match_id']], p['puuid'])], p)
+            for m in matches for p in m.get('participants', [])
+        ]
+        compositions = [
+            {
+                'participant_id': participant_id,
+                'traits': p.get('traits', []),
+                'units': p.get('units', []),
+                'augments': p.get('augments', []),
+                'comp_signature': self._generate_comp_signature(p.get('traits', [])),
+            }
+            for participant_id, p in boards
+        ]
+        session.execute(insert(Composition.__table__), compositions)
+        unit_rows, augment_rows = self._insert_participant_details(session, boards, chunk_size)
+        
+        # Running meta and composition detail aggregates, committed together with the matches
+        deltas = {}
+        cells = {}
+        for m in matches:
+            match_pk = match_pks[m['match_id']]
+            for p in m.get('participants', []):
+                cell = (self._generate_comp_signature(p.get('traits', [])),
+                        m.get('patch', 'unknown'), m.get('region', 'unknown'), p['placement'])
+                self._add_meta_delta(deltas, *cell)
+                cells[participant_pks[(match_pk, p['puuid'])]] = cell
+        self._apply_meta_deltas(session, deltas)
+        
+        details = {}
+        for participant_id, (comp_sig, patch, region, placement) in cells.items():
+            self._add_detail_delta(details, comp_sig, 'placement', placement, patch, region, placement)
+        for kind, rows in (('unit', unit_rows), ('augment', augment_rows)):
+            for participant_id, key_id in rows:
+                comp_sig, patch, region, placement = cells[participant_id]
+                self._add_detail_delta(details, comp_sig, kind, key_id, patch, region, placement)
+        self._apply_comp_detail_deltas(session, details)
+    
+    def _insert_participant_details(self, session: Session, boards: List, chunk_size: int = 500):
+        """
+        Insert the normalized participant_units / participant_traits /
+        participant_augments rows of some boards (caller commits)
+        
+        Args:
+            session: Open session
+            boards: (participant_id, dict with units, traits and augments) pairs
+            chunk_size: Names per IN query when resolving dictionary ids
+        
+        Returns:
+            ([(participant_id, unit_id)], [(participant_id, augment_id)]) of the inserted rows
+        """
+        units, traits, augments = [], [], []
+        for participant_id, board in boards:
+            for unit in board.get('units') or []:
+                if isinstance(unit, dict) and unit.get('character_id'):
+                    units.append((participant_id, unit))
+            for trait in board.get('traits') or []:
+                if isinstance(trait, dict) and trait.get('name'):
+                    traits.append((participant_id, trait))
+            for slot, augment in enumerate(board.get('augments') or []):
+                if augment:
+                    augments.append((participant_id, slot, augment))
+        
+        unit_ids = self._dictionary_ids(session, Unit, {u['character_id'] for _, u in units}, chunk_size)
+        item_ids = self._dictionary_ids(session, Item, {i for _, u in units for i in (u.get('items') or [])[:3] if i},
+                                        chunk_size)
+        trait_ids = self._dictionary_ids(session, Trait, {t['name'] for _, t in traits}, chunk_size)
+        augment_ids = self._dictionary_ids(session, Augment, {a for _, _, a in augments}, chunk_size)
+        
+        if units:
+            rows = []
+            for participant_id, unit in units:
+                items = [item_ids[i] for i in (unit.get('items') or [])[:3] if i] + [None, None, None]
+                rows.append({
+                    'participant_id': participant_id,
+                    'unit_id': unit_ids[unit['character_id']],
+                    'star_level': unit.get('tier'),
+                    'item_1_id': items[0],
+                    'item_2_id': items[1],
+                    'item_3_id': items[2],
+                })
+            session.execute(insert(ParticipantUnit.__table__), rows)
+        if traits:
+            session.execute(insert(ParticipantTrait.__table__), [
+                {
+                    'participant_id': participant_id,
+                    'trait_id': trait_ids[trait['name']],
+                    'num_units': trait.get('num_units'),
+                    'tier_current': trait.get('tier_current'),
+                    'tier_total': trait.get('tier_total'),
+                    'style': trait.get('style'),
+                }
+                for participant_id, trait in traits
+            ])
+        if augments:
+            session.execute(insert(ParticipantAugment.__table__), [
+                {'participant_id': participant_id, 'augment_id': augment_ids[augment], 'slot': slot}
+                for participant_id, slot, augment in augments
+            ])
+        
+        return ([(participant_id, unit_ids[unit['character_id']]) for participant_id, unit in units],
+                [(participant_id, augment_ids[augment]) for participant_id, _, augment in augments])
+    
+    def _dictionary_ids(self, session: Session, model, names: Set[str], chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Map names to dictionary ids (Unit, Trait, Item, Augment), inserting the unknown ones
+        
+        Only ids read from committed rows are cached: ids inserted here belong to
+        a transaction that may still roll back, so they are looked up again next time.
+        """
+        cache = self._dictionary_cache.setdefault(model.__tablename__, {})
+        ids = {name: cache[name] for name in names if name in cache}
+        missing = [name for name in names if name not in ids]
+        for i in range(0, len(missing), chunk_size):
+            found = dict(session.execute(
+                select(model.name, model.id).where(model.name.in_(missing[i:i + chunk_size]))).all())
+            ids.update(found)
+            cache.update(found)
+        
+        new = [name for name in missing if name not in ids]
+        if new:
+            # Another writer (parallel collectors, a replay) may add the same names
+            # concurrently: keep its row and read the id back instead of failing the batch
+            upsert_insert = self._upsert_insert()
+            if upsert_insert is None:
+                stmt = insert(model.__table__)
+            else:
+                stmt = upsert_insert(model.__table__).on_conflict_do_nothing(index_elements=['name'])
+            session.execute(stmt, [{'name': name} for name in new])
+            for i in range(0, len(new), chunk_size):
+                ids.update(session.execute(
+                    select(model.name, model.id).where(model.name.in_(new[i:i + chunk_size]))).all())
+        return ids
+    
+    def backfill_participant_details(self, batch_size: int = 500) -> int:
+        """
+        Fill the normalized unit/trait/augment tables from Composition JSON
+        
+        Walks compositions in id order and commits every batch, so it can be
+        interrupted and run again: participants that already have detail rows
+        are skipped. Run rebuild_comp_detail_aggregates afterwards so the
+        composition details include the backfilled boards.
+        
+        Args:
+            batch_size: Compositions per transaction
+        
+        Returns:
+            Number of participants whose details were inserted
+        """
+        filled = 0
+        last_id = 0
+        session = self.get_session()
+        try:
+            while True:
+                rows = session.execute(
+                    select(Composition.id, Composition.participant_id, Composition.traits,
+                           Composition.units, Composition.augments)
+                    .where(Composition.id > last_id)
+                    .order_by(Composition.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                
+                participant_ids = [row.participant_id for row in rows]
+                done = set()
+                for model in (ParticipantUnit, ParticipantTrait, ParticipantAugment):
+                    done.update(session.scalars(
+                        select(model.participant_id).where(model.participant_id.in_(participant_ids))))
+                
+                boards = [
+                    (row.participant_id, {'traits': row.traits, 'units': row.units, 'augments': row.augments})
+                    for row in rows if row.participant_id not in done
+                ]
+                self._insert_participant_details(session, boards)
+                session.commit()
+                filled += len(boards)
+            return filled
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def match_exists(self, match_id: str) -> bool:
         """Check if a match already exists in the database"""
         session = self.get_session()
@@ -163,22 +774,211 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_existing_match_ids(self, match_ids: Iterable[str], chunk_size: int = 500) -> Set[str]:
+        """
+        Return the subset of match_ids already stored, using set-based IN queries
+        (chunked to stay under SQLite's bound-parameter limit)
+        """
+        match_ids = list(match_ids)
+        existing = set()
+        session = self.get_session()
+        try:
+            for i in range(0, len(match_ids), chunk_size):
+                chunk = match_ids[i:i + chunk_size]
+                rows = session.query(Match.match_id).filter(Match.match_id.in_(chunk)).all()
+                existing.update(row[0] for row in rows)
+            return existing
+        finally:
+            session.close()
+    
     def get_recent_matches(self, limit: int = 100, region: Optional[str] = None) -> List[Match]:
         """Obtener las partidas más recientes"""
+        return list(self.iter_recent_matches(region=region, limit=limit))
+    
+    def iter_recent_matches(self, region: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+                            limit: Optional[int] = None, batch_size: int = 1000) -> Iterator:
+        """
+        Stream matches newest first (keyset on game_datetime, id)
+        
+        Args:
+            region: Only this region (None = all)
+            columns: Match columns to read (None = Match objects)
+            limit: Stop after this many matches (None = the whole history)
+            batch_size: Matches per page
+        """
+        filters = [Match.region == region] if region else []
+        return self._iter_keyset(Match, filters, [Match.game_datetime, Match.id], columns=columns,
+                                 descending=True, batch_size=batch_size, limit=limit)
+    
+    def get_match_count(self, patch: Optional[str] = None, region: Optional[str] = None) -> int:
+        """Get number of matches in database (optionally of one patch / region), from match_summaries"""
+        return self.get_match_summary(patch, region)['matches']
+    
+    def get_match_summary(self, patch: Optional[str] = None, region: Optional[str] = None) -> Dict:
+        """
+        Stored matches and compositions and the oldest / newest match
+        
+        Reads match_summaries (one row per patch and region, kept by the
+        ingest and retention transactions), so the cost does not grow with
+        the number of matches.
+        
+        Args:
+            patch: Only this patch (None = all)
+            region: Only this region (None = all)
+        
+        Returns:
+            {'matches', 'compositions', 'oldest_match', 'newest_match'}
+        """
+        session = self.get_session()
+        try:
+            query = select(
+                func.coalesce(func.sum(MatchSummary.match_count), 0),
+                func.coalesce(func.sum(MatchSummary.composition_count), 0),
+                func.min(MatchSummary.oldest_match),
+                func.max(MatchSummary.newest_match),
+            )
+            if patch:
+                query = query.where(MatchSummary.patch == patch)
+            if region:
+                query = query.where(MatchSummary.region == region)
+            matches, compositions, oldest, newest = session.execute(query).one()
+            return {
+                'matches': matches,
+                'compositions': compositions,
+                'oldest_match': oldest,
+                'newest_match': newest,
+            }
+        finally:
+            session.close()
+    
+    def get_patch_match_counts(self, region: Optional[str] = None) -> Dict[str, int]:
+        """{patch: stored matches}, most recently played patch first (from match_summaries)"""
         session = self.get_session()
         try:
-            query = session.query(Match).order_by(desc(Match.game_datetime))
+            query = select(MatchSummary.patch, func.sum(MatchSummary.match_count))\
+                .group_by(MatchSummary.patch)\
+                .order_by(desc(func.max(MatchSummary.newest_match)), MatchSummary.patch)
             if region:
-                query = query.filter_by(region=region)
-            return query.limit(limit).all()
+                query = query.where(MatchSummary.region == region)
+            return dict(session.execute(query).all())
         finally:
             session.close()
     
-    def get_match_count(self) -> int:
-        """Get total number of matches in database"""
+    @staticmethod
+    def _add_summary_delta(deltas: Dict, patch: str, region: str, matches: int, compositions: int,
+                           game_datetime: Optional[datetime] = None):
+        """Accumulate matches into {(patch, region): [matches, compositions, oldest, newest]}"""
+        delta = deltas.setdefault((patch or 'unknown', region or 'unknown'), [0, 0, None, None])
+        delta[0] += matches
+        delta[1] += compositions
+        if game_datetime is not None:
+            delta[2] = game_datetime if delta[2] is None else min(delta[2], game_datetime)
+            delta[3] = game_datetime if delta[3] is None else max(delta[3], game_datetime)
+    
+    def _match_summary_scan(self, session: Session, *filters) -> Dict:
+        """Summary deltas of the stored matches (one GROUP BY for matches, one for compositions)"""
+        deltas = {}
+        for patch, region, matches, oldest, newest in session.execute(
+                select(Match.patch, Match.region, func.count(),
+                       func.min(Match.game_datetime), func.max(Match.game_datetime))
+                .where(*filters).group_by(Match.patch, Match.region)):
+            self._add_summary_delta(deltas, patch, region, matches, 0, oldest)
+            self._add_summary_delta(deltas, patch, region, 0, 0, newest)
+        for patch, region, compositions in session.execute(
+                select(Match.patch, Match.region, func.count())
+                .select_from(Composition)
+                .join(Participant, Participant.id == Composition.participant_id)
+                .join(Match, Match.id == Participant.match_id)
+                .where(*filters).group_by(Match.patch, Match.region)):
+            self._add_summary_delta(deltas, patch, region, 0, compositions)
+        return deltas
+    
+    def _apply_match_summary_deltas(self, session: Session, deltas: Dict, sign: int = 1):
+        """
+        Add (sign=-1: subtract) summary deltas to match_summaries (caller commits)
+        
+        Oldest / newest only ever widen here; after deleting matches call
+        _refresh_match_summary_dates for the cells.
+        """
+        if not deltas:
+            return
+        values = [
+            {
+                'patch': patch,
+                'region': region,
+                'match_count': sign * matches,
+                'composition_count': sign * compositions,
+                'oldest_match': oldest if sign > 0 else None,
+                'newest_match': newest if sign > 0 else None,
+            }
+            for (patch, region), (matches, compositions, oldest, newest) in deltas.items()
+        ]
+        
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            for v in values:
+                cell = session.query(MatchSummary).filter_by(patch=v['patch'], region=v['region']).first()
+                if cell is None:
+                    session.add(MatchSummary(**v))
+                    continue
+                cell.match_count += v['match_count']
+                cell.composition_count += v['composition_count']
+                if v['oldest_match'] is not None:
+                    cell.oldest_match = min(filter(None, (cell.oldest_match, v['oldest_match'])))
+                    cell.newest_match = max(filter(None, (cell.newest_match, v['newest_match'])))
+            session.flush()
+            return
+        
+        stmt = upsert_insert(MatchSummary.__table__)
+        excluded = stmt.excluded
+        table = MatchSummary.__table__.c
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.patch, table.region],
+            set_={
+                'match_count': table.match_count + excluded.match_count,
+                'composition_count': table.composition_count + excluded.composition_count,
+                # NULL on either side keeps the other one
+                'oldest_match': case((excluded.oldest_match < table.oldest_match, excluded.oldest_match),
+                                     else_=func.coalesce(table.oldest_match, excluded.oldest_match)),
+                'newest_match': case((excluded.newest_match > table.newest_match, excluded.newest_match),
+                                     else_=func.coalesce(table.newest_match, excluded.newest_match)),
+            }
+        ), values)
+    
+    def _refresh_match_summary_dates(self, session: Session, cells: Iterable):
+        """
+        Re-read oldest / newest of some (patch, region) cells after matches
+        were deleted, and drop the cells left empty (caller commits)
+        """
+        for patch, region in cells:
+            in_cell = (Match.patch == patch, Match.region == region)
+            # Separate MIN and MAX subqueries: each one is a single idx_match_patch_region seek
+            oldest, newest = session.execute(select(
+                select(func.min(Match.game_datetime)).where(*in_cell).scalar_subquery(),
+                select(func.max(Match.game_datetime)).where(*in_cell).scalar_subquery(),
+            )).one()
+            session.query(MatchSummary).filter_by(patch=patch, region=region)\
+                   .update({MatchSummary.oldest_match: oldest, MatchSummary.newest_match: newest},
+                           synchronize_session=False)
+        session.query(MatchSummary).filter(MatchSummary.match_count <= 0).delete(synchronize_session=False)
+    
+    def rebuild_match_summary(self) -> int:
+        """
+        Rebuild match_summaries from the stored matches (one scan)
+        
+        Returns:
+            Number of patch/region cells
+        """
         session = self.get_session()
         try:
-            return session.query(Match).count()
+            deltas = self._match_summary_scan(session)
+            session.query(MatchSummary).delete(synchronize_session=False)
+            self._apply_match_summary_deltas(session, deltas)
+            session.commit()
+            return len(deltas)
+        except Exception:
+            session.rollback()
+            raise
         finally:
             session.close()
     
@@ -220,96 +1020,566 @@ class DatabaseManager:
     
     def get_compositions_by_signature(self, comp_signature: str) -> List[Composition]:
         """Get all compositions matching a signature"""
+        return list(self.iter_compositions_by_signature(comp_signature))
+    
+    def iter_compositions_by_signature(self, comp_signature: str, columns: Optional[Sequence[str]] = None,
+                                       batch_size: int = 1000) -> Iterator:
+        """
+        Stream the compositions of a signature in id order
+        
+        Args:
+            comp_signature: Composition signature
+            columns: Composition columns to read, e.g. ('participant_id', 'units') (None = Composition objects)
+            batch_size: Compositions per page
+        """
+        return self._iter_keyset(Composition, [Composition.comp_signature == comp_signature], [Composition.id],
+                                 columns=columns, batch_size=batch_size)
+    
+    def _board_stats_query(self, source, name_col, participant_col, comp_signature: Optional[str],
+                           patch: Optional[str], region: Optional[str]):
+        """
+        Placement stats grouped by name_col over the rows of source (a detail
+        table joined to its dictionary; participant_col is its participant id),
+        with optional signature / patch / region filters
+        """
+        query = select(
+            name_col.label('name'),
+            func.count().label('games'),
+            func.sum(Participant.placement).label('placement_sum'),
+            func.sum(func.cast(Participant.placement <= 4, Integer)).label('top4_count'),
+            func.sum(func.cast(Participant.placement == 1, Integer)).label('top1_count'),
+        ).select_from(source).join(Participant, Participant.id == participant_col)
+        
+        if comp_signature:
+            query = query.join(Composition, Composition.participant_id == participant_col)\
+                         .where(Composition.comp_signature == comp_signature)
+        if patch or region:
+            query = query.join(Match, Match.id == Participant.match_id)
+            if patch:
+                query = query.where(Match.patch == patch)
+            if region:
+                query = query.where(Match.region == region)
+        return query.group_by(name_col)
+    
+    def _run_board_stats(self, query, limit: int) -> List[Dict]:
         session = self.get_session()
         try:
-            return session.query(Composition).filter_by(comp_signature=comp_signature).all()
+            # Ties broken by name and averages taken from integer sums, so other engines match exactly
+            rows = session.execute(query.order_by(desc('games'), 'name').limit(limit)).all()
+            return [
+                {
+                    'name': row.name,
+                    'games': row.games,
+                    'avg_placement': row.placement_sum / row.games if row.games else 0,
+                    'top4_rate': row.top4_count / row.games if row.games else 0,
+                    'top1_rate': row.top1_count / row.games if row.games else 0,
+                }
+                for row in rows
+            ]
         finally:
             session.close()
     
-    # ========== META STATS OPERATIONS ==========
+    def get_unit_stats(self, comp_signature: Optional[str] = None, patch: Optional[str] = None,
+                       region: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        Most played units with their placement stats (from participant_units)
+        
+        Returns:
+            Dicts with name, games, avg_placement, top4_rate, top1_rate
+        """
+        source = ParticipantUnit.__table__.join(Unit.__table__, Unit.id == ParticipantUnit.unit_id)
+        query = self._board_stats_query(source, Unit.name, ParticipantUnit.participant_id,
+                                        comp_signature, patch, region)
+        return self._run_board_stats(query, limit)
     
-    def calculate_meta_stats(self, min_games: int = 50, patch: Optional[str] = None, 
-                            region: Optional[str] = None) -> List[MetaStat]:
+    def get_item_stats(self, unit: Optional[str] = None, comp_signature: Optional[str] = None,
+                       patch: Optional[str] = None, region: Optional[str] = None,
+                       limit: int = 20) -> List[Dict]:
         """
-        Calculate meta statistics for all compositions
-        Groups by comp_signature and calculates aggregate stats
+        Most built items with their placement stats
+        
+        Args:
+            unit: Only items on this character_id (None = any unit)
+        
+        Returns:
+            Dicts with name, games (items built), avg_placement, top4_rate, top1_rate
+        """
+        slots = []
+        for item_col in (ParticipantUnit.item_1_id, ParticipantUnit.item_2_id, ParticipantUnit.item_3_id):
+            slot = select(ParticipantUnit.participant_id, ParticipantUnit.unit_id, item_col.label('item_id'))\
+                .where(item_col.isnot(None))
+            if unit:
+                slot = slot.join(Unit, Unit.id == ParticipantUnit.unit_id).where(Unit.name == unit)
+            slots.append(slot)
+        built = union_all(*slots).subquery()
+        source = built.join(Item.__table__, Item.id == built.c.item_id)
+        query = self._board_stats_query(source, Item.name, built.c.participant_id,
+                                        comp_signature, patch, region)
+        return self._run_board_stats(query, limit)
+    
+    def get_augment_stats(self, comp_signature: Optional[str] = None, patch: Optional[str] = None,
+                          region: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        Most picked augments with their placement stats (from participant_augments)
+        
+        Returns:
+            Dicts with name, games, avg_placement, top4_rate, top1_rate
+        """
+        source = ParticipantAugment.__table__.join(Augment.__table__,
+                                                   Augment.id == ParticipantAugment.augment_id)
+        query = self._board_stats_query(source, Augment.name, ParticipantAugment.participant_id,
+                                        comp_signature, patch, region)
+        return self._run_board_stats(query, limit)
+    
+    def get_comp_breakdown(self, comp_signature: str, patch: Optional[str] = None,
+                           region: Optional[str] = None) -> Dict:
+        """
+        Placement distribution and unit / augment stats of one composition
+        
+        Read from comp_detail_aggregates (kept up to date at ingest), so the
+        cost depends on the number of distinct units and augments, not on how
+        many games the composition has. Unit and augment stats are the same
+        as get_unit_stats / get_augment_stats with comp_signature.
+        
+        Returns:
+            {'placements': {placement: boards}, 'units': [...], 'augments': [...]}
+            (stats dicts with name, games, avg_placement, top4_rate, top1_rate, most games first)
         """
         session = self.get_session()
         try:
-            # Build query
-            query = session.query(
-                Composition.comp_signature,
-                func.count(Composition.id).label('play_count'),
-                func.avg(Participant.placement).label('avg_placement'),
-                func.sum(func.cast(Participant.placement <= 4, Integer)).label('top4_count'),
-                func.sum(func.cast(Participant.placement == 1, Integer)).label('top1_count')
-            ).join(Participant).join(Match)
-            
-            # Apply filters
+            query = select(
+                CompDetailAggregate.kind,
+                CompDetailAggregate.key_id,
+                func.sum(CompDetailAggregate.play_count),
+                func.sum(CompDetailAggregate.placement_sum),
+                func.sum(CompDetailAggregate.top4_count),
+                func.sum(CompDetailAggregate.top1_count),
+            ).where(CompDetailAggregate.comp_signature == comp_signature,
+                    CompDetailAggregate.play_count > 0)
             if patch:
-                query = query.filter(Match.patch == patch)
+                query = query.where(CompDetailAggregate.patch == patch)
             if region:
-                query = query.filter(Match.region == region)
+                query = query.where(CompDetailAggregate.region == region)
+            rows = session.execute(query.group_by(CompDetailAggregate.kind, CompDetailAggregate.key_id)).all()
             
-            # Group and filter
-            query = query.group_by(Composition.comp_signature)\
-                         .having(func.count(Composition.id) >= min_games)
+            breakdown = {'placements': {}, 'units': [], 'augments': []}
+            names = {}
+            for kind, model in (('unit', Unit), ('augment', Augment)):
+                ids = [key_id for row_kind, key_id, *_ in rows if row_kind == kind]
+                names[kind] = dict(session.execute(select(model.id, model.name).where(model.id.in_(ids))).all()) \
+                    if ids else {}
             
-            results = query.all()
-            
-            # Create or update MetaStat entries
-            meta_stats = []
-            for row in results:
-                comp_sig, play_count, avg_place, top4_count, top1_count = row
-                
-                if comp_sig == "unknown":
+            for kind, key_id, games, placement_sum, top4_count, top1_count in rows:
+                if kind == 'placement':
+                    breakdown['placements'][key_id] = games
                     continue
-                
-                top4_rate = (top4_count / play_count) if play_count > 0 else 0
-                top1_rate = (top1_count / play_count) if play_count > 0 else 0
-                
-                # Get or create meta stat
-                meta_stat = session.query(MetaStat).filter_by(
-                    comp_signature=comp_sig,
-                    patch=patch or "all",
-                    region=region or "ALL"
-                ).first()
-                
-                if not meta_stat:
-                    meta_stat = MetaStat(
-                        comp_signature=comp_sig,
-                        patch=patch or "all",
-                        region=region or "ALL"
-                    )
-                    session.add(meta_stat)
-                
-                # Update stats
-                meta_stat.play_count = play_count
-                meta_stat.avg_placement = avg_place
-                meta_stat.top4_rate = top4_rate
-                meta_stat.top1_rate = top1_rate
-                meta_stat.last_calculated = datetime.utcnow()
-                
-                meta_stats.append(meta_stat)
+                breakdown[kind + 's'].append({
+                    'name': names[kind].get(key_id),
+                    'games': games,
+                    'avg_placement': placement_sum / games,
+                    'top4_rate': top4_count / games,
+                    'top1_rate': top1_count / games,
+                })
+            breakdown['placements'] = dict(sorted(breakdown['placements'].items()))
+            for kind in ('units', 'augments'):
+                breakdown[kind].sort(key=lambda stat: (-stat['games'], stat['name']))
+            return breakdown
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _add_detail_delta(deltas: Dict, comp_sig: str, kind: str, key_id: int, patch: str, region: str,
+                          placement: int, games: int = 1):
+        """Accumulate boards into {(signature, kind, key_id, patch, region): [games, placement sum, top4, top1]}"""
+        delta = deltas.setdefault((comp_sig or 'unknown', kind, key_id, patch or 'unknown', region or 'unknown'),
+                                  [0, 0, 0, 0])
+        delta[0] += games
+        delta[1] += games * placement
+        delta[2] += games * (placement <= 4)
+        delta[3] += games * (placement == 1)
+    
+    def _comp_detail_scan(self, session: Session, *filters) -> Dict:
+        """Composition detail deltas of the stored games (one GROUP BY each for placements, units and augments)"""
+        sources = (
+            ('placement', Participant.placement, Composition.participant_id),
+            ('unit', ParticipantUnit.unit_id, ParticipantUnit.participant_id),
+            ('augment', ParticipantAugment.augment_id, ParticipantAugment.participant_id),
+        )
+        deltas = {}
+        for kind, key_col, participant_col in sources:
+            query = select(Composition.comp_signature, key_col.label('key_id'), Match.patch, Match.region,
+                           Participant.placement, func.count())\
+                .select_from(participant_col.table)\
+                .join(Participant, Participant.id == participant_col)\
+                .join(Match, Match.id == Participant.match_id)
+            if kind != 'placement':
+                query = query.join(Composition, Composition.participant_id == participant_col)
+            query = query.where(*filters)\
+                         .group_by(Composition.comp_signature, key_col, Match.patch, Match.region, Participant.placement)
+            for comp_sig, key_id, patch, region, placement, games in session.execute(query):
+                self._add_detail_delta(deltas, comp_sig, kind, key_id, patch, region, placement, games)
+        return deltas
+    
+    def _apply_comp_detail_deltas(self, session: Session, deltas: Dict, sign: int = 1):
+        """Add (sign=-1: subtract) composition detail deltas to comp_detail_aggregates (caller commits)"""
+        if not deltas:
+            return
+        values = [
+            {
+                'comp_signature': comp_sig,
+                'kind': kind,
+                'key_id': key_id,
+                'patch': patch,
+                'region': region,
+                'play_count': sign * games,
+                'placement_sum': sign * placement_sum,
+                'top4_count': sign * top4_count,
+                'top1_count': sign * top1_count,
+            }
+            for (comp_sig, kind, key_id, patch, region), (games, placement_sum, top4_count, top1_count)
+            in deltas.items()
+        ]
+        counters = ('play_count', 'placement_sum', 'top4_count', 'top1_count')
+        
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            for v in values:
+                cell = session.query(CompDetailAggregate).filter_by(
+                    comp_signature=v['comp_signature'], kind=v['kind'], key_id=v['key_id'],
+                    patch=v['patch'], region=v['region']).first()
+                if cell is None:
+                    session.add(CompDetailAggregate(**v))
+                else:
+                    for key in counters:
+                        setattr(cell, key, getattr(cell, key) + v[key])
+            session.flush()
+            return
+        
+        stmt = upsert_insert(CompDetailAggregate.__table__)
+        excluded = stmt.excluded
+        table = CompDetailAggregate.__table__.c
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.comp_signature, table.kind, table.key_id, table.patch, table.region],
+            set_={key: table[key] + excluded[key] for key in counters}
+        ), values)
+    
+    def rebuild_comp_detail_aggregates(self, batch_size: int = 5000) -> int:
+        """
+        Rebuild comp_detail_aggregates from the stored games
+        
+        Matches are scanned in primary key ranges and each range is added to
+        the (emptied) table, so memory stays bounded on large histories. It
+        runs as one transaction: readers see the old aggregates until it commits.
+        
+        Args:
+            batch_size: Matches per scan
+        
+        Returns:
+            Number of aggregate cells
+        """
+        session = self.get_session()
+        try:
+            session.query(CompDetailAggregate).delete(synchronize_session=False)
+            last_pk = 0
+            while True:
+                pks = list(session.scalars(
+                    select(Match.id).where(Match.id > last_pk).order_by(Match.id).limit(batch_size)))
+                if not pks:
+                    break
+                self._apply_comp_detail_deltas(session, self._comp_detail_scan(
+                    session, Match.id.between(pks[0], pks[-1])))
+                last_pk = pks[-1]
+            session.commit()
+            return session.query(CompDetailAggregate).count()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    # ========== META STATS OPERATIONS ==========
+    
+    @staticmethod
+    def _add_meta_delta(deltas: Dict, comp_sig: str, patch: str, region: str, placement: int,
+                        sign: int = 1):
+        """Accumulate one game into {(signature, patch, region): [games, placement sum, top4, top1]}"""
+        if not comp_sig or comp_sig == 'unknown':
+            return
+        delta = deltas.setdefault((comp_sig, patch or 'unknown', region or 'unknown'), [0, 0, 0, 0])
+        delta[0] += sign
+        delta[1] += sign * placement
+        delta[2] += sign * (placement <= 4)
+        delta[3] += sign * (placement == 1)
+    
+    def _meta_cell_scan(self, session: Session, *filters) -> List:
+        """(signature, patch, region, games, placement sum, top4, top1) grouped over stored games"""
+        return session.execute(
+            select(
+                Composition.comp_signature,
+                Match.patch,
+                Match.region,
+                func.count(Composition.id),
+                func.sum(Participant.placement),
+                func.sum(func.cast(Participant.placement <= 4, Integer)),
+                func.sum(func.cast(Participant.placement == 1, Integer)),
+            )
+            .join(Participant, Participant.id == Composition.participant_id)
+            .join(Match, Match.id == Participant.match_id)
+            .where(Composition.comp_signature != 'unknown', *filters)
+            .group_by(Composition.comp_signature, Match.patch, Match.region)
+        ).all()
+    
+    def _apply_meta_deltas(self, session: Session, deltas: Dict):
+        """
+        Add (or, with negative deltas, subtract) games to meta_aggregates and
+        mark the cells dirty (caller commits)
+        """
+        if not deltas:
+            return
+        now = datetime.utcnow()
+        values = [
+            {
+                'comp_signature': comp_sig,
+                'patch': patch,
+                'region': region,
+                'play_count': games,
+                'placement_sum': placement_sum,
+                'top4_count': top4_count,
+                'top1_count': top1_count,
+                'dirty': True,
+                'version': 1,
+                'updated_at': now,
+            }
+            for (comp_sig, patch, region), (games, placement_sum, top4_count, top1_count) in deltas.items()
+        ]
+        
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            for v in values:
+                cell = session.query(MetaAggregate).filter_by(
+                    comp_signature=v['comp_signature'], patch=v['patch'], region=v['region']).first()
+                if cell is None:
+                    session.add(MetaAggregate(**v))
+                    continue
+                for key in ('play_count', 'placement_sum', 'top4_count', 'top1_count'):
+                    setattr(cell, key, getattr(cell, key) + v[key])
+                cell.dirty = True
+                cell.version += 1
+                cell.updated_at = now
+            session.flush()
+            return
+        
+        # One executemany of a single-row upsert: the statement is compiled once and cached
+        stmt = upsert_insert(MetaAggregate.__table__)
+        excluded = stmt.excluded
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[MetaAggregate.comp_signature, MetaAggregate.patch, MetaAggregate.region],
+            set_={
+                'play_count': MetaAggregate.play_count + excluded.play_count,
+                'placement_sum': MetaAggregate.placement_sum + excluded.placement_sum,
+                'top4_count': MetaAggregate.top4_count + excluded.top4_count,
+                'top1_count': MetaAggregate.top1_count + excluded.top1_count,
+                'dirty': True,
+                'version': MetaAggregate.version + 1,
+                'updated_at': excluded.updated_at,
+            }
+        ), values)
+    
+    def rebuild_meta_aggregates(self) -> int:
+        """
+        Rebuild meta_aggregates from the stored games in one scan (all cells
+        are left dirty, so the next refresh_meta_stats recomputes every comp)
+        
+        Returns:
+            Number of aggregate cells
+        """
+        session = self.get_session()
+        try:
+            deltas = {}
+            for comp_sig, patch, region, games, placement_sum, top4_count, top1_count in \
+                    self._meta_cell_scan(session):
+                deltas[(comp_sig, patch or 'unknown', region or 'unknown')] = [
+                    games, placement_sum or 0, top4_count or 0, top1_count or 0]
+            session.query(MetaAggregate).delete(synchronize_session=False)
+            self._apply_meta_deltas(session, deltas)
+            session.commit()
+            return len(deltas)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def refresh_meta_stats(self, min_games: int = 50, full: bool = False,
+                           chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Update meta_stats from the running aggregates
+        
+        Only compositions with dirty aggregate cells (games ingested or
+        deleted since the last refresh) are recomputed, so the cost follows
+        the new data rather than the whole history. For each of them the
+        (patch, ALL), (all, region) and (all, ALL) rollups are summed from the
+        base cells (GROUPING SETS done in Python, which SQLite lacks). Cells
+        with at least min_games games are upserted on (comp_signature, patch,
+        region); the others are deleted.
+        
+        Args:
+            min_games: Minimum games for a cell to be stored (use full=True after changing it)
+            full: Recompute every composition, not only the dirty ones
+            chunk_size: Signatures per IN query
+        
+        Returns:
+            {'groups': base cells read, 'cells': cells stored, 'signatures': compositions refreshed}
+        """
+        session = self.get_session()
+        try:
+            query = select(MetaAggregate.id, MetaAggregate.version, MetaAggregate.comp_signature,
+                           MetaAggregate.patch, MetaAggregate.region, MetaAggregate.play_count,
+                           MetaAggregate.placement_sum, MetaAggregate.top4_count, MetaAggregate.top1_count)
+            if full:
+                rows = session.execute(query).all()
+                signatures = {row.comp_signature for row in rows}
+            else:
+                signatures = list(session.scalars(
+                    select(MetaAggregate.comp_signature).where(MetaAggregate.dirty.is_(True)).distinct()))
+                rows = []
+                for i in range(0, len(signatures), chunk_size):
+                    rows.extend(session.execute(
+                        query.where(MetaAggregate.comp_signature.in_(signatures[i:i + chunk_size]))))
+            
+            cells = {}
+            for row in rows:
+                for key in ((row.comp_signature, row.patch, row.region), (row.comp_signature, row.patch, 'ALL'),
+                            (row.comp_signature, 'all', row.region), (row.comp_signature, 'all', 'ALL')):
+                    cell = cells.setdefault(key, [0, 0, 0, 0])
+                    cell[0] += row.play_count
+                    cell[1] += row.placement_sum
+                    cell[2] += row.top4_count
+                    cell[3] += row.top1_count
+            
+            now = datetime.utcnow()
+            values = [
+                {
+                    'comp_signature': comp_sig,
+                    'patch': patch,
+                    'region': region,
+                    'primary_traits': comp_sig.split('+'),
+                    'play_count': games,
+                    'avg_placement': placement_sum / games,
+                    'top4_rate': top4_count / games,
+                    'top1_rate': top1_count / games,
+                    'last_calculated': now,
+                }
+                for (comp_sig, patch, region), (games, placement_sum, top4_count, top1_count) in cells.items()
+                if games >= min_games
+            ]
+            self._upsert_meta_cells(session, values)
+            
+            # Cells of the refreshed comps that were not rewritten fell under min_games
+            stale = MetaStat.last_calculated.is_(None) | (MetaStat.last_calculated < now)
+            if full:
+                session.query(MetaStat).filter(stale).delete(synchronize_session=False)
+            else:
+                signatures = list(signatures)
+                for i in range(0, len(signatures), chunk_size):
+                    session.query(MetaStat).filter(
+                        stale, MetaStat.comp_signature.in_(signatures[i:i + chunk_size])
+                    ).delete(synchronize_session=False)
+            
+            # Clear the flags of the versions read (cells changed meanwhile stay dirty)
+            if rows:
+                session.execute(
+                    MetaAggregate.__table__.update()
+                    .where(MetaAggregate.id == bindparam('cell_id'), MetaAggregate.version == bindparam('cell_version'))
+                    .values(dirty=False),
+                    [{'cell_id': row.id, 'cell_version': row.version} for row in rows]
+                )
+            session.query(MetaAggregate).filter(MetaAggregate.play_count <= 0)\
+                   .delete(synchronize_session=False)
             
             session.commit()
-            return meta_stats
+            return {
+                'groups': len(rows),
+                'cells': len(values),
+                'signatures': len(signatures),
+            }
+        except Exception:
+            session.rollback()
+            raise
         finally:
             session.close()
     
-    def get_top_comps(self, limit: int = 20, min_games: int = 50, 
+    def recompute_meta_cube(self, min_games: int = 50, chunk_size: int = 500) -> Dict[str, int]:
+        """
+        Recalculate every (signature, patch, region) cell from the full history
+        
+        Rebuilds meta_aggregates with one GROUP BY (signature, patch, region)
+        scan, then refreshes every composition from them. Use it after
+        changing min_games or to resync the aggregates; refresh_meta_stats
+        is enough after an ingest.
+        
+        Returns:
+            {'groups': base cells, 'cells': cells stored, 'signatures': compositions refreshed}
+        """
+        self.rebuild_meta_aggregates()
+        return self.refresh_meta_stats(min_games=min_games, full=True, chunk_size=chunk_size)
+    
+    def _upsert_meta_cells(self, session: Session, values: List[Dict]):
+        """Insert or update MetaStat rows keyed by (comp_signature, patch, region) (caller commits)"""
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            for v in values:
+                meta_stat = session.query(MetaStat).filter_by(
+                    comp_signature=v['comp_signature'], patch=v['patch'], region=v['region']).first()
+                if meta_stat is None:
+                    meta_stat = MetaStat()
+                    session.add(meta_stat)
+                for key, value in v.items():
+                    setattr(meta_stat, key, value)
+            return
+        
+        if not values:
+            return
+        stmt = upsert_insert(MetaStat.__table__)
+        excluded = stmt.excluded
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[MetaStat.comp_signature, MetaStat.patch, MetaStat.region],
+            set_={
+                'primary_traits': excluded.primary_traits,
+                'play_count': excluded.play_count,
+                'avg_placement': excluded.avg_placement,
+                'top4_rate': excluded.top4_rate,
+                'top1_rate': excluded.top1_rate,
+                'last_calculated': excluded.last_calculated,
+            }
+        ), values)
+    
+    def calculate_meta_stats(self, min_games: int = 50, patch: Optional[str] = None, 
+                            region: Optional[str] = None) -> List[MetaStat]:
+        """
+        Calculate meta statistics for all compositions
+        
+        Refreshes the comps with new games (see refresh_meta_stats) and returns
+        the cell asked for: patch=None means all patches, region=None all regions.
+        """
+        self.refresh_meta_stats(min_games=min_games)
+        return self.get_top_comps(limit=None, min_games=min_games, patch=patch, region=region,
+                                  order_by='play_count')
+    
+    def get_top_comps(self, limit: Optional[int] = 20, min_games: int = 50, 
                      patch: Optional[str] = None, region: Optional[str] = None,
                      order_by: str = 'top4_rate') -> List[MetaStat]:
-        """Get top compositions ordered by specified metric"""
+        """
+        Get top compositions ordered by specified metric
+        
+        patch=None / region=None read the all-patches / all-regions rollups.
+        """
         session = self.get_session()
         try:
             query = session.query(MetaStat)\
-                           .filter(MetaStat.play_count >= min_games)
-            
-            if patch:
-                query = query.filter_by(patch=patch)
-            if region:
-                query = query.filter_by(region=region)
+                           .filter(MetaStat.play_count >= min_games)\
+                           .filter(MetaStat.patch == (patch or 'all'))\
+                           .filter(MetaStat.region == (region or 'ALL'))
             
             # Order by metric
             if order_by == 'top4_rate':
@@ -320,37 +1590,632 @@ class DatabaseManager:
                 query = query.order_by(desc(MetaStat.play_count))
             elif order_by == 'avg_placement':
                 query = query.order_by(MetaStat.avg_placement)  # Lower is better
+            query = query.order_by(MetaStat.comp_signature)  # Stable order for ties
+            
+            if limit is not None:
+                query = query.limit(limit)
+            return query.all()
+        finally:
+            session.close()
+    
+    def get_meta_dimensions(self) -> Dict[str, List[str]]:
+        """Patches and regions that have meta stats (for dashboard filters)"""
+        session = self.get_session()
+        try:
+            patches = session.scalars(select(MetaStat.patch).where(MetaStat.patch != 'all').distinct()).all()
+            regions = session.scalars(select(MetaStat.region).where(MetaStat.region != 'ALL').distinct()).all()
+            # Newest patch first ("13.24" before "13.3")
+            patch_key = lambda p: [int(part) if part.isdigit() else -1 for part in p.split('.')]
+            return {'patches': sorted(patches, key=patch_key, reverse=True), 'regions': sorted(regions)}
+        finally:
+            session.close()
+    
+    # ========== EXPORT OPERATIONS ==========
+    
+    def get_export_cursor(self, match_pk: int) -> Dict:
+        """
+        Check an export cursor against the stored matches
+        
+        Args:
+            match_pk: Last exported match primary key
+        
+        Returns:
+            {'max_pk': largest match primary key (0 if none), 'match_id': match stored at match_pk or None}
+        """
+        session = self.get_session()
+        try:
+            return {
+                'max_pk': session.scalar(select(func.max(Match.id))) or 0,
+                'match_id': session.scalar(select(Match.match_id).where(Match.id == match_pk)),
+            }
+        finally:
+            session.close()
+    
+    def get_export_batch(self, after_match_pk: int = 0, limit: int = 1000) -> Dict:
+        """
+        Flat rows of the next `limit` matches (by primary key) for columnar export
+        
+        Units and traits come from the normalized tables, one row each, so no
+        Composition JSON is decoded.
+        
+        Args:
+            after_match_pk: Export matches with a larger primary key
+            limit: Matches per batch
+        
+        Returns:
+            {'matches', 'participants', 'compositions', 'units', 'traits': lists of dicts,
+             'last_pk': largest match primary key in the batch (after_match_pk if empty)}
+        """
+        session = self.get_session()
+        try:
+            matches = session.execute(
+                select(Match.id, Match.match_id, Match.game_datetime, Match.game_length,
+                       Match.tft_set_number, Match.patch, Match.region)
+                .where(Match.id > after_match_pk)
+                .order_by(Match.id)
+                .limit(limit)
+            ).all()
+            batch = {'matches': [], 'participants': [], 'compositions': [], 'units': [], 'traits': [],
+                     'last_pk': matches[-1].id if matches else after_match_pk}
+            if not matches:
+                return batch
             
-            return query.limit(limit).all()
+            by_pk = {m.id: m for m in matches}
+            pks = list(by_pk)
+            batch['matches'] = [
+                {
+                    'match_id': m.match_id,
+                    'game_datetime': m.game_datetime,
+                    'game_length': m.game_length,
+                    'tft_set_number': m.tft_set_number,
+                    'patch': m.patch or 'unknown',
+                    'region': m.region or 'unknown',
+                }
+                for m in matches
+            ]
+            
+            # Dictionaries are small: decode ids in Python instead of one join per item slot
+            unit_names = dict(session.execute(select(Unit.id, Unit.name)).all())
+            item_names = dict(session.execute(select(Item.id, Item.name)).all())
+            trait_names = dict(session.execute(select(Trait.id, Trait.name)).all())
+            augment_names = dict(session.execute(select(Augment.id, Augment.name)).all())
+            
+            participants = session.execute(
+                select(Participant.id, Participant.match_id, Participant.puuid, Participant.placement,
+                       Participant.level, Participant.gold_left, Participant.total_damage_to_players,
+                       Participant.players_eliminated, Participant.time_eliminated, Composition.comp_signature)
+                .outerjoin(Composition, Composition.participant_id == Participant.id)
+                .where(Participant.match_id.in_(pks))
+            ).all()
+            boards = {}  # participant pk -> (match row, placement, signature)
+            for p in participants:
+                m = by_pk[p.match_id]
+                boards[p.id] = (m, p.placement, p.comp_signature or 'unknown')
+                batch['participants'].append({
+                    'match_id': m.match_id,
+                    'puuid': p.puuid,
+                    'placement': p.placement,
+                    'level': p.level,
+                    'gold_left': p.gold_left,
+                    'total_damage_to_players': p.total_damage_to_players,
+                    'players_eliminated': p.players_eliminated,
+                    'time_eliminated': p.time_eliminated,
+                    'comp_signature': p.comp_signature or 'unknown',
+                    'patch': m.patch or 'unknown',
+                    'region': m.region or 'unknown',
+                })
+            
+            def board_row(participant_pk: int) -> Dict:
+                m, placement, comp_sig = boards[participant_pk]
+                return {'match_id': m.match_id, 'participant_id': participant_pk, 'placement': placement,
+                        'comp_signature': comp_sig, 'patch': m.patch or 'unknown', 'region': m.region or 'unknown'}
+            
+            augments = {}
+            for participant_pk, augment_id, slot in session.execute(
+                    select(ParticipantAugment.participant_id, ParticipantAugment.augment_id, ParticipantAugment.slot)
+                    .join(Participant, Participant.id == ParticipantAugment.participant_id)
+                    .where(Participant.match_id.in_(pks))
+                    .order_by(ParticipantAugment.participant_id, ParticipantAugment.slot)):
+                augments.setdefault(participant_pk, []).append(augment_names.get(augment_id))
+            
+            unit_counts = {}
+            for row in session.execute(
+                    select(ParticipantUnit.participant_id, ParticipantUnit.unit_id, ParticipantUnit.star_level,
+                           ParticipantUnit.item_1_id, ParticipantUnit.item_2_id, ParticipantUnit.item_3_id)
+                    .join(Participant, Participant.id == ParticipantUnit.participant_id)
+                    .where(Participant.match_id.in_(pks))):
+                unit_counts[row.participant_id] = unit_counts.get(row.participant_id, 0) + 1
+                batch['units'].append({
+                    **board_row(row.participant_id),
+                    'character_id': unit_names.get(row.unit_id),
+                    'star_level': row.star_level,
+                    'item_1': item_names.get(row.item_1_id),
+                    'item_2': item_names.get(row.item_2_id),
+                    'item_3': item_names.get(row.item_3_id),
+                })
+            
+            for row in session.execute(
+                    select(ParticipantTrait.participant_id, ParticipantTrait.trait_id, ParticipantTrait.num_units,
+                           ParticipantTrait.tier_current, ParticipantTrait.tier_total, ParticipantTrait.style)
+                    .join(Participant, Participant.id == ParticipantTrait.participant_id)
+                    .where(Participant.match_id.in_(pks))):
+                batch['traits'].append({
+                    **board_row(row.participant_id),
+                    'trait': trait_names.get(row.trait_id),
+                    'num_units': row.num_units,
+                    'tier_current': row.tier_current,
+                    'tier_total': row.tier_total,
+                    'style': row.style,
+                })
+            
+            for participant_pk in boards:
+                picked = augments.get(participant_pk, []) + [None, None, None]
+                batch['compositions'].append({
+                    **board_row(participant_pk),
+                    'unit_count': unit_counts.get(participant_pk, 0),
+                    'augment_1': picked[0],
+                    'augment_2': picked[1],
+                    'augment_3': picked[2],
+                })
+            return batch
+        finally:
+            session.close()
+    
+    # ========== CRAWL JOURNAL OPERATIONS ==========
+    
+    def start_crawl_run(self, regions: List[str], matches_per_player: int,
+                        budget: Optional[int] = None) -> int:
+        """
+        Create a crawl run, returns its id
+        
+        Earlier runs that never finished are marked abandoned: their journals
+        describe an older ladder and can no longer be resumed.
+        """
+        session = self.get_session()
+        try:
+            session.query(CrawlRun)\
+                   .filter(CrawlRun.status.in_(['running', 'interrupted']))\
+                   .update({CrawlRun.status: 'abandoned'}, synchronize_session=False)
+            run = CrawlRun(regions=','.join(regions), matches_per_player=matches_per_player,
+                           budget=budget)
+            session.add(run)
+            session.commit()
+            return run.id
+        finally:
+            session.close()
+    
+    def get_resumable_crawl_run(self) -> Optional[CrawlRun]:
+        """Latest crawl run that was interrupted or never finished (None if a later run completed)"""
+        session = self.get_session()
+        try:
+            last_complete = session.scalar(select(func.max(CrawlRun.id)).where(CrawlRun.status == 'complete'))
+            return session.query(CrawlRun)\
+                         .filter(CrawlRun.status.in_(['running', 'interrupted']),
+                                 CrawlRun.id > (last_complete or 0))\
+                         .order_by(desc(CrawlRun.id))\
+                         .first()
+        finally:
+            session.close()
+    
+    def set_crawl_run_status(self, run_id: int, status: str, budget_used: Optional[int] = None):
+        """
+        Update a crawl run's status
+        
+        A completed run gets its finished_at and loses its region and player
+        rows (only needed to resume it); the run row itself is kept until
+        purge_old_data.
+        """
+        session = self.get_session()
+        try:
+            values = {CrawlRun.status: status}
+            if budget_used is not None:
+                values[CrawlRun.budget_used] = budget_used
+            if status == 'complete':
+                values[CrawlRun.finished_at] = datetime.utcnow()
+                self._delete_crawl_run_details(session, [run_id])
+            session.query(CrawlRun).filter_by(id=run_id).update(values, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+    
+    def set_crawl_run_budget_used(self, run_id: int, budget_used: int):
+        """Journal the API calls a run has spent so far"""
+        session = self.get_session()
+        try:
+            session.query(CrawlRun).filter_by(id=run_id)\
+                   .update({CrawlRun.budget_used: budget_used}, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+    
+    def _delete_crawl_run_details(self, session: Session, run_ids) -> int:
+        """Delete the region and player rows of crawl runs (caller commits)"""
+        deleted = 0
+        for model in (CrawlRunPlayer, CrawlRunRegion):
+            deleted += session.execute(delete(model).where(model.run_id.in_(run_ids))).rowcount
+        return deleted
+    
+    def get_crawl_run_regions(self, run_id: int) -> Dict[str, CrawlRunRegion]:
+        """Completed stages per region of a crawl run"""
+        session = self.get_session()
+        try:
+            rows = session.query(CrawlRunRegion).filter_by(run_id=run_id).all()
+            return {row.region: row for row in rows}
+        finally:
+            session.close()
+    
+    def set_crawl_region_stage(self, run_id: int, region: str, stage: str):
+        """Mark a region stage ('players_collected' or 'matches_collected') as done"""
+        session = self.get_session()
+        try:
+            row = session.query(CrawlRunRegion).filter_by(run_id=run_id, region=region).first()
+            if row is None:
+                row = CrawlRunRegion(run_id=run_id, region=region)
+                session.add(row)
+            setattr(row, stage, True)
+            session.commit()
+        finally:
+            session.close()
+    
+    def plan_crawl_players(self, run_id: int, region: str, puuids: List[str]):
+        """Store the crawl order of a region's players in one transaction"""
+        session = self.get_session()
+        try:
+            session.bulk_insert_mappings(CrawlRunPlayer, [
+                {'run_id': run_id, 'region': region, 'puuid': puuid, 'position': position}
+                for position, puuid in enumerate(puuids)
+            ])
+            session.commit()
+        finally:
+            session.close()
+    
+    def get_crawl_players(self, run_id: int, region: str) -> List[CrawlRunPlayer]:
+        """Planned players of a region in crawl order"""
+        session = self.get_session()
+        try:
+            return session.query(CrawlRunPlayer)\
+                         .filter_by(run_id=run_id, region=region)\
+                         .order_by(CrawlRunPlayer.position)\
+                         .all()
+        finally:
+            session.close()
+    
+    def record_crawl_listing(self, run_id: int, region: str, puuid: str, match_ids: List[str],
+                             budget_used: Optional[int] = None):
+        """Journal the match IDs listed for a player (and the API calls spent so far)"""
+        session = self.get_session()
+        try:
+            session.query(CrawlRunPlayer)\
+                   .filter_by(run_id=run_id, region=region, puuid=puuid)\
+                   .update({CrawlRunPlayer.listed: True, CrawlRunPlayer.match_ids: list(match_ids)},
+                           synchronize_session=False)
+            if budget_used is not None:
+                session.query(CrawlRun).filter_by(id=run_id)\
+                       .update({CrawlRun.budget_used: budget_used}, synchronize_session=False)
+            session.commit()
         finally:
             session.close()
     
     # ========== UTILITY OPERATIONS ==========
     
     def clear_old_data(self, days: int = 30):
-        """Delete data older than specified days"""
+        """Delete data older than specified days (rolled up first, see purge_old_data)"""
+        result = self.purge_old_data(days=days)
+        print(f"✓ Deleted {result['matches']} matches older than {days} days")
+    
+    def purge_old_data(self, days: int = 30, batch_size: int = 200, pause: float = 0.0,
+                       progress: Optional[Callable[[Dict], None]] = None) -> Dict[str, int]:
+        """
+        Retention: roll up and delete matches older than `days`, in small batches
+        
+        Each batch of matches is one short transaction that:
+          1. adds its games to daily_comp_stats / daily_unit_stats / daily_augment_stats
+          2. subtracts them from the running meta and composition detail aggregates
+             and from match_summaries
+          3. deletes unit/trait/augment rows, compositions, participants and matches
+        so readers (WAL) and writers are only blocked for one batch at a time.
+        Participants left behind by older deletes (no match) are purged too,
+        league snapshots older than both `days` and SNAPSHOT_LOOKBACK_DAYS
+        (the window the crawl scheduler reads), and complete or abandoned
+        crawl runs started more than `days` ago with their journals.
+        
+        Args:
+            days: Keep matches newer than this
+            batch_size: Matches per transaction
+            pause: Seconds to sleep between batches (lets other writers in)
+            progress: Called with the running totals after every batch
+        
+        Returns:
+            {'matches', 'participants', 'orphans', 'snapshots', 'crawl_runs', 'batches'}
+        """
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        totals = {'matches': 0, 'participants': 0, 'orphans': 0, 'snapshots': 0, 'crawl_runs': 0, 'batches': 0}
+        
+        while True:
+            session = self.get_session()
+            try:
+                match_ids = list(session.scalars(
+                    select(Match.id).where(Match.game_datetime < cutoff_date)
+                    .order_by(Match.id).limit(batch_size)))
+                if not match_ids:
+                    break
+                
+                self._rollup_daily_stats(session, match_ids)
+                
+                deltas = {}
+                for comp_sig, patch, region, games, placement_sum, top4_count, top1_count in \
+                        self._meta_cell_scan(session, Match.id.in_(match_ids)):
+                    deltas[(comp_sig, patch or 'unknown', region or 'unknown')] = [
+                        -games, -(placement_sum or 0), -(top4_count or 0), -(top1_count or 0)]
+                self._apply_meta_deltas(session, deltas)
+                self._apply_comp_detail_deltas(session, self._comp_detail_scan(session, Match.id.in_(match_ids)),
+                                               sign=-1)
+                summary = self._match_summary_scan(session, Match.id.in_(match_ids))
+                self._apply_match_summary_deltas(session, summary, sign=-1)
+                
+                participants = select(Participant.id).where(Participant.match_id.in_(match_ids))
+                totals['participants'] += self._delete_participants(session, participants)
+                session.execute(delete(Match).where(Match.id.in_(match_ids)))
+                self._refresh_match_summary_dates(session, summary)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            
+            totals['matches'] += len(match_ids)
+            totals['batches'] += 1
+            if progress:
+                progress(totals)
+            if pause:
+                time.sleep(pause)
+        
+        # Composition detail cells whose games were all purged
+        if totals['matches']:
+            session = self.get_session()
+            try:
+                session.query(CompDetailAggregate).filter(CompDetailAggregate.play_count <= 0)\
+                       .delete(synchronize_session=False)
+                session.commit()
+            finally:
+                session.close()
+        
+        # Participants whose match was deleted without cascade (before this job existed)
+        while True:
+            session = self.get_session()
+            try:
+                orphans = list(session.scalars(
+                    select(Participant.id)
+                    .where(~exists().where(Match.id == Participant.match_id))
+                    .limit(batch_size * 8)))
+                if not orphans:
+                    break
+                totals['orphans'] += self._delete_participants(session, orphans)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+        
+        # League snapshots the scheduler no longer reads (one row per ladder entry and sync)
+        snapshot_cutoff = datetime.utcnow() - timedelta(days=max(days, SNAPSHOT_LOOKBACK_DAYS))
+        while True:
+            session = self.get_session()
+            try:
+                snapshot_ids = list(session.scalars(
+                    select(LeagueSnapshot.id).where(LeagueSnapshot.captured_at < snapshot_cutoff)
+                    .limit(batch_size * 8)))
+                if not snapshot_ids:
+                    break
+                totals['snapshots'] += session.execute(
+                    delete(LeagueSnapshot).where(LeagueSnapshot.id.in_(snapshot_ids))).rowcount
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+        
+        # Finished crawl runs (running or interrupted ones may still be resumed)
         session = self.get_session()
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            deleted = session.query(Match)\
-                            .filter(Match.game_datetime < cutoff_date)\
-                            .delete()
+            run_ids = list(session.scalars(
+                select(CrawlRun.id).where(CrawlRun.status.in_(['complete', 'abandoned']),
+                                          CrawlRun.started_at < cutoff_date)))
+            if run_ids:
+                self._delete_crawl_run_details(session, run_ids)
+                totals['crawl_runs'] = session.execute(
+                    delete(CrawlRun).where(CrawlRun.id.in_(run_ids))).rowcount
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        
+        return totals
+    
+    def _delete_participants(self, session: Session, participant_ids) -> int:
+        """Delete participants and their compositions and unit/trait/augment rows (caller commits)"""
+        for model in (ParticipantUnit, ParticipantTrait, ParticipantAugment, Composition):
+            session.execute(delete(model).where(model.participant_id.in_(participant_ids)))
+        return session.execute(delete(Participant).where(Participant.id.in_(participant_ids))).rowcount
+    
+    def _rollup_daily_stats(self, session: Session, match_ids: List[int]):
+        """Add the games of some matches to the daily aggregate tables (caller commits)"""
+        comp_rows = session.execute(
+            select(Match.game_datetime, Match.patch, Match.region, Composition.comp_signature,
+                   Participant.placement)
+            .join(Participant, Participant.match_id == Match.id)
+            .join(Composition, Composition.participant_id == Participant.id)
+            .where(Match.id.in_(match_ids))
+        )
+        comps = {}
+        for game_datetime, patch, region, comp_sig, placement in comp_rows:
+            key = (game_datetime.date(), comp_sig or 'unknown', patch or 'unknown', region or 'unknown')
+            self._add_daily_game(comps, key, placement)
+        
+        unit_rows = session.execute(
+            select(Match.game_datetime, Match.patch, Match.region, ParticipantUnit.unit_id,
+                   ParticipantUnit.star_level, Participant.placement)
+            .join(Participant, Participant.match_id == Match.id)
+            .join(ParticipantUnit, ParticipantUnit.participant_id == Participant.id)
+            .where(Match.id.in_(match_ids))
+        )
+        units = {}
+        for game_datetime, patch, region, unit_id, star_level, placement in unit_rows:
+            key = (game_datetime.date(), unit_id, patch or 'unknown', region or 'unknown')
+            self._add_daily_game(units, key, placement, star_level or 0)
+        
+        augment_rows = session.execute(
+            select(Match.game_datetime, Match.patch, Match.region, ParticipantAugment.augment_id,
+                   Participant.placement)
+            .join(Participant, Participant.match_id == Match.id)
+            .join(ParticipantAugment, ParticipantAugment.participant_id == Participant.id)
+            .where(Match.id.in_(match_ids))
+        )
+        augments = {}
+        for game_datetime, patch, region, augment_id, placement in augment_rows:
+            key = (game_datetime.date(), augment_id, patch or 'unknown', region or 'unknown')
+            self._add_daily_game(augments, key, placement)
+        
+        self._add_daily_stats(session, DailyCompStat, 'comp_signature', comps)
+        self._add_daily_stats(session, DailyUnitStat, 'unit_id', units)
+        self._add_daily_stats(session, DailyAugmentStat, 'augment_id', augments)
+    
+    @staticmethod
+    def _add_daily_game(stats: Dict, key, placement: int, star_level: int = 0):
+        """Accumulate one game into {key: [games, placement sum, top4, top1, star level sum]}"""
+        row = stats.setdefault(key, [0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += placement
+        row[2] += placement <= 4
+        row[3] += placement == 1
+        row[4] += star_level
+    
+    def _add_daily_stats(self, session: Session, model, name_col: str, stats: Dict):
+        """Add rollup rows keyed by (day, name_col, patch, region) to a daily table (caller commits)"""
+        if not stats:
+            return
+        values = []
+        for (day, name, patch, region), (games, placement_sum, top4_count, top1_count, stars) in stats.items():
+            row = {
+                'day': day,
+                name_col: name,
+                'patch': patch,
+                'region': region,
+                'play_count': games,
+                'placement_sum': placement_sum,
+                'top4_count': top4_count,
+                'top1_count': top1_count,
+            }
+            if model is DailyUnitStat:
+                row['star_level_sum'] = stars
+            values.append(row)
+        counters = [key for key in values[0] if key not in ('day', name_col, 'patch', 'region')]
+        
+        upsert_insert = self._upsert_insert()
+        if upsert_insert is None:
+            for v in values:
+                row = session.query(model).filter_by(
+                    day=v['day'], patch=v['patch'], region=v['region'], **{name_col: v[name_col]}).first()
+                if row is None:
+                    session.add(model(**v))
+                else:
+                    for key in counters:
+                        setattr(row, key, getattr(row, key) + v[key])
+            session.flush()
+            return
+        
+        stmt = upsert_insert(model.__table__)
+        excluded = stmt.excluded
+        table = model.__table__.c
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.day, table[name_col], table.patch, table.region],
+            set_={key: table[key] + excluded[key] for key in counters}
+        ), values)
+    
+    def incremental_vacuum(self, pages: int = 2000) -> Dict[str, int]:
+        """
+        Give up to `pages` free pages back to the OS (SQLite with auto_vacuum=INCREMENTAL)
+        
+        Returns:
+            {'auto_vacuum': mode (2 = incremental), 'freed': pages freed, 'free': free pages left}
+        """
+        if self.engine.dialect.name != 'sqlite':
+            return {'auto_vacuum': 0, 'freed': 0, 'free': 0}
+        with self.engine.connect() as conn:
+            mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+            before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if mode == 2:
+                # pysqlite steps a PRAGMA only once and every step frees one page
+                for _ in range(min(pages, before)):
+                    conn.exec_driver_sql("PRAGMA incremental_vacuum(1)")
+                conn.commit()
+            after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        return {'auto_vacuum': mode, 'freed': before - after, 'free': after}
+    
+    def enable_incremental_vacuum(self):
+        """Switch an existing SQLite file to auto_vacuum=INCREMENTAL (rewrites it with a full VACUUM)"""
+        if self.engine.dialect.name != 'sqlite':
+            return
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+    
+    def clear_match_data(self) -> int:
+        """
+        Delete all matches, participants, compositions, their unit/trait/augment
+        rows, meta stats and daily rollups (players and dictionaries are
+        kept, but their high-water marks are reset so the next crawl lists their games again)
+        
+        Match ids restart from 1 afterwards, so incremental exports keyed on
+        them (snapshot_export.py) see the rebuild and export everything again.
+        """
+        session = self.get_session()
+        try:
+            session.query(Player).update({Player.last_match_datetime: None, Player.last_crawled: None},
+                                         synchronize_session=False)
+            session.query(MetaStat).delete()
+            session.query(MetaAggregate).delete()
+            session.query(CompDetailAggregate).delete()
+            session.query(MatchSummary).delete()
+            for model in (DailyCompStat, DailyUnitStat, DailyAugmentStat):
+                session.query(model).delete()
+            session.query(ParticipantUnit).delete()
+            session.query(ParticipantTrait).delete()
+            session.query(ParticipantAugment).delete()
+            session.query(Composition).delete()
+            session.query(Participant).delete()
+            deleted = session.query(Match).delete()
+            if self.engine.dialect.name == 'sqlite' and session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'")).first():
+                session.execute(text("DELETE FROM sqlite_sequence WHERE name = 'matches'"))
             session.commit()
-            print(f"✓ Deleted {deleted} matches older than {days} days")
+            return deleted
         finally:
             session.close()
     
     def get_database_stats(self) -> Dict:
-        """Get statistics about the database"""
+        """
+        Get statistics about the database
+        
+        Match and composition totals and dates come from match_summaries;
+        players and meta_stats are bounded by the ladder size and the number
+        of meta cells, so they are still counted.
+        """
+        summary = self.get_match_summary()
         session = self.get_session()
         try:
             return {
                 'total_players': session.query(Player).count(),
-                'total_matches': session.query(Match).count(),
-                'total_compositions': session.query(Composition).count(),
+                'total_matches': summary['matches'],
+                'total_compositions': summary['compositions'],
                 'total_meta_stats': session.query(MetaStat).count(),
-                'oldest_match': session.query(func.min(Match.game_datetime)).scalar(),
-                'newest_match': session.query(func.max(Match.game_datetime)).scalar(),
+                'oldest_match': summary['oldest_match'],
+                'newest_match': summary['newest_match'],
             }
         finally:
             session.close()
@@ -361,7 +2226,22 @@ db_manager = DatabaseManager()
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Initialize the TFT Meta Tracker database')
+    parser.add_argument('--backfill-details', action='store_true',
+                       help='Fill unit/trait/augment tables for compositions that have none (resumable)')
+    parser.add_argument('--rebuild-aggregates', action='store_true',
+                       help='Rebuild the meta, composition detail and match summary aggregates from the stored games')
+    args = parser.parse_args()
+    
     # Initialize database if run directly
     print("Initializing database...")
     db_manager.init_db()
+    if args.backfill_details:
+        print(f"✓ Backfilled details for {db_manager.backfill_participant_details()} participants")
+    if args.rebuild_aggregates:
+        print(f"✓ Rebuilt {db_manager.rebuild_meta_aggregates()} meta aggregate cells")
+        print(f"✓ Rebuilt {db_manager.rebuild_comp_detail_aggregates()} composition detail cells")
+        print(f"✓ Rebuilt {db_manager.rebuild_match_summary()} match summary cells")
     print("Database ready!")
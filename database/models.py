@@ -1,7 +1,7 @@
 """
 Database models for TFT Meta Tracker
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Text, Index
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, JSON, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -22,14 +22,43 @@ class Player(Base):
     lp = Column(Integer, default=0)
     region = Column(String(10), nullable=False)
     last_updated = Column(DateTime, default=datetime.utcnow)
+    last_match_datetime = Column(DateTime, nullable=True)  # High-water mark: última partida recopilada
+    last_crawled = Column(DateTime, nullable=True)  # Último crawl completo de sus partidas
     
     # Relationship
     participants = relationship("Participant", back_populates="player")
     
+    __table_args__ = (
+        Index('idx_player_region', 'region'),  # Crawl por región (keyset por id)
+    )
+    
     def __repr__(self):
         return f"<Player {self.game_name}#{self.tag_line} ({self.tier})>"
 
 
+class LeagueSnapshot(Base):
+    """Foto de la entrada de liga de un jugador en cada sincronización del ladder"""
+    __tablename__ = 'league_snapshots'
+    
+    id = Column(Integer, primary_key=True)
+    puuid = Column(String(78), nullable=False)
+    region = Column(String(10), nullable=False)
+    tier = Column(String(20))
+    rank = Column(String(10))
+    lp = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    captured_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_snapshot_puuid_captured', 'puuid', 'captured_at'),
+        Index('idx_snapshot_captured', 'captured_at'),  # Retención
+    )
+    
+    def __repr__(self):
+        return f"<LeagueSnapshot {self.puuid[:8]} {self.tier} {self.lp}LP>"
+
+
 class Match(Base):
     """Partidas recopiladas"""
     __tablename__ = 'matches'
@@ -47,6 +76,9 @@ class Match(Base):
     
     __table_args__ = (
         Index('idx_match_datetime_region', 'game_datetime', 'region'),
+        Index('idx_match_region_datetime', 'region', 'game_datetime'),  # Partidas recientes de una región
+        Index('idx_match_patch_region', 'patch', 'region', 'game_datetime'),  # Filtros del meta, fechas del resumen
+        {'sqlite_autoincrement': True},  # Los ids no se reutilizan tras borrar partidas (cursor del export Parquet)
     )
     
     def __repr__(self):
@@ -58,7 +90,7 @@ class Participant(Base):
     __tablename__ = 'participants'
     
     id = Column(Integer, primary_key=True)
-    match_id = Column(Integer, ForeignKey('matches.id'), nullable=False, index=True)
+    match_id = Column(Integer, ForeignKey('matches.id'), nullable=False)
     player_id = Column(Integer, ForeignKey('players.id'), nullable=True, index=True)  # Puede ser null si no tracked
     puuid = Column(String(78), nullable=False)  # Para jugadores no tracked
     
@@ -77,6 +109,8 @@ class Participant(Base):
     
     __table_args__ = (
         Index('idx_participant_placement', 'placement'),
+        Index('idx_participant_puuid', 'puuid'),
+        Index('idx_participant_match_placement', 'match_id', 'placement'),  # Cubre partida -> placement
     )
     
     def __repr__(self):
@@ -96,21 +130,125 @@ class Composition(Base):
     augments = Column(JSON)  # List of augment names
     
     # Composition signature for grouping similar comps
-    comp_signature = Column(String(200), index=True)
+    comp_signature = Column(String(200))
     
     # Relationship
     participant = relationship("Participant", back_populates="composition")
     
+    # Índices cubrientes: las consultas del meta solo leen el índice, no las filas con los JSON
+    __table_args__ = (
+        Index('idx_composition_signature_participant', 'comp_signature', 'participant_id'),
+        Index('idx_composition_participant_signature', 'participant_id', 'comp_signature'),
+    )
+    
     def __repr__(self):
         return f"<Composition {self.comp_signature}>"
 
 
+class Unit(Base):
+    """Diccionario de campeones (character_id -> id entero)"""
+    __tablename__ = 'units'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f"<Unit {self.name}>"
+
+
+class Trait(Base):
+    """Diccionario de traits"""
+    __tablename__ = 'traits'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f"<Trait {self.name}>"
+
+
+class Item(Base):
+    """Diccionario de items"""
+    __tablename__ = 'items'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f"<Item {self.name}>"
+
+
+class Augment(Base):
+    """Diccionario de augments"""
+    __tablename__ = 'augments'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f"<Augment {self.name}>"
+
+
+class ParticipantUnit(Base):
+    """Unidad en el tablero final de un participante (normalizado de Composition.units)"""
+    __tablename__ = 'participant_units'
+    
+    id = Column(Integer, primary_key=True)
+    participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
+    unit_id = Column(Integer, ForeignKey('units.id'), nullable=False)
+    star_level = Column(Integer)  # Estrellas (1, 2, 3)
+    item_1_id = Column(Integer, ForeignKey('items.id'), nullable=True)
+    item_2_id = Column(Integer, ForeignKey('items.id'), nullable=True)
+    item_3_id = Column(Integer, ForeignKey('items.id'), nullable=True)
+    
+    __table_args__ = (
+        Index('idx_participant_unit_participant', 'participant_id'),
+        Index('idx_participant_unit_unit', 'unit_id', 'participant_id'),
+        Index('idx_participant_unit_item_1', 'item_1_id'),
+        Index('idx_participant_unit_item_2', 'item_2_id'),
+        Index('idx_participant_unit_item_3', 'item_3_id'),
+    )
+
+
+class ParticipantTrait(Base):
+    """Trait activo de un participante (normalizado de Composition.traits)"""
+    __tablename__ = 'participant_traits'
+    
+    id = Column(Integer, primary_key=True)
+    participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
+    trait_id = Column(Integer, ForeignKey('traits.id'), nullable=False)
+    num_units = Column(Integer)
+    tier_current = Column(Integer)
+    tier_total = Column(Integer)
+    style = Column(Integer)  # 0=inactivo, 1=bronce, 2=plata, 3=oro, 4=cromático
+    
+    __table_args__ = (
+        Index('idx_participant_trait_participant', 'participant_id'),
+        Index('idx_participant_trait_trait', 'trait_id', 'participant_id'),
+    )
+
+
+class ParticipantAugment(Base):
+    """Augment elegido por un participante (normalizado de Composition.augments)"""
+    __tablename__ = 'participant_augments'
+    
+    id = Column(Integer, primary_key=True)
+    participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
+    augment_id = Column(Integer, ForeignKey('augments.id'), nullable=False)
+    slot = Column(Integer)  # Orden de elección (0, 1, 2)
+    
+    __table_args__ = (
+        Index('idx_participant_augment_participant', 'participant_id'),
+        Index('idx_participant_augment_augment', 'augment_id', 'participant_id'),
+    )
+
+
 class MetaStat(Base):
-    """Estadísticas agregadas de composiciones (meta)"""
+    """Estadísticas agregadas de composiciones (meta), una fila por celda (signature, patch, region)"""
     __tablename__ = 'meta_stats'
     
     id = Column(Integer, primary_key=True)
-    comp_signature = Column(String(200), unique=True, nullable=False, index=True)
+    comp_signature = Column(String(200), nullable=False, index=True)
     
     # Descriptive info
     primary_traits = Column(JSON)  # Main traits that define this comp
@@ -124,14 +262,198 @@ class MetaStat(Base):
     top1_rate = Column(Float)  # % of games that won
     
     # Metadata
-    patch = Column(String(20))  # Patch these stats are for
-    region = Column(String(10))  # Region filter (or 'ALL')
+    patch = Column(String(20), nullable=False, default='all')  # Patch these stats are for (or 'all')
+    region = Column(String(10), nullable=False, default='ALL')  # Region filter (or 'ALL')
     last_calculated = Column(DateTime, default=datetime.utcnow)
     
     __table_args__ = (
+        Index('idx_meta_cell', 'comp_signature', 'patch', 'region', unique=True),
         Index('idx_meta_top4_rate', 'top4_rate'),
         Index('idx_meta_play_count', 'play_count'),
     )
     
     def __repr__(self):
         return f"<MetaStat {self.comp_signature} (top4: {self.top4_rate:.1%})>"
+
+
+class MetaAggregate(Base):
+    """Agregados acumulados por celda (signature, patch, region), actualizados en cada ingesta"""
+    __tablename__ = 'meta_aggregates'
+    
+    id = Column(Integer, primary_key=True)
+    comp_signature = Column(String(200), nullable=False)
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+    
+    # Running sums (avg_placement = placement_sum / play_count)
+    play_count = Column(Integer, default=0, nullable=False)
+    placement_sum = Column(Integer, default=0, nullable=False)
+    top4_count = Column(Integer, default=0, nullable=False)
+    top1_count = Column(Integer, default=0, nullable=False)
+    
+    # Pending meta_stats refresh; version changes with every delta
+    dirty = Column(Boolean, default=True, nullable=False)
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_meta_aggregate_cell', 'comp_signature', 'patch', 'region', unique=True),
+        Index('idx_meta_aggregate_dirty', 'dirty', 'comp_signature'),
+    )
+    
+    def __repr__(self):
+        return f"<MetaAggregate {self.comp_signature} {self.patch}/{self.region} ({self.play_count})>"
+
+
+class CompDetailAggregate(Base):
+    """Agregados acumulados del detalle de una comp (puestos, unidades y augments) por patch y región"""
+    __tablename__ = 'comp_detail_aggregates'
+
+    id = Column(Integer, primary_key=True)
+    comp_signature = Column(String(200), nullable=False)
+    kind = Column(String(10), nullable=False)  # placement, unit o augment
+    key_id = Column(Integer, nullable=False)  # Puesto (1-8), units.id o augments.id
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+
+    # Running sums over the boards of the cell
+    play_count = Column(Integer, default=0, nullable=False)
+    placement_sum = Column(Integer, default=0, nullable=False)
+    top4_count = Column(Integer, default=0, nullable=False)
+    top1_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        Index('idx_comp_detail_cell', 'comp_signature', 'kind', 'key_id', 'patch', 'region', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<CompDetailAggregate {self.comp_signature} {self.kind}:{self.key_id} ({self.play_count})>"
+
+
+class MatchSummary(Base):
+    """Resumen materializado de las partidas guardadas, una fila por (patch, región)"""
+    __tablename__ = 'match_summaries'
+    
+    id = Column(Integer, primary_key=True)
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+    
+    # Mantenido en la ingesta y la retención, en la misma transacción que las partidas
+    match_count = Column(Integer, default=0, nullable=False)
+    composition_count = Column(Integer, default=0, nullable=False)
+    oldest_match = Column(DateTime)
+    newest_match = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_match_summary_cell', 'patch', 'region', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<MatchSummary {self.patch}/{self.region} ({self.match_count} matches)>"
+
+
+class DailyCompStat(Base):
+    """Resumen diario por composición de las partidas borradas por la retención"""
+    __tablename__ = 'daily_comp_stats'
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    comp_signature = Column(String(200), nullable=False)
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+    play_count = Column(Integer, default=0, nullable=False)
+    placement_sum = Column(Integer, default=0, nullable=False)
+    top4_count = Column(Integer, default=0, nullable=False)
+    top1_count = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_daily_comp_cell', 'day', 'comp_signature', 'patch', 'region', unique=True),
+    )
+
+
+class DailyUnitStat(Base):
+    """Resumen diario por unidad de las partidas borradas por la retención"""
+    __tablename__ = 'daily_unit_stats'
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    unit_id = Column(Integer, ForeignKey('units.id'), nullable=False)
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+    play_count = Column(Integer, default=0, nullable=False)
+    placement_sum = Column(Integer, default=0, nullable=False)
+    top4_count = Column(Integer, default=0, nullable=False)
+    top1_count = Column(Integer, default=0, nullable=False)
+    star_level_sum = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_daily_unit_cell', 'day', 'unit_id', 'patch', 'region', unique=True),
+    )
+
+
+class DailyAugmentStat(Base):
+    """Resumen diario por augment de las partidas borradas por la retención"""
+    __tablename__ = 'daily_augment_stats'
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    augment_id = Column(Integer, ForeignKey('augments.id'), nullable=False)
+    patch = Column(String(20), nullable=False)
+    region = Column(String(10), nullable=False)
+    play_count = Column(Integer, default=0, nullable=False)
+    placement_sum = Column(Integer, default=0, nullable=False)
+    top4_count = Column(Integer, default=0, nullable=False)
+    top1_count = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index('idx_daily_augment_cell', 'day', 'augment_id', 'patch', 'region', unique=True),
+    )
+
+
+class CrawlRun(Base):
+    """Diario de una ejecución de collect_data (permite reanudarla con --resume)"""
+    __tablename__ = 'crawl_runs'
+    
+    id = Column(Integer, primary_key=True)
+    status = Column(String(20), default='running', nullable=False)  # running, interrupted, complete, abandoned
+    regions = Column(String(200), nullable=False)  # Regiones separadas por comas
+    matches_per_player = Column(Integer)
+    budget = Column(Integer, nullable=True)
+    budget_used = Column(Integer, default=0)  # Llamadas gastadas, para que --resume no repita el presupuesto
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<CrawlRun #{self.id} {self.status} ({self.regions})>"
+
+
+class CrawlRunRegion(Base):
+    """Etapas completadas de una región dentro de un crawl"""
+    __tablename__ = 'crawl_run_regions'
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('crawl_runs.id'), nullable=False)
+    region = Column(String(10), nullable=False)
+    players_collected = Column(Boolean, default=False)
+    matches_collected = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index('idx_crawl_region_run', 'run_id', 'region', unique=True),
+    )
+
+
+class CrawlRunPlayer(Base):
+    """Jugador planificado en un crawl y los match IDs que se listaron para él"""
+    __tablename__ = 'crawl_run_players'
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('crawl_runs.id'), nullable=False)
+    region = Column(String(10), nullable=False)
+    puuid = Column(String(78), nullable=False)
+    position = Column(Integer, nullable=False)  # Orden del planificador
+    listed = Column(Boolean, default=False)
+    match_ids = Column(JSON)  # IDs devueltos por el listado
+    
+    __table_args__ = (
+        Index('idx_crawl_player_run', 'run_id', 'region', 'position'),
+    )
@@ -0,0 +1,123 @@
+"""
+SQLite Tuning - Pragma profiles applied to every new SQLite connection
+
+Profiles:
+    default      WAL, synchronous=NORMAL, moderate cache and mmap
+    bulk_ingest  Collectors: large page cache, rare WAL checkpoints, long busy timeout
+    read_mostly  Dashboard: large mmap window and cache, short busy timeout
+    off          No pragmas (SQLite defaults, rollback journal)
+
+WAL lets the dashboard read while a collector writes, and synchronous=NORMAL
+is durable across application crashes in WAL mode (only an OS crash or power
+loss can drop the last transactions). journal_mode=WAL is stored in the
+database file; the other pragmas are per connection. auto_vacuum=INCREMENTAL
+only takes effect on a new database (or after a VACUUM) and lets the
+retention job give freed pages back to the OS with incremental_vacuum.
+
+The profile is chosen with DATABASE_PROFILE and single pragmas can be
+overridden with SQLITE_PRAGMAS, e.g. SQLITE_PRAGMAS="cache_size=-262144,mmap_size=0".
+Non-SQLite engines are left untouched.
+"""
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Pragma values per profile (cache_size < 0 is in KiB, mmap_size in bytes, busy_timeout in ms)
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    'default': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -64 * 1024,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 10000,
+    },
+    'bulk_ingest': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -256 * 1024,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 30000,
+        'wal_autocheckpoint': 10000,  # Pages; fewer checkpoints during long write bursts
+    },
+    'read_mostly': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -128 * 1024,
+        'mmap_size': 1024 * 1024 * 1024,
+        'busy_timeout': 5000,
+    },
+    'off': {},
+}
+
+
+def parse_pragma_overrides(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Parse "name=value,name=value" pragma overrides
+
+    Args:
+        spec: Override string (None or empty = no overrides)
+
+    Returns:
+        {pragma: value}
+    """
+    overrides = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition('=')
+        if not sep or not name.strip().isidentifier() or not value.strip():
+            raise ValueError(f"Invalid SQLite pragma override: {item!r}")
+        overrides[name.strip().lower()] = value.strip()
+    return overrides
+
+
+def resolve_pragmas(profile: str, overrides: Optional[str] = None) -> Dict[str, object]:
+    """Pragmas of a profile with the overrides applied"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}' "
+                         f"(choose from: {', '.join(SQLITE_PROFILES)})")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    pragmas.update(parse_pragma_overrides(overrides))
+    return pragmas
+
+
+def install_pragmas(engine: Engine, get_pragmas: Callable[[], Dict[str, object]]):
+    """
+    Apply pragmas to every new connection of a SQLite engine
+
+    Args:
+        engine: SQLAlchemy engine
+        get_pragmas: Returns the pragmas to apply (read at connect time, so a
+            profile switch followed by engine.dispose() takes effect)
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in get_pragmas().items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def current_pragmas(engine: Engine, names) -> Dict[str, object]:
+    """Read pragma values back from a live connection (for diagnostics)"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    values = {}
+    with engine.connect() as conn:
+        for name in names:
+            row = conn.exec_driver_sql(f"PRAGMA {name}").fetchone()
+            values[name] = row[0] if row else None
+    return values
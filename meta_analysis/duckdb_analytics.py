@@ -0,0 +1,354 @@
+"""
+DuckDB Analytics - Meta reports computed by embedded DuckDB
+
+Runs the same reports as the SQLAlchemy path (top comps, comp details, unit,
+item and augment breakdowns) on DuckDB's vectorized engine, reading either:
+
+    sqlite      the live database file, attached read-only (DuckDB sqlite extension)
+    snapshot    the Parquet snapshots written by snapshot_export.py
+
+Both sources are exposed as the same three views, so every report is one
+query over them:
+
+    boards        one row per composition (placement, comp_signature, patch, region)
+    unit_rows     one row per unit on a board (+ character_id, star_level, item_1..3)
+    augment_rows  one row per augment picked on a board
+
+Reports return the same values and order as db_manager / meta_report: counts
+and placement sums are aggregated by DuckDB and the rates are divided in
+Python, exactly like the SQLAlchemy path does, and ties are broken by name.
+A snapshot only holds the matches exported so far.
+
+duckdb is optional (pip install duckdb); only this module needs it.
+"""
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy.engine import make_url
+
+from config import DATABASE_URL, SNAPSHOT_DIR, MIN_GAMES_FOR_META
+
+SOURCES = ('sqlite', 'snapshot')
+ORDER_BY = ('top4_rate', 'top1_rate', 'play_count', 'avg_placement')
+
+
+def _duckdb():
+    """Import duckdb lazily, with a clear message when it is missing"""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The DuckDB analytics engine needs duckdb: pip install duckdb") from e
+    return duckdb
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def sqlite_path(database_url: str = DATABASE_URL) -> str:
+    """File of a sqlite:/// database URL"""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise ValueError(f"The sqlite source needs a SQLite database file, not {database_url}")
+    return url.database
+
+
+# Views over the attached SQLite database (alias tft): dictionary ids decoded by joins
+_SQLITE_VIEWS = {
+    'boards': """
+        SELECT c.participant_id, p.placement, c.comp_signature,
+               coalesce(m.patch, 'unknown') AS patch, coalesce(m.region, 'unknown') AS region
+        FROM tft.compositions c
+        JOIN tft.participants p ON p.id = c.participant_id
+        JOIN tft.matches m ON m.id = p.match_id
+    """,
+    'unit_rows': """
+        SELECT pu.participant_id, p.placement, coalesce(c.comp_signature, 'unknown') AS comp_signature,
+               coalesce(m.patch, 'unknown') AS patch, coalesce(m.region, 'unknown') AS region,
+               u.name AS character_id, pu.star_level,
+               i1.name AS item_1, i2.name AS item_2, i3.name AS item_3
+        FROM tft.participant_units pu
+        JOIN tft.participants p ON p.id = pu.participant_id
+        JOIN tft.matches m ON m.id = p.match_id
+        JOIN tft.units u ON u.id = pu.unit_id
+        LEFT JOIN tft.compositions c ON c.participant_id = pu.participant_id
+        LEFT JOIN tft.items i1 ON i1.id = pu.item_1_id
+        LEFT JOIN tft.items i2 ON i2.id = pu.item_2_id
+        LEFT JOIN tft.items i3 ON i3.id = pu.item_3_id
+    """,
+    'augment_rows': """
+        SELECT pa.participant_id, p.placement, coalesce(c.comp_signature, 'unknown') AS comp_signature,
+               coalesce(m.patch, 'unknown') AS patch, coalesce(m.region, 'unknown') AS region,
+               a.name AS augment
+        FROM tft.participant_augments pa
+        JOIN tft.participants p ON p.id = pa.participant_id
+        JOIN tft.matches m ON m.id = p.match_id
+        JOIN tft.augments a ON a.id = pa.augment_id
+        LEFT JOIN tft.compositions c ON c.participant_id = pa.participant_id
+    """,
+}
+
+
+class DuckDBAnalytics:
+    """Meta reports over the live SQLite file or the Parquet snapshots"""
+
+    def __init__(self, source: str = 'sqlite', database_url: str = DATABASE_URL,
+                 snapshot_dir: str = SNAPSHOT_DIR, threads: Optional[int] = None):
+        """
+        Args:
+            source: 'sqlite' (live database, read-only) or 'snapshot' (Parquet files)
+            database_url: Database to attach with the sqlite source
+            snapshot_dir: Snapshot root folder for the snapshot source
+            threads: DuckDB worker threads (None = one per core)
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unknown analytics source '{source}' (choose from: {', '.join(SOURCES)})")
+        duckdb = _duckdb()
+        self.source = source
+        self.con = duckdb.connect()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+
+        if source == 'sqlite':
+            self._attach_sqlite(duckdb, sqlite_path(database_url))
+        else:
+            self._create_snapshot_views(snapshot_dir)
+
+    def _attach_sqlite(self, duckdb, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Database file not found: {path}")
+        try:
+            self.con.execute(f"ATTACH {_quote(path)} AS tft (TYPE sqlite, READ_ONLY)")
+        except duckdb.Error as e:
+            raise RuntimeError(f"Could not attach {path} with the DuckDB sqlite extension "
+                               f"(it is downloaded on first use, or use source='snapshot'): {e}") from e
+        for name, query in _SQLITE_VIEWS.items():
+            self.con.execute(f"CREATE VIEW {name} AS {query}")
+
+    def _create_snapshot_views(self, snapshot_dir: str):
+        def scan(table: str) -> str:
+            path = os.path.join(snapshot_dir, table)
+            if not os.path.isdir(path):
+                raise FileNotFoundError(f"No '{table}' snapshot in {snapshot_dir}: "
+                                        f"run snapshot_export.py export first")
+            # Partition values stay strings ("14.3" is a patch, not a number)
+            return (f"read_parquet({_quote(os.path.join(path, '**', '*.parquet'))}, hive_partitioning = true, "
+                    f"hive_types = {{'patch': VARCHAR, 'region': VARCHAR}})")
+
+        compositions = scan('compositions')
+        self.con.execute(f"""
+            CREATE VIEW boards AS
+            SELECT participant_id, placement, comp_signature, patch, region FROM {compositions}
+        """)
+        self.con.execute(f"""
+            CREATE VIEW unit_rows AS
+            SELECT participant_id, placement, comp_signature, patch, region,
+                   character_id, star_level, item_1, item_2, item_3
+            FROM {scan('units')}
+        """)
+        slots = [
+            f"SELECT participant_id, placement, comp_signature, patch, region, {slot} AS augment "
+            f"FROM {compositions} WHERE {slot} IS NOT NULL"
+            for slot in ('augment_1', 'augment_2', 'augment_3')
+        ]
+        self.con.execute(f"CREATE VIEW augment_rows AS {' UNION ALL '.join(slots)}")
+
+    def close(self):
+        self.con.close()
+
+    @staticmethod
+    def _filters(comp_signature: Optional[str] = None, patch: Optional[str] = None,
+                 region: Optional[str] = None):
+        conditions, params = [], []
+        for column, value in (('comp_signature', comp_signature), ('patch', patch), ('region', region)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        return conditions, params
+
+    @staticmethod
+    def _where(conditions: List[str]) -> str:
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    def _placement_stats(self, name_expr: str, rows: str, conditions: List[str], params: List,
+                         limit: int) -> List[Dict]:
+        """name, games, avg_placement, top4_rate, top1_rate grouped by name_expr (most games first)"""
+        result = self.con.execute(f"""
+            SELECT {name_expr} AS name, count(*) AS games, sum(placement),
+                   sum(CASE WHEN placement <= 4 THEN 1 ELSE 0 END),
+                   sum(CASE WHEN placement = 1 THEN 1 ELSE 0 END)
+            FROM {rows}
+            {self._where(conditions)}
+            GROUP BY 1
+            ORDER BY games DESC, name
+            LIMIT ?
+        """, params + [limit]).fetchall()
+        return [
+            {
+                'name': name,
+                'games': games,
+                'avg_placement': placement_sum / games,
+                'top4_rate': top4_count / games,
+                'top1_rate': top1_count / games,
+            }
+            for name, games, placement_sum, top4_count, top1_count in result
+        ]
+
+    def get_unit_stats(self, comp_signature: Optional[str] = None, patch: Optional[str] = None,
+                       region: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Same as db_manager.get_unit_stats"""
+        conditions, params = self._filters(comp_signature, patch, region)
+        return self._placement_stats('character_id', 'unit_rows', conditions, params, limit)
+
+    def get_item_stats(self, unit: Optional[str] = None, comp_signature: Optional[str] = None,
+                       patch: Optional[str] = None, region: Optional[str] = None,
+                       limit: int = 20) -> List[Dict]:
+        """Same as db_manager.get_item_stats"""
+        conditions, params = self._filters(comp_signature, patch, region)
+        if unit:
+            conditions.append("character_id = ?")
+            params.append(unit)
+        built = (f"(SELECT placement, comp_signature, patch, region, character_id, item "
+                 f"FROM unit_rows UNPIVOT (item FOR slot IN (item_1, item_2, item_3)))")
+        return self._placement_stats('item', built, conditions, params, limit)
+
+    def get_augment_stats(self, comp_signature: Optional[str] = None, patch: Optional[str] = None,
+                          region: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Same as db_manager.get_augment_stats"""
+        conditions, params = self._filters(comp_signature, patch, region)
+        return self._placement_stats('augment', 'augment_rows', conditions, params, limit)
+
+    def get_top_comps(self, limit: Optional[int] = 20, min_games: int = MIN_GAMES_FOR_META,
+                      patch: Optional[str] = None, region: Optional[str] = None,
+                      order_by: str = 'top4_rate') -> List[Dict]:
+        """
+        Top compositions straight from the boards (no meta_stats refresh needed)
+
+        Matches db_manager.get_top_comps once meta_stats was refreshed with a
+        min_games threshold no higher than this one.
+
+        Returns:
+            Dicts with comp_signature, patch, region, play_count, avg_placement, top4_rate, top1_rate
+        """
+        if order_by not in ORDER_BY:
+            raise ValueError(f"Unknown order '{order_by}' (choose from: {', '.join(ORDER_BY)})")
+        conditions, params = self._filters(patch=patch, region=region)
+        conditions.append("comp_signature != 'unknown'")
+        rows = self.con.execute(f"""
+            SELECT comp_signature, count(*), sum(placement),
+                   sum(CASE WHEN placement <= 4 THEN 1 ELSE 0 END),
+                   sum(CASE WHEN placement = 1 THEN 1 ELSE 0 END)
+            FROM boards
+            {self._where(conditions)}
+            GROUP BY comp_signature
+            HAVING count(*) >= ?
+        """, params + [min_games]).fetchall()
+
+        comps = [
+            {
+                'comp_signature': comp_sig,
+                'patch': patch or 'all',
+                'region': region or 'ALL',
+                'play_count': games,
+                'avg_placement': placement_sum / games,
+                'top4_rate': top4_count / games,
+                'top1_rate': top1_count / games,
+            }
+            for comp_sig, games, placement_sum, top4_count, top1_count in rows
+        ]
+        # Rates are ordered in Python so equal floats compare exactly like in SQLite
+        comps.sort(key=lambda c: c['comp_signature'])
+        comps.sort(key=lambda c: c[order_by], reverse=order_by != 'avg_placement')
+        return comps if limit is None else comps[:limit]
+
+    def get_comp_details(self, comp_signature: str, patch: Optional[str] = None,
+                         region: Optional[str] = None) -> Dict:
+        """
+        Core units, popular augments and placement spread of a composition
+
+        Returns:
+            Same dict as meta_report.get_comp_details ({} if the composition was never played)
+        """
+        conditions, params = self._filters(comp_signature, patch, region)
+        distribution = dict(self.con.execute(f"""
+            SELECT placement, count(*) FROM boards {self._where(conditions)}
+            GROUP BY placement ORDER BY placement
+        """, params).fetchall())
+        sample_count = sum(distribution.values())
+        if not sample_count:
+            return {}
+
+        units = self.get_unit_stats(comp_signature, patch, region, limit=8)
+        augments = self.get_augment_stats(comp_signature, patch, region, limit=6)
+        return {
+            'comp_signature': comp_signature,
+            'primary_traits': comp_signature.split('+'),
+            'core_units': [(u['name'], u['games']) for u in units],
+            'popular_augments': [(a['name'], a['games']) for a in augments],
+            'sample_count': sample_count,
+            'avg_placement': sum(p * n for p, n in distribution.items()) / sample_count,
+            'placement_distribution': distribution,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Meta reports with the DuckDB analytics engine')
+    parser.add_argument('report', choices=['top', 'comp', 'units', 'items', 'augments'], help='Report to run')
+    parser.add_argument('--source', choices=SOURCES, default='sqlite', help='Live database or Parquet snapshot')
+    parser.add_argument('--dir', type=str, default=SNAPSHOT_DIR, help='Snapshot folder (snapshot source)')
+    parser.add_argument('--comp', type=str, default=None, help='Composition signature filter')
+    parser.add_argument('--unit', type=str, default=None, help='Unit filter for the items report')
+    parser.add_argument('--patch', type=str, default=None, help='Filter by patch')
+    parser.add_argument('--region', type=str, default=None, help='Filter by region')
+    parser.add_argument('--top', type=int, default=20, help='Rows to show')
+    parser.add_argument('--min-games', type=int, default=MIN_GAMES_FOR_META, help='Minimum games for a comp')
+
+    args = parser.parse_args()
+
+    try:
+        analytics = DuckDBAnalytics(source=args.source, snapshot_dir=args.dir)
+    except (ImportError, RuntimeError, FileNotFoundError, ValueError) as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    start = time.time()
+    print(f"\n{'='*60}")
+    print(f"DUCKDB {args.report.upper()} REPORT ({args.source})")
+    print(f"{'='*60}\n")
+
+    if args.report == 'top':
+        for i, comp in enumerate(analytics.get_top_comps(limit=args.top, min_games=args.min_games,
+                                                         patch=args.patch, region=args.region), 1):
+            print(f"{i:>3}. {comp['comp_signature']:<50} {comp['play_count']:>7} games  "
+                  f"top4 {comp['top4_rate'] * 100:5.1f}%  avg {comp['avg_placement']:.2f}")
+    elif args.report == 'comp':
+        if not args.comp:
+            print("✗ --comp is required for the comp report")
+            sys.exit(1)
+        details = analytics.get_comp_details(args.comp, patch=args.patch, region=args.region)
+        if not details:
+            print(f"✗ No games found for {args.comp}")
+            sys.exit(1)
+        print(f"{details['sample_count']} games, avg placement {details['avg_placement']:.2f}")
+        print(f"Placements: {details['placement_distribution']}")
+        print(f"Core units: {', '.join(f'{name} ({n})' for name, n in details['core_units'])}")
+        print(f"Augments:   {', '.join(f'{name} ({n})' for name, n in details['popular_augments'])}")
+    else:
+        if args.report == 'units':
+            rows = analytics.get_unit_stats(args.comp, args.patch, args.region, limit=args.top)
+        elif args.report == 'items':
+            rows = analytics.get_item_stats(args.unit, args.comp, args.patch, args.region, limit=args.top)
+        else:
+            rows = analytics.get_augment_stats(args.comp, args.patch, args.region, limit=args.top)
+        for row in rows:
+            print(f"  {row['name']:<40} {row['games']:>8} games  avg {row['avg_placement']:.2f}  "
+                  f"top4 {row['top4_rate'] * 100:5.1f}%")
+
+    print(f"\n✓ Done in {time.time() - start:.2f}s")
@@ -4,53 +4,72 @@ Meta Report Generator - Get top compositions and meta statistics
 import os
 import sys
 from typing import List, Optional, Dict
-from collections import Counter
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from database.db_manager import db_manager
-from database.models import MetaStat, Composition
+from database.models import MetaStat
 from config import MIN_GAMES_FOR_META
 
 
 def update_meta_stats(min_games: int = MIN_GAMES_FOR_META, 
                      patch: Optional[str] = None,
-                     region: Optional[str] = None):
+                     region: Optional[str] = None,
+                     full: bool = False):
     """
     Recalculate all meta statistics
     
+    Every (composition, patch, region) cell and its all-patch / all-region
+    rollups are kept, so any filter can be read afterwards. By default only
+    compositions with games ingested or deleted since the last update are
+    recomputed, from the running aggregates kept at ingest time.
+    
     Args:
         min_games: Minimum games for a comp to be included
-        patch: Filter by patch (None = all patches)
-        region: Filter by region (None = all regions)
+        patch: Patch of the returned stats (None = all patches)
+        region: Region of the returned stats (None = all regions)
+        full: Rescan the whole match history (needed after changing min_games)
     """
     print(f"\nRecalculating meta statistics...")
     print(f"  Min games: {min_games}")
-    print(f"  Patch: {patch or 'all'}")
-    print(f"  Region: {region or 'ALL'}\n")
+    print(f"  Mode: {'full rescan' if full else 'incremental (changed comps only)'}\n")
     
-    meta_stats = db_manager.calculate_meta_stats(
-        min_games=min_games,
-        patch=patch,
-        region=region
-    )
+    if full:
+        cube = db_manager.recompute_meta_cube(min_games=min_games)
+    else:
+        cube = db_manager.refresh_meta_stats(min_games=min_games)
     
-    print(f"✓ Calculated stats for {len(meta_stats)} compositions")
-    return meta_stats
+    print(f"✓ Calculated {cube['cells']} cells for {cube['signatures']} compositions "
+          f"({cube['groups']} composition/patch/region aggregates read)")
+    return get_top_comps(limit=None, min_games=min_games, patch=patch, region=region,
+                         order_by='play_count')
 
 
-def get_top_comps(limit: int = 20, min_games: int = MIN_GAMES_FOR_META,
+def refresh_meta(min_games: int = MIN_GAMES_FOR_META) -> int:
+    """
+    Apply newly ingested (or deleted) games to the meta stats, quietly
+    
+    Cheap when nothing changed. The collectors and the retention job call it
+    after writing; the dashboard only on request (it is a write transaction).
+    
+    Returns:
+        Number of compositions refreshed
+    """
+    return db_manager.refresh_meta_stats(min_games=min_games)['signatures']
+
+
+def get_top_comps(limit: Optional[int] = 20, min_games: int = MIN_GAMES_FOR_META,
                  patch: Optional[str] = None, region: Optional[str] = None,
                  order_by: str = 'top4_rate') -> List[MetaStat]:
     """
     Get top compositions
     
     Args:
-        limit: Number of comps to return
+        limit: Number of comps to return (None = all)
         min_games: Minimum games played
-        patch: Filter by patch
-        region: Filter by region
+        patch: Filter by patch (None = all patches)
+        region: Filter by region (None = all regions)
         order_by: Metric to order by (top4_rate, top1_rate, play_count, avg_placement)
     
     Returns:
@@ -65,43 +84,34 @@ def get_top_comps(limit: int = 20, min_games: int = MIN_GAMES_FOR_META,
     )
 
 
-def get_comp_details(comp_signature: str) -> Dict:
+def get_meta_dimensions() -> Dict[str, List[str]]:
+    """Patches and regions available as meta filters"""
+    return db_manager.get_meta_dimensions()
+
+
+def get_comp_details(comp_signature: str, patch: Optional[str] = None,
+                     region: Optional[str] = None) -> Dict:
     """
     Get detailed information about a composition
     
+    Every figure comes from the composition detail aggregates kept at
+    ingest time, so popular comps cost the same as rare ones.
+    
     Args:
         comp_signature: Composition signature
+        patch: Filter by patch (None = all patches)
+        region: Filter by region (None = all regions)
     
     Returns:
-        Dictionary with detailed comp info
+        Dictionary with detailed comp info ({} if the comp was never played)
     """
-    compositions = db_manager.get_compositions_by_signature(comp_signature)
+    breakdown = db_manager.get_comp_breakdown(comp_signature, patch=patch, region=region)
+    distribution = breakdown['placements']
     
-    if not compositions:
+    if not distribution:
         return {}
     
-    # Aggregate data from all instances of this comp
-    all_units = []
-    all_augments = []
-    placements = []
-    
-    for comp in compositions:
-        # Extract units
-        for unit in comp.units or []:
-            if isinstance(unit, dict):
-                all_units.append(unit.get('character_id', 'Unknown'))
-        
-        # Extract augments
-        for aug in comp.augments or []:
-            all_augments.append(aug)
-        
-        # Get placement from participant
-        if comp.participant:
-            placements.append(comp.participant.placement)
-    
-    # Find most common units and augments
-    unit_counter = Counter(all_units)
-    augment_counter = Counter(all_augments)
+    sample_count = sum(distribution.values())
     
     # Get primary traits from signature
     traits = comp_signature.split('+')
@@ -109,10 +119,11 @@ def get_comp_details(comp_signature: str) -> Dict:
     return {
         'comp_signature': comp_signature,
         'primary_traits': traits,
-        'core_units': unit_counter.most_common(8),  # Top 8 most used units
-        'popular_augments': augment_counter.most_common(6),  # Top 6 augments
-        'sample_count': len(compositions),
-        'avg_placement': sum(placements) / len(placements) if placements else 0,
+        'core_units': [(u['name'], u['games']) for u in breakdown['units'][:8]],  # Top 8 most used units
+        'popular_augments': [(a['name'], a['games']) for a in breakdown['augments'][:6]],  # Top 6 augments
+        'sample_count': sample_count,
+        'avg_placement': sum(p * n for p, n in distribution.items()) / sample_count,
+        'placement_distribution': distribution,
     }
 
 
@@ -126,9 +137,12 @@ def format_comp_for_display(meta_stat: MetaStat) -> Dict:
     Returns:
         Formatted dictionary
     """
+    # Games of the stat's own patch / region ('all' / 'ALL' rows are the rollups)
+    total_games = get_total_games(patch=None if meta_stat.patch == 'all' else meta_stat.patch,
+                                  region=None if meta_stat.region == 'ALL' else meta_stat.region)
     return {
         'comp_name': meta_stat.comp_signature,
-        'play_rate': f"{(meta_stat.play_count / get_total_games() * 100):.1f}%",
+        'play_rate': f"{(meta_stat.play_count / total_games * 100) if total_games else 0:.1f}%",
         'games': meta_stat.play_count,
         'top4_rate': f"{meta_stat.top4_rate * 100:.1f}%",
         'top1_rate': f"{meta_stat.top1_rate * 100:.1f}%",
@@ -138,9 +152,9 @@ def format_comp_for_display(meta_stat: MetaStat) -> Dict:
     }
 
 
-def get_total_games() -> int:
-    """Get total number of games in database"""
-    return db_manager.get_match_count()
+def get_total_games(patch: Optional[str] = None, region: Optional[str] = None) -> int:
+    """Get number of games in database (optionally of one patch / region), an O(1) summary read"""
+    return db_manager.get_match_count(patch=patch, region=region)
 
 
 def get_meta_summary() -> Dict:
@@ -156,7 +170,8 @@ def get_meta_summary() -> Dict:
         'total_compositions': db_stats['total_compositions'],
         'viable_comps': len(viable_comps),
         'oldest_match': db_stats['oldest_match'],
-        'newest_match': db_stats['newest_match']
+        'newest_match': db_stats['newest_match'],
+        'matches_by_patch': db_manager.get_patch_match_counts()
     }
 
 
@@ -166,6 +181,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate TFT Meta Report')
     parser.add_argument('--update', action='store_true',
                        help='Recalculate meta statistics')
+    parser.add_argument('--full', action='store_true',
+                       help='With --update: rescan the whole match history instead of only new games')
     parser.add_argument('--top', type=int, default=20,
                        help='Number of top comps to show')
     parser.add_argument('--min-games', type=int, default=MIN_GAMES_FOR_META,
@@ -188,7 +205,8 @@ if __name__ == "__main__":
         update_meta_stats(
             min_games=args.min_games,
             patch=args.patch,
-            region=args.region
+            region=args.region,
+            full=args.full
         )
     
     # Get and display top comps
@@ -222,6 +240,8 @@ if __name__ == "__main__":
     print("META SUMMARY")
     print(f"{'='*80}")
     print(f"Total Matches: {summary['total_matches']}")
+    for patch, matches in summary['matches_by_patch'].items():
+        print(f"  Patch {patch}: {matches}")
     print(f"Total Players Tracked: {summary['total_players']}")
     print(f"Viable Compositions: {summary['viable_comps']}")
     print(f"{'='*80}\n")
@@ -0,0 +1,306 @@
+"""
+Snapshot Export - Columnar Parquet snapshots of the match data for analytics
+
+Layout (hive partitions by patch and region, one file per export batch):
+
+    snapshots/
+        _manifest.json                                  last exported match + batch counter
+        matches/patch=14.23/region=euw1/part-000001-0.parquet
+        participants/...    one row per player in a match (stats + comp_signature)
+        compositions/...    one row per board (signature, placement, unit count, augments)
+        units/...           one row per unit on a board (star level, items)
+        traits/...          one row per active trait on a board
+
+Exports are incremental: each run appends the matches stored since the
+previous one. If the match data was rebuilt in between (clear_match_data,
+match_archive.py replay --rebuild), match ids restart and the snapshot is
+exported again from scratch instead of skipping the rebuilt matches. load_snapshot opens the files memory-mapped through Arrow
+datasets and only reads the partitions and columns asked for, so notebooks
+and dashboards can scan millions of boards without touching SQLite.
+
+pyarrow is optional (pip install pyarrow); only this module needs it.
+"""
+import os
+import sys
+import json
+import shutil
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database.db_manager import db_manager
+from config import SNAPSHOT_DIR
+
+TABLES = ('matches', 'participants', 'compositions', 'units', 'traits')
+MANIFEST = '_manifest.json'
+
+
+def _pyarrow():
+    """Import pyarrow lazily, with a clear message when it is missing"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+    except ImportError as e:
+        raise ImportError("Parquet snapshots need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _schemas() -> Dict:
+    """Arrow schema of every snapshot table (fixed, so appended files always line up)"""
+    pa = _pyarrow()
+    board = [
+        ('match_id', pa.string()),
+        ('participant_id', pa.int64()),
+        ('placement', pa.int8()),
+        ('comp_signature', pa.string()),
+    ]
+    partition = [('patch', pa.string()), ('region', pa.string())]
+    return {
+        'matches': pa.schema([
+            ('match_id', pa.string()),
+            ('game_datetime', pa.timestamp('ms')),
+            ('game_length', pa.float32()),
+            ('tft_set_number', pa.int16()),
+        ] + partition),
+        'participants': pa.schema([
+            ('match_id', pa.string()),
+            ('puuid', pa.string()),
+            ('placement', pa.int8()),
+            ('level', pa.int8()),
+            ('gold_left', pa.int16()),
+            ('total_damage_to_players', pa.int32()),
+            ('players_eliminated', pa.int8()),
+            ('time_eliminated', pa.float32()),
+            ('comp_signature', pa.string()),
+        ] + partition),
+        'compositions': pa.schema(board + [
+            ('unit_count', pa.int8()),
+            ('augment_1', pa.string()),
+            ('augment_2', pa.string()),
+            ('augment_3', pa.string()),
+        ] + partition),
+        'units': pa.schema(board + [
+            ('character_id', pa.string()),
+            ('star_level', pa.int8()),
+            ('item_1', pa.string()),
+            ('item_2', pa.string()),
+            ('item_3', pa.string()),
+        ] + partition),
+        'traits': pa.schema(board + [
+            ('trait', pa.string()),
+            ('num_units', pa.int8()),
+            ('tier_current', pa.int8()),
+            ('tier_total', pa.int8()),
+            ('style', pa.int8()),
+        ] + partition),
+    }
+
+
+def _partitioning():
+    pa = _pyarrow()
+    return pa.dataset.partitioning(pa.schema([('patch', pa.string()), ('region', pa.string())]),
+                                   flavor='hive')
+
+
+def read_manifest(snapshot_dir: str = SNAPSHOT_DIR) -> Dict:
+    """Export state: last exported match (primary key and match_id), batches and rows written"""
+    path = os.path.join(snapshot_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'last_match_pk': 0, 'last_match_id': None, 'batches': 0,
+                'rows': {table: 0 for table in TABLES}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(snapshot_dir: str, manifest: Dict):
+    # Write then rename, so an interrupted export never leaves a half-written manifest
+    path = os.path.join(snapshot_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _clear_snapshot(snapshot_dir: str):
+    for table in TABLES:
+        shutil.rmtree(os.path.join(snapshot_dir, table), ignore_errors=True)
+    if os.path.exists(os.path.join(snapshot_dir, MANIFEST)):
+        os.remove(os.path.join(snapshot_dir, MANIFEST))
+
+
+def _rebuilt_since(manifest: Dict) -> bool:
+    """True if the matches behind the manifest's cursor were deleted and ids reused"""
+    if not manifest['last_match_pk']:
+        return False
+    cursor = db_manager.get_export_cursor(manifest['last_match_pk'])
+    if not cursor['max_pk']:
+        return False  # Nothing stored yet: the snapshot keeps its history
+    if cursor['max_pk'] < manifest['last_match_pk']:
+        return True
+    return (cursor['match_id'] is not None and manifest.get('last_match_id') is not None
+            and cursor['match_id'] != manifest['last_match_id'])
+
+
+def export_snapshots(snapshot_dir: str = SNAPSHOT_DIR, batch_size: int = 5000, full: bool = False,
+                     progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Append the matches stored since the last export to the Parquet snapshot
+
+    Each batch writes one file per table and partition and then advances the
+    manifest. A batch interrupted before the manifest is updated is written
+    again with the same file names next time, so it is never duplicated.
+    A snapshot whose cursor no longer matches the database (match data
+    cleared and re-ingested) is deleted and exported again.
+
+    Args:
+        snapshot_dir: Snapshot root folder
+        batch_size: Matches per batch (bounds memory)
+        full: Delete the snapshot and export everything again
+        progress: Called with the manifest after every batch
+
+    Returns:
+        {'matches': matches exported by this run, 'batches': batches written, 'manifest': manifest}
+    """
+    pa = _pyarrow()
+    schemas = _schemas()
+    partitioning = _partitioning()
+
+    if not full and _rebuilt_since(read_manifest(snapshot_dir)):
+        print("⚠ Match data was rebuilt since the last export: exporting the snapshot again")
+        full = True
+    if full and os.path.isdir(snapshot_dir):
+        _clear_snapshot(snapshot_dir)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    manifest = read_manifest(snapshot_dir)
+    exported = 0
+    batches = 0
+    while True:
+        batch = db_manager.get_export_batch(after_match_pk=manifest['last_match_pk'], limit=batch_size)
+        if not batch['matches']:
+            break
+
+        sequence = manifest['batches'] + 1
+        for table in TABLES:
+            rows = batch[table]
+            if not rows:
+                continue
+            pa.dataset.write_dataset(
+                pa.Table.from_pylist(rows, schema=schemas[table]),
+                os.path.join(snapshot_dir, table),
+                format='parquet',
+                partitioning=partitioning,
+                basename_template=f"part-{sequence:06d}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore',
+            )
+            manifest['rows'][table] = manifest['rows'].get(table, 0) + len(rows)
+
+        manifest['last_match_pk'] = batch['last_pk']
+        manifest['last_match_id'] = batch['matches'][-1]['match_id']
+        manifest['batches'] = sequence
+        _write_manifest(snapshot_dir, manifest)
+
+        exported += len(batch['matches'])
+        batches += 1
+        if progress:
+            progress(manifest)
+
+    return {'matches': exported, 'batches': batches, 'manifest': manifest}
+
+
+def open_snapshot(table: str, snapshot_dir: str = SNAPSHOT_DIR):
+    """
+    Open a snapshot table as a memory-mapped Arrow dataset (nothing is read yet)
+
+    Args:
+        table: matches, participants, compositions, units or traits
+        snapshot_dir: Snapshot root folder
+
+    Returns:
+        pyarrow.dataset.Dataset
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown snapshot table '{table}' (choose from: {', '.join(TABLES)})")
+    pa = _pyarrow()
+    path = os.path.join(snapshot_dir, table)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No '{table}' snapshot in {snapshot_dir}: run snapshot_export.py export first")
+    return pa.dataset.dataset(path, format='parquet', partitioning=_partitioning(),
+                              schema=_schemas()[table],
+                              filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+
+
+def load_snapshot(table: str, patch: Optional[str] = None, region: Optional[str] = None,
+                  columns: Optional[List[str]] = None, snapshot_dir: str = SNAPSHOT_DIR):
+    """
+    Load a snapshot table, reading only the matching partitions and columns
+
+    Args:
+        table: matches, participants, compositions, units or traits
+        patch: Only this patch (None = all)
+        region: Only this region (None = all)
+        columns: Columns to read (None = all)
+        snapshot_dir: Snapshot root folder
+
+    Returns:
+        pyarrow.Table (call .to_pandas() for a DataFrame)
+    """
+    pa = _pyarrow()
+    dataset = open_snapshot(table, snapshot_dir)
+    condition = None
+    for field, value in (('patch', patch), ('region', region)):
+        if value is not None:
+            expression = pa.dataset.field(field) == value
+            condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Export match data as partitioned Parquet snapshots')
+    parser.add_argument('command', choices=['export', 'info'], help='export new matches / show snapshot contents')
+    parser.add_argument('--dir', type=str, default=SNAPSHOT_DIR, help='Snapshot folder')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Matches per batch')
+    parser.add_argument('--full', action='store_true', help='Rebuild the snapshot from scratch')
+
+    args = parser.parse_args()
+
+    try:
+        _pyarrow()
+    except ImportError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if args.command == 'export':
+        db_manager.init_db()
+        print(f"\n{'='*60}")
+        print(f"EXPORTING PARQUET SNAPSHOT TO {args.dir}")
+        print(f"{'='*60}\n")
+
+        start = time.time()
+        result = export_snapshots(
+            snapshot_dir=args.dir,
+            batch_size=args.batch_size,
+            full=args.full,
+            progress=lambda m: print(f"  batch {m['batches']}: up to match #{m['last_match_pk']}", end='\r')
+        )
+        if result['batches']:
+            print()
+        print(f"✓ Exported {result['matches']} new matches in {result['batches']} batches "
+              f"({time.time() - start:.1f}s)")
+        for table, rows in result['manifest']['rows'].items():
+            print(f"  {table:<14} {rows:>10} rows")
+    else:
+        manifest = read_manifest(args.dir)
+        print(f"\nSnapshot: {args.dir}")
+        print(f"Last exported match #{manifest['last_match_pk']} ({manifest['batches']} batches)\n")
+        for table in TABLES:
+            try:
+                dataset = open_snapshot(table, args.dir)
+            except FileNotFoundError:
+                print(f"  {table:<14} (empty)")
+                continue
+            print(f"  {table:<14} {dataset.count_rows():>10} rows  {len(dataset.files):>5} files")
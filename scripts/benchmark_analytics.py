@@ -0,0 +1,163 @@
+"""
+Meta report benchmark: SQLAlchemy/SQLite vs. embedded DuckDB
+
+Fills a throwaway SQLite database with deterministic mock matches (8
+participants each, so the default 125000 matches is 1M participants), then
+runs every report through db_manager and through DuckDBAnalytics on the live
+SQLite file and on a Parquet snapshot, checks that the results are identical
+and prints the timings.
+
+The sqlite source needs DuckDB's sqlite extension and the snapshot source
+needs pyarrow; a source that is not available is skipped with a warning.
+
+Usage:
+    python scripts/benchmark_analytics.py --matches 125000
+    python scripts/benchmark_analytics.py --matches 10000 --min-games 5
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+# Throwaway database and no raw archive: must be set before importing config
+_bench_dir = tempfile.mkdtemp(prefix='tft_analytics_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_bench_dir, 'bench.db')}"
+os.environ['MATCH_ARCHIVE_ENABLED'] = '0'
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tqdm import tqdm
+
+from config import REGIONS
+from data_collection.batch_match_collector import build_match_data
+from data_collection.match_archive import get_region_for_match_id
+from database.db_manager import db_manager
+from meta_analysis.duckdb_analytics import DuckDBAnalytics
+from meta_analysis.meta_report import get_comp_details
+from scripts.mock_riot_server import MockRiotWorld
+
+META_FIELDS = ('comp_signature', 'patch', 'region', 'play_count', 'avg_placement', 'top4_rate', 'top1_rate')
+
+
+def fill_database(matches: int, batch_size: int):
+    """Store `matches` synthetic matches spread over every platform"""
+    per_platform = -(-matches // len(REGIONS))
+    world = MockRiotWorld(players_per_platform=100, matches_per_platform=per_platform)
+    match_ids = list(world.match_meta)[:matches]
+    with tqdm(total=len(match_ids), desc="Generating matches") as pbar:
+        for i in range(0, len(match_ids), batch_size):
+            db_manager.add_matches([build_match_data(world.match(match_id), get_region_for_match_id(match_id))
+                                    for match_id in match_ids[i:i + batch_size]])
+            pbar.update(len(match_ids[i:i + batch_size]))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def sqlalchemy_reports(min_games: int, comp: str, unit: str, region: str):
+    """{report: callable} through db_manager (meta_stats must be fresh)"""
+    def top_comps(**filters):
+        return [{field: getattr(m, field) for field in META_FIELDS}
+                for m in db_manager.get_top_comps(limit=None, min_games=min_games, **filters)]
+
+    return {
+        'top comps': lambda: top_comps(),
+        f"top comps ({region})": lambda: top_comps(region=region),
+        'comp details': lambda: get_comp_details(comp),
+        'unit stats': lambda: db_manager.get_unit_stats(limit=1000),
+        f"item stats ({unit})": lambda: db_manager.get_item_stats(unit=unit, limit=1000),
+        'augment stats': lambda: db_manager.get_augment_stats(limit=1000),
+    }
+
+
+def duckdb_reports(analytics: DuckDBAnalytics, min_games: int, comp: str, unit: str, region: str):
+    """Same reports through DuckDB, in the shapes returned by sqlalchemy_reports"""
+    return {
+        'top comps': lambda: analytics.get_top_comps(limit=None, min_games=min_games),
+        f"top comps ({region})": lambda: analytics.get_top_comps(limit=None, min_games=min_games, region=region),
+        'comp details': lambda: analytics.get_comp_details(comp),
+        'unit stats': lambda: analytics.get_unit_stats(limit=1000),
+        f"item stats ({unit})": lambda: analytics.get_item_stats(unit=unit, limit=1000),
+        'augment stats': lambda: analytics.get_augment_stats(limit=1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark meta reports: SQLAlchemy vs. DuckDB')
+    parser.add_argument('--matches', type=int, default=125000, help='Synthetic matches (8 participants each)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Matches per add_matches call')
+    parser.add_argument('--min-games', type=int, default=50, help='Minimum games for a meta cell')
+
+    args = parser.parse_args()
+
+    db_manager.use_profile('bulk_ingest')
+    db_manager.init_db()
+    results = {}
+    try:
+        fill_database(args.matches, args.batch_size)
+        participants = db_manager.get_database_stats()['total_compositions']
+
+        # The SQLAlchemy top comps read meta_stats: rebuilding it is their share of the work
+        _, cube_seconds = timed(lambda: db_manager.recompute_meta_cube(min_games=args.min_games))
+        comp = db_manager.get_top_comps(limit=1, min_games=args.min_games, order_by='play_count')[0].comp_signature
+        unit = db_manager.get_unit_stats(limit=1)[0]['name']
+        region = next(db_manager.iter_recent_matches(columns=['region'], limit=1)).region
+
+        reference = {}
+        for name, report in sqlalchemy_reports(args.min_games, comp, unit, region).items():
+            reference[name], seconds = timed(report)
+            results.setdefault(name, {})['sqlalchemy'] = seconds
+
+        sources = {'sqlite': {}}
+        try:
+            from meta_analysis.snapshot_export import export_snapshots
+            snapshot_dir = os.path.join(_bench_dir, 'snapshots')
+            _, export_seconds = timed(lambda: export_snapshots(snapshot_dir=snapshot_dir))
+            sources['snapshot'] = {'snapshot_dir': snapshot_dir}
+        except ImportError as e:
+            export_seconds = None
+            print(f"⚠ Snapshot source skipped: {e}")
+
+        mismatches = []
+        for source, options in sources.items():
+            try:
+                analytics = DuckDBAnalytics(source=source, **options)
+            except (ImportError, RuntimeError) as e:
+                print(f"⚠ DuckDB {source} source skipped: {e}")
+                continue
+            for name, report in duckdb_reports(analytics, args.min_games, comp, unit, region).items():
+                result, seconds = timed(report)
+                results[name][source] = seconds
+                if result != reference[name]:
+                    mismatches.append(f"{name} ({source})")
+            analytics.close()
+    finally:
+        db_manager.engine.dispose()
+        shutil.rmtree(_bench_dir, ignore_errors=True)
+
+    columns = ['sqlalchemy', 'sqlite', 'snapshot']
+    print(f"\n{'='*80}")
+    print(f"META REPORT BENCHMARK ({args.matches} matches, {participants} participants)")
+    print(f"{'='*80}")
+    print(f"{'report':<28}" + ''.join(f"{'duckdb ' + c if c != 'sqlalchemy' else c:>17}" for c in columns))
+    for name, seconds in results.items():
+        cells = [f"{seconds[c]:>16.3f}s" if c in seconds else f"{'-':>17}" for c in columns]
+        print(f"{name:<28}" + ''.join(cells))
+    print(f"\nMeta cube rebuild (SQLAlchemy top comps prerequisite): {cube_seconds:.2f}s")
+    if export_seconds is not None:
+        print(f"Parquet snapshot export: {export_seconds:.2f}s")
+    if mismatches:
+        print(f"✗ Results differ from SQLAlchemy: {', '.join(mismatches)}")
+    else:
+        print("✓ DuckDB results identical to SQLAlchemy")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
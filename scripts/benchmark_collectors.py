@@ -0,0 +1,136 @@
+"""
+Collector throughput benchmark against the local mock Riot API
+
+Starts scripts/mock_riot_server.py in-process, points a RiotClient at it and runs
+collect_gm_players + collect_matches_batch (and optionally the async engine) on
+a throwaway SQLite database, then reports players/second and matches/second.
+
+Usage:
+    python scripts/benchmark_collectors.py --region euw1 --players 50 --matches 10
+    python scripts/benchmark_collectors.py --app-limit 500:10,30000:600 --latency-ms 30 --engine both
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+# Throwaway database and no raw archive: must be set before importing config
+_bench_dir = tempfile.mkdtemp(prefix='tft_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_bench_dir, 'bench.db')}"
+os.environ['MATCH_ARCHIVE_ENABLED'] = '0'
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from data_collection.gm_collector import collect_gm_players
+from data_collection.batch_match_collector import collect_matches_batch
+from data_collection.async_match_collector import collect_matches_async
+from data_collection.rate_limiter import RateLimiter
+from data_collection.resilience import RetryStats
+from data_collection.riot_client import RiotClient
+from data_collection.match_archive import MatchArchive
+from database.db_manager import db_manager
+from scripts.mock_riot_server import MockRiotWorld, MockRiotServer
+from config import ASYNC_CONCURRENCY_PER_CLUSTER
+
+
+def run_benchmark(regions, players_per_tier, matches_per_player, engine, server, concurrency):
+    """Run the collectors against the mock server and return a results dict"""
+    api_key = 'RGAPI-benchmark'
+    client = RiotClient(api_key, limiter=RateLimiter(), base_url=server.url)
+    results = {}
+
+    # Players
+    start = time.time()
+    players_saved = 0
+    for region in regions:
+        players_saved += collect_gm_players(api_key=api_key, region=region,
+                                            max_per_tier=players_per_tier, client=client)
+    results['players'] = (players_saved, time.time() - start)
+
+    # Matches
+    engines = ['batch', 'async'] if engine == 'both' else [engine]
+    for name in engines:
+        db_manager.clear_match_data()
+        start = time.time()
+        if name == 'batch':
+            new_matches = sum(
+                collect_matches_batch(api_key=api_key, region=region,
+                                      matches_per_player=matches_per_player, client=client) or 0
+                for region in regions
+            )
+        else:
+            new_matches = collect_matches_async(api_key=api_key, regions=regions,
+                                                matches_per_player=matches_per_player,
+                                                concurrency=concurrency, client=client)
+        results[name] = (new_matches, time.time() - start)
+
+    results['retries'] = RetryStats.format(client.retry_stats.snapshot())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark collectors against the mock Riot API')
+    parser.add_argument('--region', type=str, nargs='+', default=['euw1'],
+                       help='Region(s) to collect from')
+    parser.add_argument('--players', type=int, default=50, help='Players per tier to collect')
+    parser.add_argument('--matches', type=int, default=10, help='Matches per player to collect')
+    parser.add_argument('--engine', type=str, default='batch', choices=['batch', 'async', 'both'],
+                       help='Match collection engine to benchmark')
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY_PER_CLUSTER,
+                       help='Requests in flight per cluster for the async engine')
+    parser.add_argument('--world-players', type=int, default=300, help='Synthetic players per platform')
+    parser.add_argument('--world-matches', type=int, default=3000, help='Synthetic matches per platform')
+    parser.add_argument('--archive', type=str, default=None,
+                       help='Serve data from this match_archive directory instead of synthetic data')
+    parser.add_argument('--app-limit', type=str, default='20:1,100:120', help='Mock app rate limit')
+    parser.add_argument('--method-limit', type=str, default='500:10', help='Mock method rate limit')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Mock response latency')
+    parser.add_argument('--jitter-ms', type=float, default=10, help='Mock latency jitter')
+    parser.add_argument('--error-429-rate', type=float, default=0.0,
+                       help='Fraction of requests answered with an injected 429')
+
+    args = parser.parse_args()
+
+    if args.archive:
+        world = MockRiotWorld.from_archive(MatchArchive(args.archive))
+    else:
+        world = MockRiotWorld(players_per_platform=args.world_players,
+                              matches_per_platform=args.world_matches)
+    server = MockRiotServer(world, app_limit=args.app_limit, method_limit=args.method_limit,
+                            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            error_429_rate=args.error_429_rate).start()
+
+    db_manager.use_profile('bulk_ingest')
+    db_manager.init_db()
+    print(f"Mock Riot API on {server.url} (app limit {args.app_limit}, "
+          f"method limit {args.method_limit}, latency {args.latency_ms}±{args.jitter_ms}ms)")
+
+    try:
+        results = run_benchmark(args.region, args.players, args.matches, args.engine,
+                                server, args.concurrency)
+    finally:
+        server.stop()
+        db_manager.engine.dispose()
+        shutil.rmtree(_bench_dir, ignore_errors=True)
+
+    print(f"\n{'='*70}")
+    print("BENCHMARK RESULTS")
+    print(f"{'='*70}")
+    players, seconds = results['players']
+    print(f"{'collect_gm_players':<25} {players:>8} players  {seconds:>8.1f}s  "
+          f"{players / seconds if seconds else 0:>8.1f} players/s")
+    for name in ('batch', 'async'):
+        if name in results:
+            matches, seconds = results[name]
+            print(f"{'matches (' + name + ')':<25} {matches:>8} matches  {seconds:>8.1f}s  "
+                  f"{matches / seconds if seconds else 0:>8.1f} matches/s")
+    print(f"\nClient retries: {results['retries']}")
+    print(f"Server: {server.stats}")
+    print(f"{'='*70}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Database ingest benchmark on synthetic matches
+
+Generates deterministic match payloads with the mock Riot world, parses them with
+build_match_data and measures how fast they are written to a throwaway SQLite
+database. Only the database calls are timed. Three paths are compared:
+
+    legacy  the pre-bulk ingest kept here as the baseline: one transaction per
+            match, ORM adds with a flush per row and one Player query per
+            participant (matches, participants and compositions only, so it
+            writes less than the current paths and the speedup is a lower bound)
+    row     the current add_match, one call (and transaction) per match
+    bulk    the current add_matches, --batch-size matches per transaction
+
+Usage:
+    python scripts/benchmark_ingest.py --matches 100000 --batch-size 500
+    python scripts/benchmark_ingest.py --matches 20000 --row-matches 2000
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+from datetime import datetime
+from typing import Dict
+
+# Throwaway database and no raw archive: must be set before importing config
+_bench_dir = tempfile.mkdtemp(prefix='tft_ingest_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_bench_dir, 'bench.db')}"
+os.environ['MATCH_ARCHIVE_ENABLED'] = '0'
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tqdm import tqdm
+
+from config import REGIONS
+from data_collection.batch_match_collector import build_match_data
+from data_collection.match_archive import get_region_for_match_id
+from database.db_manager import db_manager
+from database.models import Match, Participant, Composition, Player
+from scripts.mock_riot_server import MockRiotWorld
+
+
+def iter_match_batches(world: MockRiotWorld, match_ids, batch_size: int):
+    """Yield lists of parsed match dicts"""
+    batch = []
+    for match_id in match_ids:
+        batch.append(build_match_data(world.match(match_id), get_region_for_match_id(match_id)))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def legacy_add_match(match_data: Dict):
+    """The per-row ORM ingest add_match used before the bulk inserts (benchmark baseline)"""
+    session = db_manager.get_session()
+    try:
+        if session.query(Match).filter_by(match_id=match_data['match_id']).first():
+            return
+        match = Match(
+            match_id=match_data['match_id'],
+            game_datetime=datetime.fromtimestamp(match_data['game_datetime'] / 1000),
+            game_length=match_data.get('game_length', 0),
+            tft_set_number=match_data.get('tft_set_number', 0),
+            patch=match_data.get('patch', 'unknown'),
+            region=match_data.get('region', 'unknown')
+        )
+        session.add(match)
+        session.flush()
+        for p_data in match_data.get('participants', []):
+            player = session.query(Player).filter_by(puuid=p_data['puuid']).first()
+            participant = Participant(
+                match_id=match.id,
+                player_id=player.id if player else None,
+                puuid=p_data['puuid'],
+                placement=p_data['placement'],
+                level=p_data.get('level', 0),
+                gold_left=p_data.get('gold_left', 0),
+                total_damage_to_players=p_data.get('total_damage_to_players', 0),
+                players_eliminated=p_data.get('players_eliminated', 0),
+                time_eliminated=p_data.get('time_eliminated', 0.0)
+            )
+            session.add(participant)
+            session.flush()
+            session.add(Composition(
+                participant_id=participant.id,
+                traits=p_data.get('traits', []),
+                units=p_data.get('units', []),
+                augments=p_data.get('augments', []),
+                comp_signature=db_manager._generate_comp_signature(p_data.get('traits', []))
+            ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def time_ingest(world: MockRiotWorld, match_ids, mode: str, batch_size: int) -> float:
+    """Write the matches with legacy_add_match, add_match ('row') or add_matches ('bulk'), returns DB seconds"""
+    seconds = 0.0
+    with tqdm(total=len(match_ids), desc=f"Ingest ({mode})") as pbar:
+        for batch in iter_match_batches(world, match_ids, batch_size):
+            start = time.perf_counter()
+            if mode == 'legacy':
+                for match_data in batch:
+                    legacy_add_match(match_data)
+            elif mode == 'row':
+                for match_data in batch:
+                    db_manager.add_match(match_data)
+            else:
+                db_manager.add_matches(batch)
+            seconds += time.perf_counter() - start
+            pbar.update(len(batch))
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark database ingest on synthetic matches')
+    parser.add_argument('--matches', type=int, default=100000, help='Synthetic matches for the bulk path')
+    parser.add_argument('--row-matches', type=int, default=5000,
+                       help='Matches for the legacy and one-call-per-match paths (0 = skip)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Matches per add_matches call')
+    parser.add_argument('--tracked-players', type=int, default=300,
+                       help='Players per platform stored in the players table')
+
+    args = parser.parse_args()
+
+    # Spread the matches over every platform like a multi-region crawl
+    per_platform = -(-max(args.matches, args.row_matches) // len(REGIONS))
+    world = MockRiotWorld(players_per_platform=max(args.tracked_players, 100),
+                          matches_per_platform=per_platform)
+    all_ids = list(world.match_meta)
+
+    db_manager.use_profile('bulk_ingest')
+    db_manager.init_db()
+    for region, puuids in world.players.items():
+        for idx, puuid in enumerate(puuids[:args.tracked_players]):
+            db_manager.add_player(puuid=puuid, game_name=f"BENCH_{idx}", tag_line=region.upper(),
+                                  tier='CHALLENGER', rank='I', lp=1000, region=region)
+
+    results = {}
+    try:
+        if args.row_matches:
+            row_ids = all_ids[:args.row_matches]
+            for mode in ('legacy', 'row'):
+                results[mode] = (len(row_ids), time_ingest(world, row_ids, mode, args.batch_size))
+                db_manager.clear_match_data()
+
+        bulk_ids = all_ids[:args.matches]
+        results['bulk'] = (len(bulk_ids), time_ingest(world, bulk_ids, 'bulk', args.batch_size))
+        stored = db_manager.get_match_count()
+    finally:
+        db_manager.engine.dispose()
+        shutil.rmtree(_bench_dir, ignore_errors=True)
+
+    print(f"\n{'='*70}")
+    print("INGEST BENCHMARK RESULTS")
+    print(f"{'='*70}")
+    labels = {
+        'legacy': 'legacy per-row ORM',
+        'row': 'add_match (per match)',
+        'bulk': f"add_matches ({args.batch_size}/batch)",
+    }
+    rates = {mode: matches / seconds if seconds else 0 for mode, (matches, seconds) in results.items()}
+    for mode, (matches, seconds) in results.items():
+        print(f"{labels[mode]:<28} {matches:>8} matches  {seconds:>8.1f}s  {rates[mode]:>10.1f} matches/s")
+    if rates.get('legacy'):
+        print(f"\nSpeedup over the legacy per-row ORM path: add_match {rates['row'] / rates['legacy']:.1f}x, "
+              f"add_matches {rates['bulk'] / rates['legacy']:.1f}x (the legacy path skips the detail and "
+              f"aggregate tables)")
+    print(f"Stored after bulk run: {stored} matches")
+    print(f"{'='*70}\n")
+
+
+if __name__ == "__main__":
+    main()
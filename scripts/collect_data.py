@@ -12,9 +12,16 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from data_collection.gm_collector import collect_gm_players
 from data_collection.batch_match_collector import collect_matches_batch
+from data_collection.async_match_collector import collect_matches_async
+from data_collection.parallel_collector import collect_regions_parallel
+from data_collection.crawl_journal import CrawlJournal
+from data_collection.shutdown import shutdown
+from data_collection.resilience import RetryStats
+from data_collection.riot_client import get_client
 from meta_analysis.meta_report import update_meta_stats
 from database.db_manager import db_manager
-from config import GM_PLAYERS_PER_REGION, MATCHES_PER_PLAYER, MIN_GAMES_FOR_META
+from config import (GM_PLAYERS_PER_REGION, MATCHES_PER_PLAYER, MIN_GAMES_FOR_META, ASYNC_CONCURRENCY_PER_CLUSTER,
+                    CRAWL_API_BUDGET)
 
 
 def main():
@@ -31,6 +38,18 @@ Examples:
   
   # Full pipeline: collect players, matches, and update meta
   python collect_data.py --region euw1 --full-pipeline
+  
+  # Async match collection (8 requests in flight per routing cluster)
+  python collect_data.py --region euw1 na1 kr --async --concurrency 8
+  
+  # Run regions in parallel (one worker per routing cluster)
+  python collect_data.py --region euw1 na1 kr --parallel
+  
+  # Spend at most 2000 API calls on matches, most active players first
+  python collect_data.py --region euw1 --skip-players --budget 2000
+  
+  # Continue the last interrupted run (Ctrl-C, crash, expired key)
+  python collect_data.py --resume
         """
     )
     
@@ -50,6 +69,16 @@ Examples:
                        help='Run full pipeline: collect players, matches, and update meta')
     parser.add_argument('--challenger-only', action='store_true',
                        help='Only collect Challenger players')
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                       help='Collect matches with the asyncio engine (all regions at once)')
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY_PER_CLUSTER,
+                       help=f'Requests in flight per routing cluster in --async mode (default: {ASYNC_CONCURRENCY_PER_CLUSTER})')
+    parser.add_argument('--parallel', action='store_true',
+                       help='Run regions concurrently (one worker per routing cluster; --async already covers matches)')
+    parser.add_argument('--budget', type=int, default=CRAWL_API_BUDGET,
+                       help='Maximum API calls for match collection, shared by all regions (default: no limit)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the last interrupted run with its regions and settings')
     
     args = parser.parse_args()
     
@@ -64,44 +93,111 @@ Examples:
     
     # Initialize database
     print("\nInitializing database...")
+    db_manager.use_profile('bulk_ingest')
     db_manager.init_db()
+    print(f"✓ SQLite profile: {db_manager.profile}")
     
     regions = args.region if isinstance(args.region, list) else [args.region]
     
+    journal = CrawlJournal.resume() if args.resume else None
+    if args.resume and journal is None:
+        print("⚠ No interrupted run to resume, starting a new one")
+    if journal:
+        # Continue with the settings of the interrupted run
+        regions = journal.regions
+        args.matches = journal.matches_per_player
+        args.budget = journal.budget
+        print(f"✓ Resuming run #{journal.run_id}")
+    else:
+        journal = CrawlJournal.start(regions, args.matches, args.budget)
+    
+    # First Ctrl-C / SIGTERM stops gracefully instead of killing the run
+    shutdown.install()
+    
     print(f"\n{'='*70}")
     print(f"TFT META TRACKER - DATA COLLECTION")
     print(f"{'='*70}")
     print(f"Regions: {', '.join(r.upper() for r in regions)}")
     print(f"Players per tier: {args.players}")
     print(f"Matches per player: {args.matches}")
+    if args.budget:
+        print(f"API budget: {args.budget} calls")
     print(f"{'='*70}\n")
     
-    # Step 1: Collect Players
-    if not args.skip_players:
-        for region in regions:
-            print(f"\n[STEP 1/{len(regions)}] Collecting GM+ players from {region.upper()}...")
-            collect_gm_players(
-                api_key=api_key,
-                region=region,
-                include_challenger=True,
-                include_grandmaster=not args.challenger_only,
-                max_per_tier=args.players
-            )
+    region_summary = None
+    
+    if args.parallel and not args.async_mode:
+        # Steps 1 + 2: players and matches for all regions at once
+        print(f"\n[STEP 1+2] Collecting players and matches in parallel...")
+        region_summary = collect_regions_parallel(
+            api_key=api_key,
+            regions=regions,
+            collect_players=not args.skip_players,
+            collect_matches=not args.skip_matches,
+            max_per_tier=args.players,
+            include_grandmaster=not args.challenger_only,
+            matches_per_player=args.matches,
+            budget=args.budget,
+            journal=journal
+        )
     else:
-        print("\n[STEP 1] Skipping player collection\n")
+        # Step 1: Collect Players
+        if not args.skip_players:
+            for region in regions:
+                if shutdown.requested:
+                    break
+                if journal.players_collected(region):
+                    print(f"\n[STEP 1] {region.upper()} players already collected in this run")
+                    continue
+                print(f"\n[STEP 1/{len(regions)}] Collecting GM+ players from {region.upper()}...")
+                collect_gm_players(
+                    api_key=api_key,
+                    region=region,
+                    include_challenger=True,
+                    include_grandmaster=not args.challenger_only,
+                    max_per_tier=args.players
+                )
+                journal.mark_players_collected(region)
+        else:
+            print("\n[STEP 1] Skipping player collection\n")
     
-    # Step 2: Collect Matches
-    if not args.skip_matches:
-        for region in regions:
-            print(f"\n[STEP 2/{len(regions)}] Collecting matches from {region.upper()}...")
-            collect_matches_batch(
+        # Step 2: Collect Matches
+        if not args.skip_matches and args.async_mode:
+            print(f"\n[STEP 2] Collecting matches from {', '.join(r.upper() for r in regions)} (async)...")
+            collect_matches_async(
                 api_key=api_key,
-                region=region,
+                regions=regions,
                 max_players=None,  # Process all players in DB
-                matches_per_player=args.matches
+                matches_per_player=args.matches,
+                concurrency=args.concurrency,
+                budget=args.budget,
+                journal=journal
             )
-    else:
-        print("\n[STEP 2] Skipping match collection\n")
+        elif not args.skip_matches:
+            crawl_budget = journal.crawl_budget()
+            for region in regions:
+                if shutdown.requested:
+                    break
+                if journal.matches_collected(region):
+                    print(f"\n[STEP 2] {region.upper()} matches already collected in this run")
+                    continue
+                print(f"\n[STEP 2/{len(regions)}] Collecting matches from {region.upper()}...")
+                collect_matches_batch(
+                    api_key=api_key,
+                    region=region,
+                    max_players=None,  # Process all players in DB
+                    matches_per_player=args.matches,
+                    journal=journal,
+                    crawl_budget=crawl_budget
+                )
+        else:
+            print("\n[STEP 2] Skipping match collection\n")
+    
+    if shutdown.requested:
+        journal.finish(interrupted=True)
+        print(f"\n⚠ Collection stopped; everything fetched so far is saved")
+        print(f"  Continue with: python scripts/collect_data.py --resume")
+        return 1
     
     # Step 3: Update Meta Statistics
     if not args.skip_meta_update or args.full_pipeline:
@@ -110,6 +206,8 @@ Examples:
     else:
         print("\n[STEP 3] Skipping meta update\n")
     
+    journal.finish()
+    
     # Final summary
     db_stats = db_manager.get_database_stats()
     
@@ -120,6 +218,17 @@ Examples:
     print(f"Total Matches: {db_stats['total_matches']}")
     print(f"Total Compositions: {db_stats['total_compositions']}")
     print(f"Meta Stats Entries: {db_stats['total_meta_stats']}")
+    print(f"API Retries: {RetryStats.format(get_client(api_key).retry_stats.snapshot())}")
+    
+    if region_summary:
+        print(f"\n{'Region':<10} {'Players saved':<15} {'New matches':<15} {'Match time':<10}")
+        print("-" * 50)
+        for region, stats in region_summary.items():
+            print(f"{region.upper():<10} {stats['players_saved']:<15} {stats['new_matches']:<15} "
+                  f"{stats.get('match_seconds', 0):.0f}s")
+        print("-" * 50)
+        print(f"{'TOTAL':<10} {sum(s['players_saved'] for s in region_summary.values()):<15} "
+              f"{sum(s['new_matches'] for s in region_summary.values()):<15}")
     print(f"{'='*70}\n")
     
     print("✓ Data collection pipeline complete!")
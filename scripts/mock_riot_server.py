@@ -0,0 +1,354 @@
+"""
+Mock Riot API - Local stand-in server for collector throughput benchmarks
+
+Serves synthetic (or archived, see --archive) TFT responses under /{host}/...,
+which is where RiotClient sends requests when RIOT_API_BASE_URL is set:
+
+    /{platform}/tft/league/v1/challenger
+    /{platform}/tft/league/v1/grandmaster
+    /{routing}/tft/match/v1/matches/by-puuid/{puuid}/ids?count=&startTime=
+    /{routing}/tft/match/v1/matches/{match_id}
+
+App and method rate limits are enforced per host with the same headers Riot
+sends, and latency and 429s can be injected.
+
+Usage:
+    python scripts/mock_riot_server.py --port 8765 --app-limit 20:1,100:120 --latency-ms 40
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import ROUTINGS
+from data_collection.rate_limiter import parse_rate_limit_header
+from data_collection.match_archive import MatchArchive, get_region_for_match_id
+
+PLATFORM_PREFIX = {'eune1': 'EUN1'}
+TRAITS = ['Bruiser', 'Sorcerer', 'Sniper', 'Bastion', 'Rebel', 'Invoker', 'Duelist',
+          'Enforcer', 'Visionary', 'Sentinel', 'Dominator', 'Artillerist']
+UNITS = [f"TFT13_Unit{i:02d}" for i in range(60)]
+ITEMS = [f"TFT_Item_{name}" for name in ('InfinityEdge', 'Bloodthirster', 'GuinsoosRageblade',
+                                         'WarmogsArmor', 'DragonsClaw', 'JeweledGauntlet',
+                                         'RabadonsDeathcap', 'GiantSlayer', 'TitansResolve')]
+AUGMENTS = [f"TFT13_Augment_{i:02d}" for i in range(80)]
+
+
+class HostLimiter:
+    """Server-side fixed windows for one (host, limit) pair"""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.windows = {seconds: [None, 0] for _, seconds in limits}  # seconds -> [start, count]
+
+    def hit(self, now: float) -> Optional[float]:
+        """Count a request, or return seconds until it would be allowed"""
+        for limit, seconds in self.limits:
+            window = self.windows[seconds]
+            if window[0] is not None and now >= window[0] + seconds:
+                window[0], window[1] = None, 0
+            if window[1] >= limit:
+                return window[0] + seconds - now
+
+        for _, seconds in self.limits:
+            window = self.windows[seconds]
+            if window[0] is None:
+                window[0] = now
+            window[1] += 1
+        return None
+
+    def header(self):
+        return ",".join(f"{limit}:{seconds}" for limit, seconds in self.limits)
+
+    def count_header(self):
+        return ",".join(f"{self.windows[seconds][1]}:{seconds}" for _, seconds in self.limits)
+
+
+class MockRiotWorld:
+    """Deterministic synthetic ladder and match history"""
+
+    def __init__(self, players_per_platform: int = 300, matches_per_platform: int = 3000,
+                 seed: int = 7):
+        self.seed = seed
+        self.payloads: Dict[str, Dict] = {}  # Archived payloads served as-is
+        self.players: Dict[str, List[str]] = {}
+        self.match_ids_by_puuid: Dict[str, List[str]] = {}
+        self.match_meta: Dict[str, Dict] = {}  # match_id -> {'participants': [...], 'game_datetime': ms}
+
+        now_ms = int(time.time() * 1000)
+        for platforms in ROUTINGS.values():
+            for platform in platforms:
+                rng = random.Random(f"{seed}-{platform}")
+                prefix = PLATFORM_PREFIX.get(platform, platform.upper())
+                players = [f"{platform}-player-{i:05d}" for i in range(players_per_platform)]
+                self.players[platform] = players
+
+                # Oldest first, so each player's list ends up newest first after reversing
+                for k in range(matches_per_platform):
+                    match_id = f"{prefix}_{1000000 + k}"
+                    participants = rng.sample(players, min(8, len(players)))
+                    game_datetime = now_ms - (matches_per_platform - k) * 60_000
+                    self.match_meta[match_id] = {'participants': participants,
+                                                 'game_datetime': game_datetime}
+                    for puuid in participants:
+                        self.match_ids_by_puuid.setdefault(puuid, []).append(match_id)
+
+        for match_ids in self.match_ids_by_puuid.values():
+            match_ids.reverse()
+
+    @classmethod
+    def from_archive(cls, archive: MatchArchive) -> 'MockRiotWorld':
+        """Build the ladder and match histories from archived payloads (kept in memory)"""
+        world = cls(players_per_platform=0, matches_per_platform=0)
+        players = {}
+
+        for payload in archive.iter_payloads():
+            match_id = payload.get('metadata', {}).get('match_id')
+            info = payload.get('info', {})
+            if not match_id:
+                continue
+            participants = [p.get('puuid') for p in info.get('participants', [])]
+            world.payloads[match_id] = payload
+            world.match_meta[match_id] = {'participants': participants,
+                                          'game_datetime': info.get('game_datetime', 0)}
+            platform = get_region_for_match_id(match_id)
+            for puuid in participants:
+                players.setdefault(platform, {})[puuid] = True
+                world.match_ids_by_puuid.setdefault(puuid, []).append(match_id)
+
+        world.players = {platform: list(puuids) for platform, puuids in players.items()}
+        for match_ids in world.match_ids_by_puuid.values():
+            match_ids.sort(key=lambda m: world.match_meta[m]['game_datetime'], reverse=True)
+        return world
+
+    def league(self, platform: str, tier: str) -> Dict:
+        players = self.players.get(platform, [])
+        half = len(players) // 2
+        entries = players[:half] if tier == 'challenger' else players[half:]
+        return {
+            'tier': tier.upper(),
+            'entries': [
+                {'puuid': puuid, 'leaguePoints': 1500 - i, 'rank': 'I',
+                 'wins': 100 + i % 50, 'losses': 80 + i % 40}
+                for i, puuid in enumerate(entries)
+            ],
+        }
+
+    def match_ids(self, puuid: str, count: int, start_time: Optional[int]) -> List[str]:
+        match_ids = self.match_ids_by_puuid.get(puuid, [])
+        if start_time is not None:
+            match_ids = [m for m in match_ids
+                         if self.match_meta[m]['game_datetime'] // 1000 >= start_time]
+        return match_ids[:count]
+
+    def match(self, match_id: str) -> Optional[Dict]:
+        if match_id in self.payloads:
+            return self.payloads[match_id]
+
+        meta = self.match_meta.get(match_id)
+        if meta is None:
+            return None
+
+        rng = random.Random(f"{self.seed}-{match_id}")
+        participants = []
+        for placement, puuid in enumerate(meta['participants'], 1):
+            traits = rng.sample(TRAITS, 6)
+            participants.append({
+                'puuid': puuid,
+                'placement': placement,
+                'level': rng.randint(7, 10),
+                'gold_left': rng.randint(0, 40),
+                'last_round': rng.randint(20, 40),
+                'players_eliminated': rng.randint(0, 3),
+                'time_eliminated': rng.uniform(1200, 2400),
+                'total_damage_to_players': rng.randint(20, 200),
+                'augments': rng.sample(AUGMENTS, 3),
+                'traits': [
+                    {'name': name, 'num_units': rng.randint(1, 7), 'style': rng.randint(0, 4),
+                     'tier_current': rng.randint(0, 3), 'tier_total': 3}
+                    for name in traits
+                ],
+                'units': [
+                    {'character_id': unit, 'tier': rng.randint(1, 3), 'rarity': rng.randint(0, 6),
+                     'itemNames': rng.sample(ITEMS, rng.randint(0, 3))}
+                    for unit in rng.sample(UNITS, rng.randint(6, 10))
+                ],
+            })
+
+        return {
+            'metadata': {'match_id': match_id, 'participants': meta['participants']},
+            'info': {
+                'game_datetime': meta['game_datetime'],
+                'game_length': rng.uniform(1800, 2400),
+                'game_version': 'Version 14.23.632.1234 (Nov 20 2024/12:00:00) [PUBLIC]',
+                'tft_set_number': 13,
+                'queue_id': 1100,
+                'participants': participants,
+            },
+        }
+
+
+class MockRiotServer:
+    """Threaded HTTP server wrapping a MockRiotWorld"""
+
+    def __init__(self, world: MockRiotWorld, host: str = '127.0.0.1', port: int = 0,
+                 app_limit: str = '20:1,100:120', method_limit: str = '500:10',
+                 latency_ms: float = 0, jitter_ms: float = 0, error_429_rate: float = 0):
+        self.world = world
+        self.app_limits = parse_rate_limit_header(app_limit)
+        self.method_limits = parse_rate_limit_header(method_limit)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_429_rate = error_429_rate
+        self.limiters: Dict[tuple, HostLimiter] = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, '200': 0, '404': 0, '429_limit': 0, '429_injected': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _limiter(self, key, limits) -> HostLimiter:
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            limiter = self.limiters[key] = HostLimiter(limits)
+        return limiter
+
+    def _route(self, host: str, path: str, query: Dict):
+        """Returns (status, body, method name)"""
+        parts = path.strip('/').split('/')
+
+        if parts[:3] == ['tft', 'league', 'v1'] and len(parts) == 4:
+            return 200, self.world.league(host, parts[3]), f"league-{parts[3]}"
+
+        if parts[:4] == ['tft', 'match', 'v1', 'matches']:
+            if len(parts) == 7 and parts[4] == 'by-puuid' and parts[6] == 'ids':
+                count = int(query.get('count', ['20'])[0])
+                start_time = query.get('startTime', [None])[0]
+                ids = self.world.match_ids(parts[5], count, int(start_time) if start_time else None)
+                return 200, ids, 'match-ids'
+            if len(parts) == 5:
+                payload = self.world.match(parts[4])
+                if payload is None:
+                    return 404, {'status': {'status_code': 404, 'message': 'Data not found'}}, 'match'
+                return 200, payload, 'match'
+
+        return 404, {'status': {'status_code': 404, 'message': 'Not found'}}, 'unknown'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                host, _, path = parsed.path.lstrip('/').partition('/')
+                status, body, method = server._route(host, '/' + path, parse_qs(parsed.query))
+
+                delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                headers = {}
+                with server.lock:
+                    server.stats['requests'] += 1
+                    now = time.monotonic()
+                    app = server._limiter((host,), server.app_limits)
+                    method_limiter = server._limiter((host, method), server.method_limits)
+
+                    wait = app.hit(now)
+                    limit_type = 'application'
+                    if wait is None:
+                        wait = method_limiter.hit(now)
+                        limit_type = 'method'
+
+                    headers['X-App-Rate-Limit'] = app.header()
+                    headers['X-App-Rate-Limit-Count'] = app.count_header()
+                    headers['X-Method-Rate-Limit'] = method_limiter.header()
+                    headers['X-Method-Rate-Limit-Count'] = method_limiter.count_header()
+
+                    if wait is not None:
+                        status, body = 429, {'status': {'status_code': 429, 'message': 'Rate limit exceeded'}}
+                        headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+                        headers['X-Rate-Limit-Type'] = limit_type
+                        server.stats['429_limit'] += 1
+                    elif random.random() < server.error_429_rate:
+                        # Service-level 429: no Retry-After
+                        status, body = 429, {'status': {'status_code': 429, 'message': 'Rate limit exceeded'}}
+                        headers['X-Rate-Limit-Type'] = 'service'
+                        server.stats['429_injected'] += 1
+                    else:
+                        server.stats[str(status)] = server.stats.get(str(status), 0) + 1
+
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json;charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'MockRiotServer':
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local Riot API stand-in for benchmarks')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--players', type=int, default=300, help='Players per platform')
+    parser.add_argument('--matches', type=int, default=3000, help='Matches per platform')
+    parser.add_argument('--app-limit', type=str, default='20:1,100:120')
+    parser.add_argument('--method-limit', type=str, default='500:10')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-429-rate', type=float, default=0,
+                        help='Fraction of requests answered with a service 429')
+    parser.add_argument('--archive', type=str, default=None,
+                        help='Serve players and matches from this match_archive directory instead of synthetic data')
+
+    args = parser.parse_args()
+
+    if args.archive:
+        world = MockRiotWorld.from_archive(MatchArchive(args.archive))
+    else:
+        world = MockRiotWorld(players_per_platform=args.players, matches_per_platform=args.matches)
+    server = MockRiotServer(
+        world, port=args.port, app_limit=args.app_limit, method_limit=args.method_limit,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_429_rate=args.error_429_rate
+    )
+
+    print(f"✓ Mock Riot API listening on {server.url}")
+    print(f"  Set RIOT_API_BASE_URL={server.url} to point the collectors at it")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock server")
+        server.stop()
@@ -0,0 +1,320 @@
+"""
+Query plan advisor for the DatabaseManager queries (SQLite)
+
+Runs every read query of db_manager with sample arguments taken from the
+database, captures the SQL it sends, and shows SQLite's EXPLAIN QUERY PLAN
+for each statement with its time. Plans are flagged:
+
+    ✗ SCAN table            full table scan (every row read)
+    ⚠ SCAN ... USING INDEX  full index scan (every index entry read)
+    ⚠ TEMP B-TREE           sort or grouping that cannot use an index
+
+Scans of small tables (the unit / trait / item / augment dictionaries) and of
+materialized subqueries are not flagged.
+
+With --compare the query indexes of the models (QUERY_INDEXES) are first
+swapped back for the single-column indexes they superseded and everything is
+timed, then the query indexes are recreated and everything is timed again.
+Indexes are rebuilt on the same database: use a copy or --matches.
+
+Usage:
+    python scripts/query_advisor.py                              # configured database
+    python scripts/query_advisor.py --db /path/copy.db --compare
+    python scripts/query_advisor.py --matches 125000 --compare   # throwaway synthetic database (1M participants)
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event, select, desc, func
+
+from config import DATABASE_URL, REGIONS
+from database.db_manager import DatabaseManager, QUERY_INDEXES, SUPERSEDED_INDEXES
+from database.models import Base, Player, Match, Participant, Composition
+
+# Tables below this many rows are cheaper to scan than to search
+SMALL_TABLE_ROWS = 5000
+
+
+@contextmanager
+def capture_statements(engine):
+    """Collect the (statement, parameters) of every SELECT run on the engine"""
+    captured = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+
+
+def sample_arguments(manager: DatabaseManager) -> Dict:
+    """Realistic arguments for the queries: a popular comp, a patch, a region, some players and matches"""
+    session = manager.get_session()
+    try:
+        comp = session.execute(
+            select(Composition.comp_signature).where(Composition.comp_signature != 'unknown')
+            .group_by(Composition.comp_signature).order_by(desc(func.count())).limit(1)).scalar()
+        newest = session.execute(select(Match.id, Match.patch, Match.region)
+                                 .order_by(desc(Match.id)).limit(1)).first()
+        puuids = list(session.scalars(select(Participant.puuid).order_by(desc(Participant.id)).limit(500)))
+        player_region = session.execute(select(Player.region).group_by(Player.region)
+                                        .order_by(desc(func.count())).limit(1)).scalar()
+        oldest = list(session.scalars(select(Match.id).order_by(Match.id).limit(200)))
+        match_ids = list(session.scalars(select(Match.match_id).order_by(desc(Match.id)).limit(500)))
+    finally:
+        session.close()
+    unit = manager.get_unit_stats(limit=1)
+    return {
+        'comp': comp,
+        'patch': newest.patch if newest else None,
+        'region': newest.region if newest else None,
+        'player_region': player_region,
+        'unit': unit[0]['name'] if unit else None,
+        'puuids': puuids,
+        'oldest_pks': oldest,
+        'match_ids': match_ids,
+        'since': datetime.utcnow() - timedelta(days=14),
+    }
+
+
+def with_session(manager: DatabaseManager, func: Callable):
+    """Run an internal helper in a session that is rolled back (nothing is written)"""
+    session = manager.get_session()
+    try:
+        return func(session)
+    finally:
+        session.rollback()
+        session.close()
+
+
+def query_catalog(manager: DatabaseManager, args: Dict) -> List[Tuple[str, Callable]]:
+    """(name, callable) for every DatabaseManager read path, including the scans of the write paths"""
+    m = manager
+    oldest = Match.id.in_(args['oldest_pks'] or [0])
+    return [
+        ('get_top_comps', lambda: m.get_top_comps()),
+        ('get_top_comps(patch, region)', lambda: m.get_top_comps(patch=args['patch'], region=args['region'])),
+        ('get_meta_dimensions', lambda: m.get_meta_dimensions()),
+        ('get_unit_stats', lambda: m.get_unit_stats()),
+        ('get_unit_stats(patch, region)', lambda: m.get_unit_stats(patch=args['patch'], region=args['region'])),
+        ('get_unit_stats(comp)', lambda: m.get_unit_stats(args['comp'])),
+        ('get_item_stats(unit)', lambda: m.get_item_stats(unit=args['unit'])),
+        ('get_augment_stats(comp)', lambda: m.get_augment_stats(args['comp'])),
+        ('get_comp_breakdown', lambda: m.get_comp_breakdown(args['comp'])),
+        ('get_database_stats', lambda: m.get_database_stats()),
+        ('get_patch_match_counts', lambda: m.get_patch_match_counts()),
+        ('get_existing_match_ids', lambda: m.get_existing_match_ids(args['match_ids'])),
+        ('get_recent_game_counts', lambda: m.get_recent_game_counts(args['puuids'], since=args['since'])),
+        ('get_league_snapshots', lambda: m.get_league_snapshots(args['puuids'], since=args['since'])),
+        ('iter_players(region)', lambda: sum(1 for _ in m.iter_players(region=args['player_region'], columns=['puuid']))),
+        ('iter_recent_matches(region)', lambda: list(m.iter_recent_matches(region=args['region'], limit=2000))),
+        ('iter_compositions_by_signature', lambda: list(m.iter_compositions_by_signature(args['comp']))),
+        ('get_export_batch', lambda: m.get_export_batch(limit=200)),
+        ('meta cell scan (patch)', lambda: with_session(m, lambda s: m._meta_cell_scan(s, Match.patch == args['patch']))),
+        ('meta cell scan (region)', lambda: with_session(m, lambda s: m._meta_cell_scan(s, Match.region == args['region']))),
+        ('retention: meta scan', lambda: with_session(m, lambda s: m._meta_cell_scan(s, oldest))),
+        ('retention: detail scan', lambda: with_session(m, lambda s: m._comp_detail_scan(s, oldest))),
+        ('retention: summary scan', lambda: with_session(m, lambda s: m._match_summary_scan(s, oldest))),
+        ('retention: summary dates', lambda: with_session(m, lambda s: m._refresh_match_summary_dates(
+            s, [(args['patch'], args['region'])]))),
+        ('retention: daily rollup', lambda: with_session(m, lambda s: m._rollup_daily_stats(s, args['oldest_pks']))),
+    ]
+
+
+def table_sizes(manager: DatabaseManager) -> Dict[str, int]:
+    """Row count of every model table"""
+    with manager.engine.connect() as conn:
+        return {table.name: conn.execute(select(func.count()).select_from(table)).scalar()
+                for table in Base.metadata.sorted_tables}
+
+
+def plan_flags(conn, statement: str, parameters, sizes: Dict[str, int]) -> Tuple[List[str], List[str]]:
+    """EXPLAIN QUERY PLAN lines of a statement and the problems found in them"""
+    lines, flags = [], []
+    for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+        detail = row[-1]
+        lines.append(detail)
+        if detail.startswith('SCAN '):
+            # Only model tables with enough rows to matter (not subqueries, CTEs or dictionaries)
+            if sizes.get(detail.split()[1], 0) < SMALL_TABLE_ROWS:
+                continue
+            flags.append(f"⚠ {detail}" if 'USING' in detail else f"✗ {detail}")
+        elif 'TEMP B-TREE' in detail:
+            flags.append(f"⚠ {detail}")
+    return lines, flags
+
+
+def run_catalog(manager: DatabaseManager, catalog, verbose: bool = False, repeat: int = 3) -> Dict[str, Dict]:
+    """Time every catalog entry (best of `repeat` runs) and explain the statements it sent"""
+    sizes = table_sizes(manager)
+    results = {}
+    for name, call in catalog:
+        call()  # Warm the page cache so both runs compare plans, not disk reads
+        timings = []
+        for _ in range(repeat):
+            with capture_statements(manager.engine) as statements:
+                start = time.perf_counter()
+                call()
+                timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+
+        flags, plans = [], []
+        with manager.engine.connect() as conn:
+            seen = set()
+            for statement, parameters in statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                lines, found = plan_flags(conn, statement, parameters, sizes)
+                plans.append((statement, lines))
+                flags.extend(found)
+        results[name] = {'seconds': seconds, 'flags': flags, 'plans': plans}
+
+        mark = '✗' if any(f.startswith('✗') for f in flags) else ('⚠' if flags else '✓')
+        print(f"  {mark} {name:<34} {seconds * 1000:>10.1f} ms  {len(statements):>4} statements")
+        for flag in dict.fromkeys(flags):
+            print(f"      {flag}")
+        if verbose:
+            for statement, lines in plans:
+                print(f"      {' '.join(statement.split())[:200]}")
+                for line in lines:
+                    print(f"        {line}")
+    return results
+
+
+def set_query_indexes(manager: DatabaseManager, present: bool):
+    """
+    Recreate the QUERY_INDEXES of the models (present=True) or go back to the
+    old schema: drop them and restore the SUPERSEDED_INDEXES they replaced
+    """
+    names = set(QUERY_INDEXES)
+    with manager.engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in names:
+                    if present:
+                        index.create(conn, checkfirst=True)
+                    else:
+                        index.drop(conn, checkfirst=True)
+        for name, (table, column) in SUPERSEDED_INDEXES.items():
+            if present:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            else:
+                conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+    # Pooled connections keep their prepared EXPLAIN statements, which are not re-planned after a schema change
+    manager.engine.dispose()
+
+
+def fill_synthetic(manager: DatabaseManager, matches: int, batch_size: int = 1000):
+    """Store `matches` mock matches (8 participants each) and a tracked player pool"""
+    from tqdm import tqdm
+    from data_collection.batch_match_collector import build_match_data
+    from data_collection.match_archive import get_region_for_match_id
+    from scripts.mock_riot_server import MockRiotWorld
+
+    world = MockRiotWorld(players_per_platform=100, matches_per_platform=-(-matches // len(REGIONS)))
+    for region, puuids in world.players.items():
+        manager.upsert_players([{'puuid': puuid, 'game_name': f"BENCH_{i}", 'tag_line': region.upper(),
+                                 'tier': 'CHALLENGER', 'rank': 'I', 'lp': 1000, 'region': region}
+                                for i, puuid in enumerate(puuids)])
+    match_ids = list(world.match_meta)[:matches]
+    with tqdm(total=len(match_ids), desc="Generating matches") as pbar:
+        for i in range(0, len(match_ids), batch_size):
+            chunk = match_ids[i:i + batch_size]
+            manager.add_matches([build_match_data(world.match(match_id), get_region_for_match_id(match_id))
+                                 for match_id in chunk])
+            pbar.update(len(chunk))
+    manager.refresh_meta_stats(min_games=50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN QUERY PLAN for every DatabaseManager query')
+    parser.add_argument('--db', type=str, default=None, help='SQLite file to analyse (default: DATABASE_URL)')
+    parser.add_argument('--matches', type=int, default=0,
+                       help='Analyse a throwaway database with this many synthetic matches instead')
+    parser.add_argument('--compare', action='store_true',
+                       help='Time every query without and then with QUERY_INDEXES (rebuilds them)')
+    parser.add_argument('--verbose', action='store_true', help='Print every statement and its full plan')
+
+    args = parser.parse_args()
+
+    bench_dir = None
+    if args.matches:
+        bench_dir = tempfile.mkdtemp(prefix='tft_query_advisor_')
+        db_url = f"sqlite:///{os.path.join(bench_dir, 'advisor.db')}"
+    elif args.db:
+        db_url = f"sqlite:///{os.path.abspath(args.db)}"
+    else:
+        db_url = DATABASE_URL
+
+    manager = DatabaseManager(db_url, profile='read_mostly')
+    if manager.engine.dialect.name != 'sqlite':
+        print(f"✗ The query advisor needs a SQLite database ({manager.engine.dialect.name} given)")
+        sys.exit(1)
+
+    try:
+        if args.matches:
+            manager.use_profile('bulk_ingest')
+            manager.init_db()
+            fill_synthetic(manager, args.matches)
+            manager.use_profile('read_mostly')
+        else:
+            manager.init_db()
+
+        samples = sample_arguments(manager)
+        catalog = query_catalog(manager, samples)
+        sizes = table_sizes(manager)
+
+        print(f"\n{'='*70}")
+        print(f"QUERY PLANS ({sizes['participants']} participants, {sizes['players']} players)")
+        print(f"{'='*70}")
+
+        runs = {}
+        if args.compare:
+            print("\n[1/2] Without the query indexes\n")
+            set_query_indexes(manager, present=False)
+            runs['before'] = run_catalog(manager, catalog, args.verbose)
+            print("\n[2/2] With the query indexes\n")
+            set_query_indexes(manager, present=True)
+            runs['after'] = run_catalog(manager, catalog, args.verbose)
+        else:
+            print()
+            runs['after'] = run_catalog(manager, catalog, args.verbose)
+    finally:
+        manager.engine.dispose()
+        if bench_dir:
+            shutil.rmtree(bench_dir, ignore_errors=True)
+
+    after = runs['after']
+    scans = [name for name, result in after.items() if any(f.startswith('✗') for f in result['flags'])]
+    print(f"\n{'='*70}")
+    if 'before' in runs:
+        print(f"{'query':<36} {'before':>12} {'after':>12} {'speedup':>9}")
+        for name, result in after.items():
+            before = runs['before'][name]['seconds']
+            print(f"{name:<36} {before * 1000:>10.1f}ms {result['seconds'] * 1000:>10.1f}ms "
+                  f"{before / result['seconds'] if result['seconds'] else 0:>8.1f}x")
+        print()
+    if scans:
+        print(f"⚠ Full table scans left in: {', '.join(scans)}")
+    else:
+        print("✓ No full table scans")
+    print(f"{'='*70}\n")
+
+
+if __name__ == "__main__":
+    main()
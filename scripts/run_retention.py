@@ -0,0 +1,93 @@
+"""
+Retention job - Roll up and purge matches older than DATA_RETENTION_DAYS
+
+Expiring matches are folded into the daily aggregate tables (daily_comp_stats,
+daily_unit_stats, daily_augment_stats), then deleted with their participants,
+compositions and unit/trait/augment rows in small transactions. League
+snapshots older than the scheduler's lookback and finished crawl run journals
+are deleted too, and the freed pages are returned with an incremental vacuum.
+Safe to run hourly (e.g. cron) while collectors and the dashboard are using
+the database.
+
+Usage:
+    python scripts/run_retention.py
+    python scripts/run_retention.py --days 14 --batch-size 500 --pause 0.05
+    python scripts/run_retention.py --enable-incremental-vacuum   # One-time, rewrites the file
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database.db_manager import db_manager
+from config import DATA_RETENTION_DAYS, MIN_GAMES_FOR_META, RETENTION_BATCH_SIZE, RETENTION_VACUUM_PAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll up and delete matches older than the retention window')
+    parser.add_argument('--days', type=float, default=DATA_RETENTION_DAYS,
+                       help=f'Keep matches newer than this (default: {DATA_RETENTION_DAYS})')
+    parser.add_argument('--batch-size', type=int, default=RETENTION_BATCH_SIZE,
+                       help='Matches deleted per transaction')
+    parser.add_argument('--pause', type=float, default=0.0,
+                       help='Seconds to wait between batches')
+    parser.add_argument('--vacuum-pages', type=int, default=RETENTION_VACUUM_PAGES,
+                       help='Free pages to give back to the OS (0 = skip)')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                       help='Convert an existing database to auto_vacuum=INCREMENTAL (full VACUUM, run once)')
+
+    args = parser.parse_args()
+
+    db_manager.init_db()
+
+    if args.enable_incremental_vacuum:
+        print("Rewriting database with auto_vacuum=INCREMENTAL (this can take a while)...")
+        db_manager.enable_incremental_vacuum()
+        print("✓ Incremental vacuum enabled")
+
+    print(f"\n{'='*60}")
+    print(f"RETENTION: keeping the last {args.days:g} days")
+    print(f"{'='*60}\n")
+
+    start = time.time()
+    result = db_manager.purge_old_data(
+        days=args.days,
+        batch_size=args.batch_size,
+        pause=args.pause,
+        progress=lambda totals: print(f"  batch {totals['batches']}: {totals['matches']} matches, "
+                                      f"{totals['participants']} participants deleted", end='\r')
+    )
+    if result['batches']:
+        print()
+    print(f"✓ Rolled up and deleted {result['matches']} matches ({result['participants']} participants) "
+          f"in {result['batches']} batches, {time.time() - start:.1f}s")
+    if result['orphans']:
+        print(f"✓ Removed {result['orphans']} orphaned participants")
+    if result['snapshots']:
+        print(f"✓ Removed {result['snapshots']} old league snapshots")
+    if result['crawl_runs']:
+        print(f"✓ Removed {result['crawl_runs']} finished crawl run journals")
+
+    # Deleted games were subtracted from the running aggregates
+    if result['matches']:
+        refreshed = db_manager.refresh_meta_stats(min_games=MIN_GAMES_FOR_META)
+        print(f"✓ Refreshed meta stats of {refreshed['signatures']} compositions")
+
+    if args.vacuum_pages:
+        vacuum = db_manager.incremental_vacuum(args.vacuum_pages)
+        if vacuum['auto_vacuum'] == 2:
+            print(f"✓ Incremental vacuum: {vacuum['freed']} pages freed, {vacuum['free']} still free")
+        elif db_manager.engine.dialect.name == 'sqlite':
+            print("⚠ auto_vacuum is not INCREMENTAL on this database: freed pages are reused but the file "
+                  "does not shrink")
+            print("  Convert it once with: python scripts/run_retention.py --enable-incremental-vacuum")
+
+    print(f"\n{'='*60}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
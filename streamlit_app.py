@@ -12,6 +12,7 @@ sys.path.insert(0, current_dir)
 # Initialize database if it doesn't exist
 try:
     from database.db_manager import db_manager
+    db_manager.use_profile('read_mostly')
     db_manager.init_db()
 except Exception as e:
     print(f"Warning: Could not initialize database: {e}")
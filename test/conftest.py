@@ -0,0 +1,32 @@
+"""
+Shared pytest setup: every test runs offline against a throwaway SQLite database
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Must be set before config is imported (the global db_manager binds to it)
+TEST_DB_DIR = tempfile.mkdtemp(prefix='tft_meta_test_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
+os.environ['MATCH_ARCHIVE_ENABLED'] = '0'
+os.environ['RIOT_API_BASE_URL'] = ''
+
+# Manual scripts that call the live Riot API
+collect_ignore = ['test_riot_api.py']
+
+
+@pytest.fixture
+def fresh_db():
+    """Global db_manager on empty tables"""
+    from database.db_manager import db_manager
+    from database.models import Base
+
+    Base.metadata.drop_all(db_manager.engine)
+    db_manager.init_db()
+    yield db_manager
+    db_manager.engine.dispose()
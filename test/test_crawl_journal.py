@@ -0,0 +1,192 @@
+"""
+Crawl journal tests - interrupt a batch crawl against the mock Riot server and resume it
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from data_collection import batch_match_collector
+from data_collection.batch_match_collector import collect_matches_batch
+from data_collection.crawl_journal import CrawlJournal
+from data_collection.gm_collector import collect_gm_players
+from data_collection.rate_limiter import RateLimiter
+from data_collection.riot_client import RiotClient
+from data_collection.shutdown import shutdown
+from scripts.mock_riot_server import MockRiotWorld, MockRiotServer
+
+API_KEY = 'RGAPI-test'
+REGION = 'euw1'
+MATCHES_PER_PLAYER = 5
+
+
+@pytest.fixture
+def world():
+    return MockRiotWorld(players_per_platform=8, matches_per_platform=40)
+
+
+@pytest.fixture
+def server(world):
+    server = MockRiotServer(world, app_limit='1000:1', method_limit='1000:1').start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    return RiotClient(API_KEY, limiter=RateLimiter(), base_url=server.url)
+
+
+@pytest.fixture
+def listings(monkeypatch):
+    """Records every match-ID listing; set `stop_after` to request a shutdown"""
+    calls = []
+    fetch_match_ids = batch_match_collector.fetch_match_ids
+
+    def counting_fetch_match_ids(api_key, routing, puuid, *args, **kwargs):
+        calls.append(puuid)
+        match_ids = fetch_match_ids(api_key, routing, puuid, *args, **kwargs)
+        if len(calls) == counting_fetch_match_ids.stop_after:
+            shutdown.request()
+        return match_ids
+
+    counting_fetch_match_ids.stop_after = None
+    counting_fetch_match_ids.calls = calls
+    monkeypatch.setattr(batch_match_collector, 'fetch_match_ids', counting_fetch_match_ids)
+    yield counting_fetch_match_ids
+    shutdown.reset()
+
+
+def expected_match_ids(world, puuids):
+    return {match_id for puuid in puuids
+            for match_id in world.match_ids(puuid, MATCHES_PER_PLAYER, None)}
+
+
+def test_plan_keeps_the_first_crawl_order(fresh_db, world, client):
+    collect_gm_players(api_key=API_KEY, region=REGION, max_per_tier=4, client=client)
+    players = fresh_db.get_all_players(region=REGION)
+    journal = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+
+    ordered, listed = journal.plan(REGION, players)
+    assert [p.puuid for p in ordered] == [p.puuid for p in players]
+    assert listed == {}
+
+    # A resumed run sees the players in a different rank order
+    ordered, listed = journal.plan(REGION, list(reversed(players)))
+    assert [p.puuid for p in ordered] == [p.puuid for p in players]
+
+
+def test_interrupted_crawl_resumes_without_relisting(fresh_db, world, client, listings):
+    collect_gm_players(api_key=API_KEY, region=REGION, max_per_tier=4, client=client)
+    puuids = [p.puuid for p in fresh_db.get_all_players(region=REGION)]
+    assert len(puuids) == 8
+
+    journal = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    listings.stop_after = 3
+    collect_matches_batch(api_key=API_KEY, region=REGION, matches_per_player=MATCHES_PER_PLAYER,
+                          client=client, budget=None, journal=journal)
+    journal.finish(interrupted=True)
+
+    first_run = list(listings.calls)
+    assert len(first_run) == 3
+    assert not journal.matches_collected(REGION)
+    listed = [row.puuid for row in fresh_db.get_crawl_players(journal.run_id, REGION) if row.listed]
+    assert listed == first_run
+
+    shutdown.reset()
+    resumed = CrawlJournal.resume()
+    assert resumed is not None and resumed.resumed
+    assert resumed.run_id == journal.run_id
+    assert resumed.matches_per_player == MATCHES_PER_PLAYER
+
+    listings.calls.clear()
+    listings.stop_after = None
+    collect_matches_batch(api_key=API_KEY, region=REGION, matches_per_player=MATCHES_PER_PLAYER,
+                          client=client, budget=None, journal=resumed)
+    resumed.finish()
+
+    # Only the players left unlisted are listed again, and nothing listed is lost
+    assert sorted(listings.calls) == sorted(set(puuids) - set(first_run))
+    expected = expected_match_ids(world, puuids)
+    assert fresh_db.get_existing_match_ids(expected) == expected
+    assert fresh_db.get_match_count() == len(expected)
+    assert CrawlJournal.resume() is None
+
+    # The finished run keeps no per-player journal
+    assert fresh_db.get_crawl_players(resumed.run_id, REGION) == []
+    assert fresh_db.get_crawl_run_regions(resumed.run_id) == {}
+
+
+def test_resumed_run_continues_the_same_budget(fresh_db, world, server, client, listings):
+    collect_gm_players(api_key=API_KEY, region=REGION, max_per_tier=4, client=client)
+    requests_before = server.stats['requests']
+    budget = 20
+
+    journal = CrawlJournal.start([REGION], MATCHES_PER_PLAYER, budget)
+    listings.stop_after = 3
+    collect_matches_batch(api_key=API_KEY, region=REGION, matches_per_player=MATCHES_PER_PLAYER,
+                          client=client, journal=journal)
+    journal.finish(interrupted=True)
+    assert journal.crawl_budget().used == server.stats['requests'] - requests_before
+
+    shutdown.reset()
+    listings.stop_after = None
+    resumed = CrawlJournal.resume()
+    assert resumed.crawl_budget().used == journal.crawl_budget().used
+    collect_matches_batch(api_key=API_KEY, region=REGION, matches_per_player=MATCHES_PER_PLAYER,
+                          client=client, journal=resumed)
+    resumed.finish()
+
+    # Both attempts together stay within one budget
+    spent = server.stats['requests'] - requests_before
+    assert resumed.crawl_budget().used == spent
+    assert spent <= budget
+
+
+def test_new_run_abandons_stale_unfinished_runs(fresh_db):
+    stale = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    stale.finish(interrupted=True)
+    current = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    resumable = CrawlJournal.resume()
+    assert resumable is not None and resumable.run_id == current.run_id
+    current.finish()
+    assert CrawlJournal.resume() is None
+
+
+def test_unfinished_run_older_than_a_complete_one_is_not_resumed(fresh_db):
+    stale = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    CrawlJournal.start([REGION], MATCHES_PER_PLAYER).finish()
+    # e.g. a crash recorded after the newer run had already completed
+    fresh_db.set_crawl_run_status(stale.run_id, 'interrupted')
+    assert CrawlJournal.resume() is None
+
+
+def test_purge_deletes_old_finished_runs(fresh_db):
+    old = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    old.plan(REGION, [])
+    old.mark_players_collected(REGION)
+    abandoned = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    CrawlJournal.start([REGION], MATCHES_PER_PLAYER)  # Abandons it
+    running = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    old.finish()
+
+    with fresh_db.engine.begin() as conn:
+        conn.execute(text("UPDATE crawl_runs SET started_at = :old WHERE id IN (:a, :b, :c)"),
+                     {'old': datetime.utcnow() - timedelta(days=60),
+                      'a': old.run_id, 'b': abandoned.run_id, 'c': running.run_id})
+        conn.execute(text("UPDATE crawl_runs SET status = 'running' WHERE id = :c"), {'c': running.run_id})
+
+    assert fresh_db.purge_old_data(days=30)['crawl_runs'] == 2
+    with fresh_db.engine.connect() as conn:
+        remaining = {row.id for row in conn.execute(text("SELECT id FROM crawl_runs"))}
+    assert old.run_id not in remaining and abandoned.run_id not in remaining
+    assert running.run_id in remaining
+
+
+def test_finished_run_is_not_resumable(fresh_db):
+    journal = CrawlJournal.start([REGION], MATCHES_PER_PLAYER)
+    journal.mark_players_collected(REGION)
+    assert journal.players_collected(REGION)
+    assert not journal.matches_collected(REGION)
+    journal.finish()
+    assert CrawlJournal.resume() is None
@@ -0,0 +1,40 @@
+"""
+Dictionary table tests - concurrent writers adding the same unit/trait/item/augment names
+"""
+from sqlalchemy import create_engine, event, text
+
+from database.models import Unit
+
+
+def insert_first_from_another_writer(db, name):
+    """Commit `name` from a second connection right before db's own INSERT INTO units runs"""
+    other = create_engine(db.engine.url)
+    state = {'raced': False}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if not state['raced'] and statement.startswith('INSERT INTO units'):
+            state['raced'] = True
+            with other.begin() as other_conn:
+                other_conn.execute(text("INSERT INTO units (name) VALUES (:name)"), {'name': name})
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    return other, state, lambda: event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+def test_name_inserted_concurrently_is_reused(fresh_db):
+    other, state, remove = insert_first_from_another_writer(fresh_db, 'TFT13_Race')
+    session = fresh_db.get_session()
+    try:
+        ids = fresh_db._dictionary_ids(session, Unit, {'TFT13_Race', 'TFT13_Solo'})
+        session.commit()
+    finally:
+        session.close()
+        remove()
+        other.dispose()
+
+    assert state['raced']
+    with fresh_db.engine.connect() as conn:
+        stored = dict(conn.execute(text("SELECT name, id FROM units")).all())
+    assert stored == ids
+    assert set(stored) == {'TFT13_Race', 'TFT13_Solo'}
+
@@ -0,0 +1,70 @@
+"""
+Ingest pipeline tests - a failing writer must stop the crawl, not hang it
+"""
+import threading
+
+from data_collection.ingest_pipeline import IngestPipeline
+
+ITEMS = [(f"EUW1_{i}", 'euw1') for i in range(200)]
+
+
+def make_pipeline(written):
+    def fetch(match_id, region):
+        return {'metadata': {'match_id': match_id}}
+
+    def parse(payload, region):
+        return {'match_id': payload['metadata']['match_id']}
+
+    pipeline = IngestPipeline(fetch=fetch, parse=parse, fetchers=4, parsers=2,
+                              batch_size=5, queue_size=2)
+
+    def write(batch):
+        written.extend(m['match_id'] for m in batch)
+        pipeline._count('written', len(batch))
+
+    pipeline._write = write
+    return pipeline
+
+
+def run_with_timeout(pipeline, items, timeout=10):
+    """Run the pipeline in a thread; returns (finished, stats or exception)"""
+    result = {}
+
+    def target():
+        try:
+            result['value'] = pipeline.run(items)
+        except Exception as e:
+            result['value'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive(), result.get('value')
+
+
+def test_every_match_is_written():
+    written = []
+    finished, stats = run_with_timeout(make_pipeline(written), ITEMS)
+    assert finished
+    assert stats['written'] == len(ITEMS)
+    assert sorted(written) == sorted(match_id for match_id, _ in ITEMS)
+
+
+def test_writer_failure_is_raised_instead_of_hanging():
+    written = []
+    pipeline = make_pipeline(written)
+    write = pipeline._write
+
+    def failing_write(batch):
+        if len(written) >= 10:
+            raise RuntimeError("disk full")
+        write(batch)
+
+    pipeline._write = failing_write
+    finished, error = run_with_timeout(pipeline, ITEMS)
+
+    assert finished, "pipeline hung after the writer failed"
+    assert isinstance(error, RuntimeError) and str(error) == "disk full"
+    # Fetchers stopped early instead of crawling every remaining match
+    assert pipeline.processed < len(ITEMS)
+    assert pipeline.error is error
@@ -0,0 +1,75 @@
+"""
+Match archive tests - several processes appending to the same archive
+"""
+import multiprocessing
+from collections import Counter
+
+import pytest
+
+from data_collection import match_archive
+from data_collection.match_archive import MatchArchive
+
+pytestmark = pytest.mark.skipif(match_archive.fcntl is None, reason="needs fcntl")
+
+SEGMENT_SIZE = 10
+
+
+def payload(match_id):
+    return {'metadata': {'match_id': match_id}, 'info': {}}
+
+
+def append_matches(archive_dir, match_ids):
+    archive = MatchArchive(archive_dir, segment_size=SEGMENT_SIZE)
+    for match_id in match_ids:
+        archive.append(payload(match_id))
+
+
+def test_writers_see_each_others_appends(tmp_path):
+    first = MatchArchive(str(tmp_path), segment_size=2)
+    second = MatchArchive(str(tmp_path), segment_size=2)
+    assert len(second) == 0  # Loads its index before the other writer appends
+
+    assert first.append(payload('EUW1_1'))
+    assert second.append(payload('EUW1_2'))
+    assert not second.append(payload('EUW1_1'))
+    assert first.append(payload('EUW1_3'))
+
+    # The full first segment is not reused by the writer that filled only half of it
+    assert first.index['EUW1_3'] == 'segment-000002.jsonl.gz'
+    assert 'EUW1_2' in first and len(first) == 3
+    assert sorted(p['metadata']['match_id'] for p in MatchArchive(str(tmp_path)).iter_payloads()) \
+        == ['EUW1_1', 'EUW1_2', 'EUW1_3']
+
+
+def test_rebuilt_index_is_reloaded_by_other_writers(tmp_path):
+    first = MatchArchive(str(tmp_path), segment_size=2)
+    second = MatchArchive(str(tmp_path), segment_size=2)
+    first.append(payload('EUW1_1'))
+    assert 'EUW1_1' in second
+
+    first.rebuild_index()
+    second.append(payload('EUW1_2'))
+    assert len(first) == 2 and len(second) == 2
+
+
+def test_concurrent_processes_share_segments(tmp_path):
+    context = multiprocessing.get_context('fork')
+    # Overlapping ranges: both processes try to archive matches 40-59
+    ranges = [range(0, 60), range(40, 100)]
+    processes = [context.Process(target=append_matches,
+                                 args=(str(tmp_path), [f"EUW1_{i}" for i in ids]))
+                 for ids in ranges]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    archive = MatchArchive(str(tmp_path), segment_size=SEGMENT_SIZE)
+    archived = [p['metadata']['match_id'] for p in archive.iter_payloads()]
+    assert sorted(archived) == sorted(f"EUW1_{i}" for i in range(100))
+    assert len(archive) == 100
+
+    per_segment = Counter(archive.index.values())
+    assert len(per_segment) == 100 // SEGMENT_SIZE
+    assert set(per_segment.values()) == {SEGMENT_SIZE}
@@ -0,0 +1,106 @@
+"""
+Incremental aggregate tests - the running aggregates kept at ingest and purge
+time must always equal a full rebuild from the stored games
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from data_collection.batch_match_collector import build_match_data
+from data_collection.match_archive import get_region_for_match_id
+from database.models import CompDetailAggregate, MatchSummary, MetaAggregate, MetaStat
+from scripts.mock_riot_server import MockRiotWorld
+
+AGGREGATE_COLUMNS = {
+    MetaAggregate: ('comp_signature', 'patch', 'region',
+                    'play_count', 'placement_sum', 'top4_count', 'top1_count'),
+    CompDetailAggregate: ('comp_signature', 'kind', 'key_id', 'patch', 'region',
+                          'play_count', 'placement_sum', 'top4_count', 'top1_count'),
+    MatchSummary: ('patch', 'region', 'match_count', 'composition_count',
+                   'oldest_match', 'newest_match'),
+}
+META_STAT_COLUMNS = ('comp_signature', 'patch', 'region', 'play_count',
+                     'avg_placement', 'top4_rate', 'top1_rate')
+
+
+@pytest.fixture(scope='module')
+def matches():
+    """Matches on two platforms and two patches; the first third is 60 days old"""
+    world = MockRiotWorld(players_per_platform=16, matches_per_platform=30)
+    old = int((datetime.utcnow() - timedelta(days=60)).timestamp() * 1000)
+    matches = []
+    for i, match_id in enumerate(sorted(m for m in world.match_meta if m.split('_')[0] in ('EUW1', 'KR'))):
+        payload = world.match(match_id)
+        if i % 2:
+            payload['info']['game_version'] = 'Version 14.22.620.5555 (Nov 06 2024/12:00:00) [PUBLIC]'
+        if i % 3 == 0:
+            payload['info']['game_datetime'] = old + i * 60_000
+        matches.append(build_match_data(payload, get_region_for_match_id(match_id)))
+    return matches
+
+
+def snapshot(db, model, columns):
+    """Rows of a table as a sorted list of tuples (empty running cells left out)"""
+    session = db.get_session()
+    try:
+        rows = session.execute(select(*(getattr(model, c) for c in columns))).all()
+    finally:
+        session.close()
+    if 'play_count' in columns:
+        rows = [row for row in rows if row.play_count]
+    if 'match_count' in columns:
+        rows = [row for row in rows if row.match_count]
+    return sorted(tuple(row) for row in rows)
+
+
+def assert_matches_rebuild(db):
+    running = {model: snapshot(db, model, columns) for model, columns in AGGREGATE_COLUMNS.items()}
+    db.rebuild_meta_aggregates()
+    db.rebuild_comp_detail_aggregates()
+    db.rebuild_match_summary()
+    for model, columns in AGGREGATE_COLUMNS.items():
+        assert running[model] == snapshot(db, model, columns), model.__tablename__
+        assert running[model], model.__tablename__
+
+
+def ingest(db, matches):
+    """Store matches the way the collectors do: batches, single matches and repeats"""
+    third = len(matches) // 3
+    assert db.add_matches(matches[:third])
+    for match_data in matches[third:third + 5]:
+        assert db.add_match(match_data)
+    assert db.add_matches(matches[third + 5:2 * third])
+    # Re-sending stored matches must not count them twice
+    assert db.add_matches(matches[:2 * third]) == []
+    assert db.add_matches(matches[2 * third:])
+
+
+def test_running_aggregates_equal_a_rebuild_after_ingest(fresh_db, matches):
+    ingest(fresh_db, matches)
+    assert fresh_db.get_match_count() == len(matches)
+    assert_matches_rebuild(fresh_db)
+
+
+def test_running_aggregates_equal_a_rebuild_after_purge(fresh_db, matches):
+    ingest(fresh_db, matches)
+    totals = fresh_db.purge_old_data(days=30, batch_size=7)
+    old_matches = len(matches[::3])
+    assert totals['matches'] == old_matches
+    assert fresh_db.get_match_count() == len(matches) - old_matches
+    assert_matches_rebuild(fresh_db)
+
+
+def test_incremental_meta_refresh_equals_the_full_cube(fresh_db, matches):
+    half = len(matches) // 2
+    fresh_db.add_matches(matches[:half])
+    fresh_db.refresh_meta_stats(min_games=1)
+    fresh_db.add_matches(matches[half:])
+    fresh_db.purge_old_data(days=30)
+    fresh_db.refresh_meta_stats(min_games=1)
+    incremental = snapshot(fresh_db, MetaStat, META_STAT_COLUMNS)
+
+    fresh_db.recompute_meta_cube(min_games=1)
+    full = snapshot(fresh_db, MetaStat, META_STAT_COLUMNS)
+    assert incremental == full
+    assert {row[2] for row in full} >= {'euw1', 'kr', 'ALL'}
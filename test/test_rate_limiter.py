@@ -0,0 +1,112 @@
+"""
+Rate limiter tests - run against a fake clock, no network or real sleeping
+"""
+import pytest
+
+from data_collection import rate_limiter as rate_limiter_module
+from data_collection.rate_limiter import RateLimiter, parse_rate_limit_header
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the limiter sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def make_limiter(clock, app_limit='20:1,100:120'):
+    return RateLimiter(default_app_limit=app_limit, sleep=clock.sleep)
+
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit_header("20:1,100:120") == [(20, 1), (100, 120)]
+    assert parse_rate_limit_header(" 500:10 ") == [(500, 10)]
+    assert parse_rate_limit_header("20:1,bogus,5") == [(20, 1)]
+    assert parse_rate_limit_header(None) == []
+    assert parse_rate_limit_header("") == []
+
+
+def test_requests_within_limit_do_not_wait(clock):
+    limiter = make_limiter(clock, '3:1')
+    for _ in range(3):
+        limiter.acquire('europe', 'match')
+    assert clock.sleeps == []
+
+
+def test_waits_for_the_window_to_roll(clock):
+    limiter = make_limiter(clock, '3:1')
+    for _ in range(4):
+        limiter.acquire('europe', 'match')
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_tightest_window_decides_the_wait(clock):
+    limiter = make_limiter(clock, '2:1,3:10')
+    for _ in range(4):
+        limiter.acquire('europe', 'match')
+    # The third call waits out the 1s window, the fourth the rest of the 10s window
+    assert clock.sleeps == [pytest.approx(1.0), pytest.approx(9.0)]
+
+
+def test_hosts_have_separate_app_buckets(clock):
+    limiter = make_limiter(clock, '1:1')
+    limiter.acquire('europe', 'match')
+    limiter.acquire('americas', 'match')
+    limiter.acquire('euw1', 'league')
+    assert clock.sleeps == []
+
+
+def test_headers_replace_the_assumed_limits(clock):
+    limiter = make_limiter(clock, '100:1')
+    limiter.acquire('europe', 'match')
+    limiter.update('europe', 'match', {
+        'X-App-Rate-Limit': '2:10',
+        'X-App-Rate-Limit-Count': '2:10',
+    })
+    limiter.acquire('europe', 'match')
+    assert clock.sleeps == [pytest.approx(10.0)]
+
+
+def test_method_limit_only_applies_to_that_method(clock):
+    limiter = make_limiter(clock, '100:1')
+    limiter.update('europe', 'match', {
+        'X-Method-Rate-Limit': '1:10',
+        'X-Method-Rate-Limit-Count': '1:10',
+    })
+    limiter.acquire('europe', 'ids')
+    assert clock.sleeps == []
+    limiter.acquire('europe', 'match')
+    assert clock.sleeps == [pytest.approx(10.0)]
+
+
+def test_application_429_blocks_the_whole_host(clock):
+    limiter = make_limiter(clock, '100:1')
+    limiter.block('europe', 'match', 5, limit_type='application')
+    limiter.acquire('europe', 'ids')
+    assert clock.sleeps == [pytest.approx(5.0)]
+    limiter.acquire('americas', 'ids')
+    assert len(clock.sleeps) == 1
+
+
+def test_method_429_blocks_only_the_method(clock):
+    limiter = make_limiter(clock, '100:1')
+    limiter.block('europe', 'match', 5, limit_type='method')
+    limiter.acquire('europe', 'ids')
+    assert clock.sleeps == []
+    limiter.acquire('europe', 'match')
+    assert clock.sleeps == [pytest.approx(5.0)]
@@ -0,0 +1,148 @@
+"""
+Circuit breaker tests - the half-open probe must always be released
+"""
+import pytest
+
+from data_collection import resilience
+from data_collection.rate_limiter import RateLimiter
+from data_collection.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from data_collection.riot_client import RiotClient
+from data_collection.shutdown import ShutdownRequested, shutdown
+
+URL = 'https://europe.api.riotgames.com/tft/match/v1/matches/EUW1_1'
+METHOD = 'tft-match-v1.match'
+COOLDOWN = 10
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Returns (or raises) the queued outcomes in order"""
+
+    def __init__(self):
+        self.outcomes = []
+
+    def get(self, url, timeout=None):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class ShutdownLimiter(RateLimiter):
+    """Limiter whose next acquire is interrupted by a graceful shutdown"""
+
+    def __init__(self, clock):
+        super().__init__(default_app_limit='100:1', sleep=clock.sleep)
+        self.interrupt = False
+
+    def acquire(self, host: str, method: str):
+        if self.interrupt:
+            self.interrupt = False
+            raise ShutdownRequested()
+        super().acquire(host, method)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def session():
+    return FakeSession()
+
+
+@pytest.fixture
+def client(clock, session):
+    client = RiotClient('RGAPI-test', limiter=ShutdownLimiter(clock),
+                        retry_policy=RetryPolicy(max_retries=0),
+                        breaker=CircuitBreaker(threshold=1, cooldown=COOLDOWN), base_url=None)
+    client._session = lambda netloc: session
+    yield client
+    shutdown.reset()
+
+
+def open_breaker(client, session, clock):
+    session.outcomes.append(FakeResponse(503))
+    assert client.get(URL, METHOD).status_code == 503
+    assert client.breaker.is_open('europe')
+    with pytest.raises(CircuitOpenError):
+        client.get(URL, METHOD)
+    clock.now += COOLDOWN + 1
+
+
+def test_release_keeps_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    breaker.record_failure('europe')
+    clock.now += COOLDOWN + 1
+    assert breaker.before_request('europe') is True
+    breaker.release('europe')
+    assert breaker.failures['europe'] == 1
+    assert breaker.is_open('europe')
+    assert breaker.before_request('europe') is True
+
+
+def test_429_probe_releases_the_breaker(client, session, clock):
+    open_breaker(client, session, clock)
+
+    session.outcomes.append(FakeResponse(429, {'Retry-After': '1', 'X-Rate-Limit-Type': 'method'}))
+    assert client.get(URL, METHOD).status_code == 429
+    assert client.breaker.probing == set()
+
+    clock.now += 2
+    session.outcomes.append(FakeResponse(200))
+    assert client.get(URL, METHOD).status_code == 200
+    assert not client.breaker.is_open('europe')
+
+
+def test_shutdown_during_probe_releases_the_breaker(client, session, clock):
+    open_breaker(client, session, clock)
+
+    client.limiter.interrupt = True
+    with pytest.raises(ShutdownRequested):
+        client.get(URL, METHOD)
+    assert client.breaker.probing == set()
+
+    session.outcomes.append(FakeResponse(200))
+    assert client.get(URL, METHOD).status_code == 200
+    assert not client.breaker.is_open('europe')
+
+
+def test_unexpected_error_during_probe_releases_the_breaker(client, session, clock):
+    open_breaker(client, session, clock)
+
+    session.outcomes.append(ValueError("bad payload"))
+    with pytest.raises(ValueError):
+        client.get(URL, METHOD)
+    assert client.breaker.probing == set()
+
+    session.outcomes.append(FakeResponse(200))
+    assert client.get(URL, METHOD).status_code == 200
+
+
+def test_failed_probe_reopens_the_breaker(client, session, clock):
+    open_breaker(client, session, clock)
+
+    session.outcomes.append(FakeResponse(503))
+    client.get(URL, METHOD)
+    assert client.breaker.probing == set()
+    with pytest.raises(CircuitOpenError):
+        client.get(URL, METHOD)
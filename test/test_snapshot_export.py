@@ -0,0 +1,70 @@
+"""
+Snapshot export tests - the incremental cursor must survive rebuilds of the match data
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+pytest.importorskip('pyarrow')
+
+from data_collection.batch_match_collector import build_match_data
+from data_collection.match_archive import get_region_for_match_id
+from meta_analysis.snapshot_export import export_snapshots, load_snapshot, read_manifest
+from scripts.mock_riot_server import MockRiotWorld
+
+
+@pytest.fixture(scope='module')
+def matches():
+    world = MockRiotWorld(players_per_platform=16, matches_per_platform=40)
+    match_ids = sorted(m for m in world.match_meta if m.startswith('EUW1_'))
+    return [build_match_data(world.match(m), get_region_for_match_id(m)) for m in match_ids]
+
+
+def exported_match_ids(snapshot_dir):
+    return sorted(load_snapshot('matches', columns=['match_id'],
+                                snapshot_dir=snapshot_dir).column('match_id').to_pylist())
+
+
+def test_match_ids_are_never_reused(fresh_db):
+    with fresh_db.engine.connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'matches'")).scalar()
+    assert 'AUTOINCREMENT' in ddl
+
+
+def test_incremental_export_appends_new_matches(fresh_db, matches, tmp_path):
+    fresh_db.add_matches(matches[:20])
+    assert export_snapshots(str(tmp_path), batch_size=7)['matches'] == 20
+    fresh_db.add_matches(matches[20:])
+    assert export_snapshots(str(tmp_path), batch_size=7)['matches'] == 20
+    assert exported_match_ids(str(tmp_path)) == sorted(m['match_id'] for m in matches)
+
+
+def test_rebuilt_match_data_is_exported_again(fresh_db, matches, tmp_path):
+    fresh_db.add_matches(matches[:20])
+    export_snapshots(str(tmp_path))
+    stale_id = matches[0]['match_id']
+
+    fresh_db.clear_match_data()
+    fresh_db.add_matches(matches[1:])
+
+    result = export_snapshots(str(tmp_path))
+    assert result['matches'] == len(matches) - 1
+    assert read_manifest(str(tmp_path))['rows']['matches'] == len(matches) - 1
+    exported = exported_match_ids(str(tmp_path))
+    assert exported == sorted(m['match_id'] for m in matches[1:])
+    assert stale_id not in exported
+
+
+def test_purge_keeps_the_snapshot_history(fresh_db, matches, tmp_path):
+    # The newest stored matches (by primary key) are the ones retention deletes
+    old = int((datetime.utcnow() - timedelta(days=60)).timestamp() * 1000)
+    first = matches[:10] + [dict(m, game_datetime=old) for m in matches[10:20]]
+    fresh_db.add_matches(first)
+    export_snapshots(str(tmp_path))
+    assert fresh_db.purge_old_data(days=30)['matches'] == 10
+
+    # Their ids must not be handed out again
+    fresh_db.add_matches(matches[20:])
+    assert export_snapshots(str(tmp_path))['matches'] == len(matches) - 20
+    assert len(exported_match_ids(str(tmp_path))) == len(matches)
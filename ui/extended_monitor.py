@@ -18,12 +18,14 @@ from data_processing.formatters import (
     format_trait_description, format_item_description, get_trait_style_emoji,
     format_match_summary
 )
-from config import APP_TITLE, MAX_MATCHES, DEFAULT_REGION, DEFAULT_ROUTING, REGIONS
+from config import APP_TITLE, MAX_MATCHES, DEFAULT_REGION, DEFAULT_ROUTING, REGIONS, MIN_GAMES_FOR_META
 
 # Try to import database components (may fail in some deployments)
 try:
     from database.db_manager import db_manager
-    from meta_analysis.meta_report import get_top_comps, get_meta_summary, format_comp_for_display
+    db_manager.use_profile('read_mostly')  # Dashboard: reads while collectors write
+    from meta_analysis.meta_report import (get_top_comps, get_meta_summary, format_comp_for_display,
+                                           get_meta_dimensions, refresh_meta)
     DB_AVAILABLE = True
 except Exception as e:
     print(f"Warning: Database not available: {e}")
@@ -35,6 +37,10 @@ except Exception as e:
         return {'total_matches': 0, 'total_players': 0, 'viable_comps': 0, 'newest_match': None}
     def format_comp_for_display(comp):
         return {}
+    def get_meta_dimensions():
+        return {'patches': [], 'regions': []}
+    def refresh_meta(min_games=None):
+        return 0
 
 # Load environment variables
 load_dotenv()
@@ -366,9 +372,31 @@ def render_meta_report():
     with col_filter3:
         limit_filter = st.number_input("Número de comps", min_value=5, max_value=50, value=20)
     
+    # The collectors and the retention job refresh the meta after writing; this only
+    # folds in games ingested since then (never with a higher threshold than theirs,
+    # so no stored cells are dropped)
+    if st.button("🔄 Actualizar meta", type="secondary"):
+        try:
+            with st.spinner("Actualizando estadísticas del meta..."):
+                refreshed = refresh_meta(min_games=min(min_games_filter, MIN_GAMES_FOR_META))
+            st.success(f"✓ {refreshed} composiciones actualizadas")
+        except Exception as e:
+            st.error(f"No se pudo actualizar el meta: {e}")
+    
+    # Patch / region cells are precomputed, so switching filters needs no recalculation
+    dimensions = get_meta_dimensions()
+    col_filter4, col_filter5 = st.columns(2)
+    with col_filter4:
+        patch_filter = st.selectbox("Parche", options=[None] + dimensions['patches'],
+                                    format_func=lambda x: 'Todos' if x is None else x)
+    with col_filter5:
+        region_filter = st.selectbox("Región", options=[None] + dimensions['regions'],
+                                     format_func=lambda x: 'Todas' if x is None else REGIONS.get(x, x.upper()))
+    
     # Fetch data
     try:
-        top_comps_full = get_top_comps(limit=int(limit_filter), min_games=min_games_filter, order_by=order_by_filter)
+        top_comps_full = get_top_comps(limit=int(limit_filter), min_games=min_games_filter, order_by=order_by_filter,
+                                       patch=patch_filter, region=region_filter)
         
         if top_comps_full:
             table_data = []